@@ -0,0 +1,44 @@
+import numpy as np
+
+# Channel views besides a channel number (0 is the first channel): the
+# mean of all channels and the channel with the most energy
+MIX_VIEWS = ("mean", "max_energy")
+
+
+def parse_channel_view(view):
+    """Normalise *view* to ``"mean"``, ``"max_energy"`` or a channel index.
+
+    Channel numbers may be given as strings, as they come from the config.
+    """
+    if view in MIX_VIEWS:
+        return view
+    try:
+        channel = int(view)
+    except (TypeError, ValueError):
+        channel = -1
+    if channel < 0:
+        raise ValueError(
+            f"Unknown channel view {view!r}, expected {', '.join(MIX_VIEWS)} "
+            "or a channel number"
+        )
+    return channel
+
+
+def mix_channels(block, channel=None):
+    """Reduce an ``(n, channels)`` block to one channel or to their mean.
+
+    Args:
+        block (np.ndarray): Samples, one column per channel; 1-D blocks
+            are returned unchanged.
+        channel (int, optional): Channel to keep, None for the mean.
+
+    Returns:
+        np.ndarray: ``(n,)`` float32 samples.
+    """
+    if block.ndim == 1:
+        return block
+    if channel is not None:
+        return block[:, channel]
+    if block.shape[1] == 1:
+        return block[:, 0]
+    return block.mean(axis=1, dtype=np.float32)
@@ -1,5 +1,28 @@
-import soundfile as sf
+import hashlib
+import io
+import numpy as np
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import CONFIG
+from audio_processor.channels import mix_channels
+from audio_processor.sample_source import (
+    APPROXIMATE_SEEK_FORMATS,
+    SampleSource,
+    resolve_channel,
+)
+
+# File extension written for each output format
+CUT_EXTENSIONS = {"WAV": ".wav", "FLAC": ".flac"}
+
+
+def cut_format():
+    """Return the ``(format, subtype)`` cuts are written with."""
+    return CONFIG.get("CUT_FORMAT", "WAV"), CONFIG.get("CUT_SUBTYPE", "PCM_16")
+
+
+def cut_all_channels():
+    """True if cuts keep every channel instead of the channel view on screen."""
+    return CONFIG.get("CUT_CHANNELS", "view") == "all"
 
 
 def cut_audio_segment(audio_data, samplerate, start_time, end_time, output_path):
@@ -7,16 +30,270 @@ def cut_audio_segment(audio_data, samplerate, start_time, end_time, output_path)
     Cuts a segment from audio data and saves it to a file.
 
     Args:
-        audio_data (np.ndarray): The full audio data.
+        audio_data (SampleSource or np.ndarray): The full audio data. A
+            sample source is cut in its channel view, or with every channel
+            when ``CUT_CHANNELS`` is ``"all"``.
         samplerate (int): The sample rate of the audio.
         start_time (float): Start time of the segment in seconds.
         end_time (float): End time of the segment in seconds.
         output_path (str): Path to save the cut audio file.
     """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    write_cut(audio_data, samplerate, start_time, end_time, output_path)
+
+
+def cut_output_path(output_dir, audio_path, index, category):
+    """Path of the *index*-th cut of *audio_path*, inside its category folder."""
+    base_name, _ = os.path.splitext(os.path.basename(audio_path))
+    extension = CUT_EXTENSIONS.get(cut_format()[0], ".wav")
+    filename = f"{base_name}_cut_{index}_{category}{extension}"
+    return os.path.join(output_dir, category, filename)
+
+
+def write_cut(audio_data, samplerate, start_time, end_time, output_path):
+    """Write one segment to *output_path*, whose directory must already exist."""
+    import soundfile as sf
+
     start_frame = int(start_time * samplerate)
     end_frame = int(end_time * samplerate)
 
-    cut_audio = audio_data[start_frame:end_frame]
+    if cut_all_channels() and isinstance(audio_data, SampleSource):
+        start, stop, _ = slice(start_frame, end_frame).indices(len(audio_data))
+        cut_audio = audio_data.read_channels(start, max(start, stop))
+    else:
+        cut_audio = audio_data[start_frame:end_frame]
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    sf.write(output_path, cut_audio, samplerate)
+    output_format, subtype = cut_format()
+    sf.write(output_path, cut_audio, samplerate, subtype=subtype, format=output_format)
+
+
+def export_cuts(audio_data, samplerate, cuts, max_workers=None, progress_callback=None):
+    """
+    Writes several segments of one recording in parallel.
+
+    Output directories are created once up front, then every segment is
+    encoded and written by a thread pool; libsndfile releases the GIL
+    while it encodes and writes, so slow disks and network shares are
+    written to concurrently. A failing cut does not stop the others.
+
+    Args:
+        audio_data (SampleSource or np.ndarray): The full audio data.
+        samplerate (int): The sample rate of the audio.
+        cuts (list): ``(start_time, end_time, output_path)`` tuples.
+        max_workers (int, optional): Pool size, ``CUT_EXPORT_WORKERS`` by
+            default.
+        progress_callback (callable, optional): Called with
+            ``(done, total)`` after each cut.
+
+    Returns:
+        tuple: ``(written, errors)`` where ``written`` lists the output
+        paths in the order of *cuts* and ``errors`` holds
+        ``(output_path, message)`` for each cut that failed.
+    """
+    errors = []
+    failed_dirs = {}
+    for directory in sorted({os.path.dirname(path) for _, _, path in cuts}):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            failed_dirs[directory] = str(e)
+
+    pending = []
+    for cut in cuts:
+        message = failed_dirs.get(os.path.dirname(cut[2]))
+        if message is None:
+            pending.append(cut)
+        else:
+            errors.append((cut[2], message))
+
+    total = len(cuts)
+    done = len(errors)
+    succeeded = set()
+    if progress_callback is not None and done:
+        progress_callback(done, total)
+    if max_workers is None:
+        max_workers = CONFIG.get("CUT_EXPORT_WORKERS", 4)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(write_cut, audio_data, samplerate, start, end, path): path
+            for start, end, path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                future.result()
+                succeeded.add(path)
+            except Exception as e:
+                errors.append((path, str(e)))
+            done += 1
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+    written = [path for _, _, path in cuts if path in succeeded]
+    return written, errors
+
+
+def read_segments(audio_path, ranges, block=65536):
+    """
+    Reads only the requested ranges of a recording, in one forward pass.
+
+    The ranges are sorted by offset and overlapping ones are merged, so
+    every frame is read at most once. Files soundfile can seek in exactly
+    are seeked to each range; compressed streams (MP3, OGG) are skipped
+    forward block by block instead, stopping after the last range.
+
+    Args:
+        audio_path (str): Source recording.
+        ranges (list): ``(start_time, end_time)`` pairs in seconds.
+        block (int): Frames discarded per read while skipping forward.
+
+    Yields:
+        tuple: ``(index, samples, samplerate)`` in offset order, ``index``
+        being the position of the range in *ranges* and ``samples`` a
+        ``(frames, channels)`` array.
+    """
+    import soundfile as sf
+
+    with sf.SoundFile(audio_path) as f:
+        samplerate = f.samplerate
+        frames = f.frames
+        exact_seek = f.format not in APPROXIMATE_SEEK_FORMATS
+        spans = sorted(
+            (
+                min(max(int(start * samplerate), 0), frames),
+                min(max(int(end * samplerate), 0), frames),
+                index,
+            )
+            for index, (start, end) in enumerate(ranges)
+        )
+        skip_buffer = None
+        position = 0
+        first = 0
+        while first < len(spans):
+            span_start, span_end, _ = spans[first]
+            last = first + 1
+            while last < len(spans) and spans[last][0] < span_end:
+                span_end = max(span_end, spans[last][1])
+                last += 1
+
+            if exact_seek:
+                f.seek(span_start)
+            else:
+                if skip_buffer is None:
+                    skip_buffer = np.empty((block, f.channels), dtype=np.float32)
+                while position < span_start:
+                    count = min(block, span_start - position)
+                    skipped = len(f.read(count, out=skip_buffer[:count]))
+                    if skipped == 0:
+                        break
+                    position += skipped
+            data = f.read(
+                max(0, span_end - span_start), dtype="float32", always_2d=True
+            )
+            position = span_start + len(data)
+
+            for start, end, index in spans[first:last]:
+                yield index, data[start - span_start : end - span_start], samplerate
+            first = last
+
+
+def cut_is_current(output_path, cut_audio, samplerate, verify="size"):
+    """
+    Tells whether *output_path* already holds *cut_audio*.
+
+    Args:
+        output_path (str): Existing cut, if any.
+        cut_audio (np.ndarray): Samples the cut should contain.
+        samplerate (int): The sample rate of the audio.
+        verify (str): ``"size"`` compares the frame count, sample rate and
+            format in the file header, ``"hash"`` encodes the cut in memory
+            and compares its SHA-1 with the file on disk, ``"none"`` always
+            rewrites.
+
+    Returns:
+        bool: True if the file can be kept as it is.
+    """
+    import soundfile as sf
+
+    if verify == "none" or not os.path.exists(output_path):
+        return False
+    output_format, subtype = cut_format()
+    if verify == "hash":
+        encoded = io.BytesIO()
+        sf.write(encoded, cut_audio, samplerate, subtype=subtype, format=output_format)
+        with open(output_path, "rb") as f:
+            existing = hashlib.sha1(f.read()).digest()
+        return existing == hashlib.sha1(encoded.getvalue()).digest()
+    try:
+        info = sf.info(output_path)
+    except RuntimeError:
+        return False  # Truncated or not a sound file
+    return (
+        info.frames == len(cut_audio)
+        and info.samplerate == samplerate
+        and info.format == output_format
+        and info.subtype == subtype
+    )
+
+
+def recut_audio_file(audio_path, cuts, verify="size", view=None, all_channels=None):
+    """
+    Regenerates every cut of one recording, opening it only once.
+
+    Only the labeled ranges are read from the source (see
+    :func:`read_segments`), so a few cuts out of a 4-hour file never
+    decode the whole file. Meant to run in a worker process of the batch
+    re-cut command; the output directories must already exist.
+
+    Args:
+        audio_path (str): Source recording.
+        cuts (list): ``(start_time, end_time, output_path)`` tuples.
+        verify (str): How existing cuts are checked, see
+            :func:`cut_is_current`.
+        view (str or int, optional): Channel view the cuts are made from,
+            ``CHANNEL_VIEW`` by default.
+        all_channels (bool, optional): Keep every channel instead, see
+            :func:`cut_all_channels` for the default.
+
+    Returns:
+        dict: ``written``, ``skipped`` and ``bytes`` written, plus
+        ``errors`` as ``(output_path, message)`` tuples.
+    """
+    import soundfile as sf
+
+    result = {"written": 0, "skipped": 0, "bytes": 0, "errors": []}
+    output_format, subtype = cut_format()
+    pending = set(range(len(cuts)))
+    if all_channels is None:
+        all_channels = cut_all_channels()
+    try:
+        channel = None
+        if not all_channels:
+            channel = resolve_channel(
+                audio_path, CONFIG.get("CHANNEL_VIEW", "mean") if view is None else view
+            )
+        ranges = [(start_time, end_time) for start_time, end_time, _ in cuts]
+        for index, segment, samplerate in read_segments(audio_path, ranges):
+            pending.discard(index)
+            output_path = cuts[index][2]
+            cut_audio = segment if all_channels else mix_channels(segment, channel)
+            try:
+                if cut_is_current(output_path, cut_audio, samplerate, verify):
+                    result["skipped"] += 1
+                    continue
+                sf.write(
+                    output_path,
+                    cut_audio,
+                    samplerate,
+                    subtype=subtype,
+                    format=output_format,
+                )
+                result["written"] += 1
+                result["bytes"] += os.path.getsize(output_path)
+            except Exception as e:
+                result["errors"].append((output_path, str(e)))
+    except Exception as e:
+        # The source could not be opened or read past some point
+        for index in sorted(pending):
+            result["errors"].append((cuts[index][2], str(e)))
+    return result
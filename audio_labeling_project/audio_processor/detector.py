@@ -0,0 +1,321 @@
+import os
+import threading
+import time
+import numpy as np
+from config import CONFIG
+from audio_processor.display_stft import hann_window
+from audio_processor.loader import LoadCancelled
+from audio_processor.sample_source import open_sample_source, view_key_for
+from audio_processor.spectrogram_cache import entry_path, get_cache_dir, note_cache_write
+
+# Bumped when the algorithm changes so cached candidates are recomputed
+DETECTOR_VERSION = 2
+
+# Floor of the band power before it is converted to dB
+POWER_FLOOR = 1e-12
+
+
+def get_detector_params():
+    """Return the detector settings configured in ``CONFIG["DETECTOR"]``."""
+    params = {
+        "n_fft": 1024,
+        "hop_length": 512,
+        "low_hz": 200.0,
+        "high_hz": 2000.0,
+        "threshold_db": 8.0,
+        "noise_seconds": 30.0,
+        "noise_percentile": 20.0,
+        "min_duration": 0.3,
+        "merge_gap": 0.5,
+        "padding": 0.2,
+    }
+    params.update(CONFIG.get("DETECTOR", {}))
+    return params
+
+
+def band_energy_envelope(
+    source,
+    n_fft=1024,
+    hop_length=512,
+    low_hz=200.0,
+    high_hz=2000.0,
+    block_frames=2048,
+    progress_callback=None,
+    is_cancelled=None,
+):
+    """Return the band-limited energy of *source* in dB, one value per frame.
+
+    The recording is read sequentially in blocks of ``block_frames`` frames, the
+    ``n_fft - hop_length`` overlap being carried over to the next block. Each
+    block is framed with a strided view and transformed with a single
+    ``rfft`` call; only the bins between *low_hz* and *high_hz* are summed.
+
+    Parameters
+    ----------
+    source : SampleSource
+        Recording to analyse, in its channel view.
+    n_fft, hop_length : int
+        Frame length and hop, in samples.
+    low_hz, high_hz : float
+        Frequency band whose power makes up the envelope.
+    block_frames : int
+        Number of frames computed per step.
+    progress_callback : callable, optional
+        Called with ``(frames_read, total_frames)`` after every block.
+    is_cancelled : callable, optional
+        Polled between blocks; raises :class:`LoadCancelled` when it
+        returns True.
+
+    Returns
+    -------
+    tuple
+        ``(envelope, samplerate, total_frames)``; frame ``i`` covers
+        samples ``[i * hop_length, i * hop_length + n_fft)``.
+    """
+    window = hann_window(n_fft).astype(np.float32)
+    read_size = block_frames * hop_length
+    envelopes = []
+    samplerate = source.samplerate
+    total = len(source)
+    frequencies = np.fft.rfftfreq(n_fft, 1.0 / samplerate)
+    band = np.flatnonzero((frequencies >= low_hz) & (frequencies <= high_hz))
+    low_bin, high_bin = (band[0], band[-1] + 1) if len(band) else (0, 0)
+    # Power spectral density, so the threshold does not depend on n_fft
+    scale = 2.0 / float(np.sum(window**2) * samplerate)
+    buffer = np.zeros(0, dtype=np.float32)
+    read = 0
+    while True:
+        if is_cancelled is not None and is_cancelled():
+            raise LoadCancelled(source.path)
+        chunk = source[read : read + read_size]
+        read += len(chunk)
+        buffer = np.concatenate([buffer, chunk])
+        if len(buffer) >= n_fft:
+            count = 1 + (len(buffer) - n_fft) // hop_length
+            frames = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[
+                : count * hop_length : hop_length
+            ]
+            spectrum = np.fft.rfft(frames * window, axis=1)[:, low_bin:high_bin]
+            power = np.einsum("ij,ij->i", spectrum.real, spectrum.real)
+            power += np.einsum("ij,ij->i", spectrum.imag, spectrum.imag)
+            power *= scale
+            envelopes.append(10.0 * np.log10(np.maximum(power, POWER_FLOOR)))
+            buffer = buffer[count * hop_length :]
+        if progress_callback is not None:
+            progress_callback(read, total)
+        if len(chunk) < read_size:
+            break
+    if not envelopes:
+        return np.zeros(0, dtype=np.float32), samplerate, total
+    return np.concatenate(envelopes).astype(np.float32), samplerate, total
+
+
+def adaptive_threshold(envelope, window_frames, percentile=20.0, threshold_db=8.0):
+    """Return a per-frame threshold following the local noise floor.
+
+    The floor is the *percentile* of the envelope over consecutive windows
+    of *window_frames*, linearly interpolated between window centres, so
+    wind, rain or a generator starting halfway through a night raises the
+    threshold with it. Frames must exceed the floor by *threshold_db*.
+    """
+    count = len(envelope)
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    window_frames = max(1, min(int(window_frames), count))
+    full = count // window_frames
+    floors = []
+    centres = []
+    if full:
+        windows = envelope[: full * window_frames].reshape(full, window_frames)
+        floors.append(np.percentile(windows, percentile, axis=1))
+        centres.append((np.arange(full) + 0.5) * window_frames)
+    rest = envelope[full * window_frames :]
+    if len(rest):
+        floors.append([np.percentile(rest, percentile)])
+        centres.append([full * window_frames + len(rest) / 2])
+    floor = np.interp(
+        np.arange(count), np.concatenate(centres), np.concatenate(floors)
+    )
+    return (floor + threshold_db).astype(np.float32)
+
+
+def mask_to_runs(mask):
+    """Return the ``(starts, stops)`` frame indices of the True runs of *mask*."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def merge_close_segments(starts, ends, max_gap):
+    """Join segments separated by at most *max_gap*; both arrays are sorted."""
+    if len(starts) < 2:
+        return starts, ends
+    separate = starts[1:] - ends[:-1] > max_gap
+    return starts[np.r_[True, separate]], ends[np.r_[separate, True]]
+
+
+def detect_segments(envelope, samplerate, total_frames, params):
+    """
+    Turns a band energy envelope into candidate segments.
+
+    Args:
+        envelope (np.ndarray): Output of :func:`band_energy_envelope`.
+        samplerate (int): Sample rate of the recording.
+        total_frames (int): Length of the recording in samples.
+        params (dict): Detector settings, see :func:`get_detector_params`.
+
+    Returns:
+        np.ndarray: ``(n, 2)`` array of ``(start, end)`` times in seconds.
+    """
+    hop_seconds = params["hop_length"] / samplerate
+    threshold = adaptive_threshold(
+        envelope,
+        params["noise_seconds"] / hop_seconds,
+        params["noise_percentile"],
+        params["threshold_db"],
+    )
+    first, stop = mask_to_runs(envelope > threshold)
+    starts = first * hop_seconds
+    ends = (stop - 1) * hop_seconds + params["n_fft"] / samplerate
+    starts, ends = merge_close_segments(starts, ends, params["merge_gap"])
+    keep = ends - starts >= params["min_duration"]
+    duration = total_frames / samplerate
+    starts = np.maximum(starts[keep] - params["padding"], 0.0)
+    ends = np.minimum(ends[keep] + params["padding"], duration)
+    # Padding can make neighbours touch again
+    starts, ends = merge_close_segments(starts, ends, 0.0)
+    return np.column_stack([starts, ends]).astype(np.float64)
+
+
+def segments_to_candidates(segments):
+    """Return *segments* in the ``(start, end, category)`` format of annotations."""
+    return [(float(start), float(end), None) for start, end in segments]
+
+
+def candidates_cache_path(audio_path, params, view_key="mean"):
+    """Cache file of the candidates found in the *view_key* channel view."""
+    params = dict(params, version=DETECTOR_VERSION, view=view_key)
+    return entry_path(audio_path, params, kind="candidates")
+
+
+def load_cached_candidates(audio_path, params=None, view_key="mean"):
+    """Return the cached candidates of *audio_path*, or None on a miss.
+
+    *view_key* is the :attr:`SampleSource.view_key` of the channel view
+    the candidates were detected in.
+    """
+    params = params or get_detector_params()
+    try:
+        path = candidates_cache_path(audio_path, params, view_key)
+        segments = np.load(path)
+    except (OSError, ValueError):
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return segments_to_candidates(segments.reshape(-1, 2))
+
+
+def store_cached_candidates(audio_path, params, segments, view_key="mean"):
+    cache_dir = get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    path = candidates_cache_path(audio_path, params, view_key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(segments, dtype=np.float64))
+    os.replace(tmp_path, path)
+    note_cache_write(path, cache_dir)
+
+
+def detect_candidates(
+    audio_path,
+    params=None,
+    force=False,
+    progress_callback=None,
+    is_cancelled=None,
+    view=None,
+    source=None,
+):
+    """
+    Proposes the segments of *audio_path* worth listening to.
+
+    Results are cached next to the spectrograms, keyed by the file, the
+    channel view and the detector settings, so a folder processed by
+    ``detect.py`` opens with its candidates already known.
+
+    Args:
+        audio_path (str): Recording to analyse.
+        params (dict, optional): Detector settings, ``CONFIG["DETECTOR"]``
+            by default.
+        force (bool): Ignore the cache.
+        progress_callback (callable, optional): Called with
+            ``(frames_read, total_frames)``.
+        is_cancelled (callable, optional): Polled between blocks.
+        view (str or int, optional): Channel view to analyse,
+            ``CHANNEL_VIEW`` by default; see
+            :meth:`audio_processor.sample_source.SampleSource.with_view`.
+        source (SampleSource, optional): The recording already open in the
+            view to analyse; *view* is then ignored and the source is left
+            open.
+
+    Returns:
+        dict: ``candidates`` (``(start, end, None)`` tuples), ``duration``
+        of the recording and ``elapsed`` processing time in seconds,
+        ``speed`` as a multiple of real time, whether the result was
+        ``cached`` and the ``view_key`` of the channel view analysed.
+    """
+    import soundfile as sf
+
+    params = params or get_detector_params()
+    if view is None:
+        view = CONFIG.get("CHANNEL_VIEW", "mean")
+    started = time.perf_counter()
+    view_key = source.view_key if source is not None else view_key_for(audio_path, view)
+    if not force:
+        candidates = load_cached_candidates(audio_path, params, view_key)
+        if candidates is not None:
+            return {
+                "candidates": candidates,
+                "duration": sf.info(audio_path).duration,
+                "elapsed": time.perf_counter() - started,
+                "speed": None,
+                "cached": True,
+                "view_key": view_key,
+            }
+
+    opened = None
+    if source is None:
+        source = opened = open_sample_source(audio_path, view, is_cancelled=is_cancelled)
+    try:
+        envelope, samplerate, total_frames = band_energy_envelope(
+            source,
+            n_fft=params["n_fft"],
+            hop_length=params["hop_length"],
+            low_hz=params["low_hz"],
+            high_hz=params["high_hz"],
+            block_frames=CONFIG.get("DETECT_BLOCK_FRAMES", 2048),
+            progress_callback=progress_callback,
+            is_cancelled=is_cancelled,
+        )
+    finally:
+        if opened is not None:
+            opened.close()
+    # The source may have been closed under a cancelled detection; its
+    # short read must not be cached
+    if is_cancelled is not None and is_cancelled():
+        raise LoadCancelled(audio_path)
+    segments = detect_segments(envelope, samplerate, total_frames, params)
+    elapsed = time.perf_counter() - started
+    try:
+        store_cached_candidates(audio_path, params, segments, view_key)
+    except OSError:
+        pass  # A read-only disk only costs a new detection next time
+    duration = total_frames / samplerate if samplerate else 0.0
+    return {
+        "candidates": segments_to_candidates(segments),
+        "duration": duration,
+        "elapsed": elapsed,
+        "speed": duration / elapsed if elapsed > 0 else None,
+        "cached": False,
+        "view_key": view_key,
+    }
@@ -0,0 +1,305 @@
+import math
+import numpy as np
+from audio_processor.loader import LoadCancelled
+from audio_processor.spectrogram_cache import load_cached_array, store_cached_array
+
+# Same floor and dynamic range as librosa.amplitude_to_db(..., ref=np.max)
+AMIN = 1e-5
+TOP_DB = 80.0
+# Windows accepted by CONFIG["STFT"]["window"], periodic like librosa's
+WINDOWS = {
+    "hann": lambda n_fft: np.hanning(n_fft + 1)[:-1],
+    "hamming": lambda n_fft: np.hamming(n_fft + 1)[:-1],
+    "blackman": lambda n_fft: np.blackman(n_fft + 1)[:-1],
+    "rectangular": np.ones,
+}
+# Frames read with a single slice of the source when they span at most
+# this many samples; sparser frames are read one by one
+CONTIGUOUS_READ_SAMPLES = 1 << 22
+# Frames transformed per step, which bounds the temporary buffers
+FFT_BLOCK_FRAMES = 1024
+# Bump when the columns computed for a plan change, so old cache entries
+# are no longer read
+COLUMNS_VERSION = 1
+
+
+def stft_frame_count(total_frames, hop_length):
+    """Number of STFT frames for *total_frames* samples with centred frames."""
+    return 1 + total_frames // hop_length
+
+
+def hann_window(n_fft):
+    """Periodic Hann window, as used by librosa.stft."""
+    return 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)
+
+
+def stft_window(name, n_fft):
+    """Return the float32 analysis window called *name*."""
+    try:
+        return WINDOWS[name](n_fft).astype(np.float32)
+    except KeyError:
+        raise ValueError(
+            f"Unknown STFT window {name!r}, expected one of: {', '.join(WINDOWS)}"
+        ) from None
+
+
+def shown_bins(samplerate, n_fft, fmax=None):
+    """Number of STFT bins from 0 Hz up to *fmax* (the Nyquist frequency if None)."""
+    n_bins = n_fft // 2 + 1
+    if fmax is None or fmax >= samplerate / 2:
+        return n_bins
+    return max(2, min(n_bins, int(fmax * n_fft / samplerate) + 1))
+
+
+def plan_columns(start_time, end_time, columns, samplerate, params):
+    """Choose the STFT frames needed to draw *columns* pixel columns.
+
+    A column covering up to ``frames_per_column`` hops gets every frame
+    that falls in it, so zoomed-in views match the full STFT. Wider
+    columns get ``frames_per_column`` evenly spaced frames instead of the
+    hundreds a full STFT would compute and then reduce away; 0 disables
+    that limit. Columns narrower than a hop get one frame each, centred on
+    the column.
+
+    Args:
+        start_time (float): Time at the left edge, in seconds.
+        end_time (float): Time at the right edge, in seconds.
+        columns (int): Number of pixel columns.
+        samplerate (int): Sample rate of the recording.
+        params (dict): STFT settings, see
+            :func:`audio_processor.spectrogram_generator.get_stft_params`.
+
+    Returns:
+        dict: ``n_fft``, ``window``, ``frames_per_column``, ``hop_length``
+        (samples between the frames actually computed, possibly
+        fractional), ``columns``, ``ffts``, ``bins``, ``fmax`` (highest bin
+        kept, in Hz) and ``start`` (sample at the left edge).
+    """
+    n_fft = params["n_fft"]
+    limit = params.get("frames_per_column", 8)
+    samples_per_column = (end_time - start_time) * samplerate / columns
+    native = max(1, math.ceil(samples_per_column / params["hop_length"]))
+    per_column = min(native, limit) if limit else native
+    n_bins = shown_bins(samplerate, n_fft, params.get("fmax"))
+    return {
+        "n_fft": n_fft,
+        "window": params.get("window", "hann"),
+        "frames_per_column": per_column,
+        "hop_length": samples_per_column / per_column,
+        "columns": columns,
+        "ffts": columns * per_column,
+        "bins": n_bins,
+        "fmax": (n_bins - 1) * samplerate / n_fft,
+        "start": start_time * samplerate,
+    }
+
+
+def frame_starts(plan, n_fft):
+    """First sample of every frame of *plan*; frames are centred like librosa's."""
+    centres = plan["start"] + (np.arange(plan["ffts"]) + 0.5) * plan["hop_length"]
+    return np.floor(centres).astype(np.int64) - n_fft // 2
+
+
+def read_frames(source, starts, n_fft):
+    """Read the frames beginning at *starts* into an ``(n, n_fft)`` array.
+
+    Samples outside the recording are zero. Frames close together are cut
+    out of one slice of *source*; far apart ones are read one by one, so
+    the samples between them are never touched.
+    """
+    frames = np.zeros((len(starts), n_fft), dtype=np.float32)
+    if not len(starts):
+        return frames
+    total = len(source)
+    first = int(starts[0])
+    last = int(starts[-1]) + n_fft
+    if last - first <= CONTIGUOUS_READ_SAMPLES:
+        buffer = np.zeros(last - first, dtype=np.float32)
+        low, high = max(0, first), min(total, last)
+        if low < high:
+            buffer[low - first : high - first] = source[low:high]
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)
+        frames[:] = windows[starts - first]
+        return frames
+    for row, start in zip(frames, starts.tolist()):
+        low, high = max(0, start), min(total, start + n_fft)
+        if low < high:
+            row[low - start : high - start] = source[low:high]
+    return frames
+
+
+def column_spectrogram_db(
+    source, start_time, end_time, columns, params, progress_callback=None, is_cancelled=None
+):
+    """Compute one spectrogram column per pixel between two times.
+
+    Parameters
+    ----------
+    source : SampleSource
+        Recording to analyse; only the frames chosen by
+        :func:`plan_columns` are read.
+    start_time, end_time : float
+        Time range in seconds. Columns outside the recording are silent.
+    columns : int
+        Number of pixel columns.
+    params : dict
+        STFT settings: ``n_fft``, ``hop_length``, ``window``, ``fmax`` and
+        ``frames_per_column``.
+    progress_callback : callable, optional
+        Called with ``(columns_done, columns)``.
+    is_cancelled : callable, optional
+        Polled between blocks; raises :class:`LoadCancelled` when it
+        returns True.
+
+    Returns
+    -------
+    tuple
+        ``(bins, columns)`` float32 matrix of magnitudes in dB (not
+        normalised), lowest frequency first, and the plan of
+        :func:`plan_columns`. Each column holds the loudest of the frames
+        computed for it, so a call between two pixels is not averaged
+        away. When a column spans more hops than ``frames_per_column``
+        only that many evenly spaced frames are computed, and a call
+        shorter than the gap between them can be missed until the view is
+        zoomed in.
+    """
+    plan = plan_columns(start_time, end_time, columns, source.samplerate, params)
+    n_fft = plan["n_fft"]
+    n_bins = plan["bins"]
+    window = stft_window(plan["window"], n_fft)
+    starts = frame_starts(plan, n_fft)
+    per_column = plan["frames_per_column"]
+    out = np.empty((n_bins, columns), dtype=np.float32)
+    block = max(1, FFT_BLOCK_FRAMES // per_column)
+    for first in range(0, columns, block):
+        if is_cancelled is not None and is_cancelled():
+            raise LoadCancelled(source.path)
+        last = min(columns, first + block)
+        frames = read_frames(source, starts[first * per_column : last * per_column], n_fft)
+        frames *= window
+        magnitude = np.abs(np.fft.rfft(frames, axis=1)[:, :n_bins])
+        out[:, first:last] = magnitude.reshape(last - first, per_column, n_bins).max(
+            axis=1
+        ).T
+        if progress_callback is not None:
+            progress_callback(last, columns)
+    np.maximum(out, AMIN, out=out)
+    np.log10(out, out=out)
+    out *= 20.0
+    return out, plan
+
+
+def cached_column_spectrogram_db(
+    source, start_time, end_time, columns, params, progress_callback=None, is_cancelled=None
+):
+    """:func:`column_spectrogram_db` through the on-disk cache.
+
+    Entries are keyed by the file, the channel view of *source* and the
+    plan, so the overview and every zoom tile are computed once per
+    recording and read back when it is opened again. Sources without a
+    file (``path`` None) are computed every time.
+
+    Returns:
+        tuple: The ``(bins, columns)`` float32 matrix, a writable copy even
+        on a hit, and the plan.
+    """
+    if getattr(source, "path", None) is None:
+        return column_spectrogram_db(
+            source, start_time, end_time, columns, params, progress_callback, is_cancelled
+        )
+    plan = plan_columns(start_time, end_time, columns, source.samplerate, params)
+    key = {"plan": plan, "view": source.view_key, "version": COLUMNS_VERSION}
+    cached = load_cached_array(source.path, key, kind="cols")
+    if cached is not None:
+        return np.array(cached, dtype=np.float32), plan
+    db, plan = column_spectrogram_db(
+        source, start_time, end_time, columns, params, progress_callback, is_cancelled
+    )
+    try:
+        store_cached_array(source.path, key, db, kind="cols")
+    except OSError:
+        pass  # A read-only disk must not break loading
+    return db, plan
+
+
+def describe_plan(plan):
+    """One-line summary of a plan, for the status bar and the log."""
+    return (
+        f"n_fft {plan['n_fft']} ({plan['window']}), hop {plan['hop_length']:.0f} "
+        f"samples, {plan['frames_per_column']} frame(s)/column, "
+        f"{plan['bins']} bins up to {plan['fmax']:.0f} Hz"
+    )
+
+
+class DisplaySpectrogram:
+    """Spectrogram of a recording, computed at the resolution it is shown at.
+
+    Nothing is computed up front: :meth:`columns_db` analyses just the
+    frames needed for a time range and a pixel width, reading them from
+    the sample source. dB values are made relative to *ref_db*, the peak
+    of the overview, so tiles rendered later use the same colour scale.
+    Computed columns are kept in the on-disk cache.
+    """
+
+    def __init__(self, source, params, ref_db=0.0):
+        self.source = source
+        self.params = params
+        self.ref_db = ref_db
+
+    @property
+    def samplerate(self):
+        return self.source.samplerate
+
+    @property
+    def n_fft(self):
+        return self.params["n_fft"]
+
+    @property
+    def duration(self):
+        return len(self.source) / self.source.samplerate
+
+    def frame_count(self):
+        """Frames of the full STFT, which sets the deepest useful zoom level."""
+        return stft_frame_count(len(self.source), self.params["hop_length"])
+
+    def plan(self, start_time, end_time, columns):
+        """Parameters :meth:`columns_db` would use, without computing anything."""
+        return plan_columns(start_time, end_time, columns, self.samplerate, self.params)
+
+    def columns_db(self, start_time, end_time, columns, **kwargs):
+        """Return the normalised ``(bins, columns)`` dB matrix and its plan.
+
+        Values are relative to :attr:`ref_db` and clipped at ``-TOP_DB``,
+        like ``librosa.amplitude_to_db(..., ref=np.max)``.
+        """
+        db, plan = cached_column_spectrogram_db(
+            self.source, start_time, end_time, columns, self.params, **kwargs
+        )
+        db -= self.ref_db
+        np.maximum(db, -TOP_DB, out=db)
+        return db, plan
+
+
+def display_spectrogram(source, columns, params, progress_callback=None, is_cancelled=None):
+    """Compute the overview of *source* at *columns* pixels wide.
+
+    The raw columns come from the on-disk cache when the recording was
+    opened before at the same width and settings.
+
+    Returns:
+        tuple: The :class:`DisplaySpectrogram` of the recording, the
+        normalised ``(bins, columns)`` overview matrix and its plan.
+    """
+    db, plan = cached_column_spectrogram_db(
+        source,
+        0.0,
+        len(source) / source.samplerate,
+        columns,
+        params,
+        progress_callback=progress_callback,
+        is_cancelled=is_cancelled,
+    )
+    ref_db = float(db.max()) if db.size else 0.0
+    db -= ref_db
+    np.maximum(db, -TOP_DB, out=db)
+    return DisplaySpectrogram(source, params, ref_db), db, plan
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class LoadCancelled(Exception):
+    """Raised when a load is cancelled before it finishes."""
+
+
+def decode_audio_file(audio_path, block=65536, progress_callback=None, is_cancelled=None):
+    """Decode *audio_path* into a float32 array holding every channel.
+
+    Parameters
+    ----------
+    audio_path : str
+        Path of the audio file to read.
+    block : int, optional
+        Number of frames read per chunk.
+    progress_callback : callable, optional
+        Called with ``(frames_read, total_frames)`` after every chunk.
+    is_cancelled : callable, optional
+        Polled after every chunk; when it returns ``True`` the decode stops
+        and :class:`LoadCancelled` is raised.
+
+    Returns
+    -------
+    tuple
+        ``(audio_data, samplerate)``; ``audio_data`` is ``(frames,)`` for
+        mono files and ``(frames, channels)`` otherwise.
+    """
+    # Not at module level: LoadCancelled is imported by the window at startup
+    import soundfile as sf
+
+    with sf.SoundFile(audio_path) as f:
+        samplerate = f.samplerate
+        frames = f.frames
+        shape = frames if f.channels == 1 else (frames, f.channels)
+        audio_data = np.empty(shape, dtype="float32")
+        read = 0
+        while read < frames:
+            if is_cancelled is not None and is_cancelled():
+                raise LoadCancelled(audio_path)
+            chunk = f.read(min(block, frames - read), dtype="float32")
+            length = len(chunk)
+            if length == 0:
+                break
+            audio_data[read : read + length] = chunk
+            read += length
+            if progress_callback is not None:
+                progress_callback(read, frames)
+    return audio_data[:read], samplerate
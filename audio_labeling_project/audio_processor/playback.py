@@ -0,0 +1,264 @@
+import threading
+import numpy as np
+from config import CONFIG
+
+# Largest block the callback is prepared for without reallocating
+MAX_BLOCK_FRAMES = 8192
+# Frames the reader thread copies from the source per iteration
+READ_CHUNK_FRAMES = 16384
+
+
+class PlaybackEngine:
+    """Real-time-safe playback of a :class:`SampleSource`.
+
+    One output stream is kept open per sample rate and runs continuously.
+    A reader thread copies samples from the source into a ring buffer and
+    the PortAudio callback only copies out of that buffer, so the callback
+    never touches the disk, never allocates, never calls into Qt and never
+    prints. Gain is applied in place with a per-block linear ramp towards
+    the requested value (no zipper noise on Up/Down).
+
+    Play, pause and seek are plain attribute updates picked up on the next
+    callback; nothing opens or closes the device. A seek is published as a
+    serial number plus target frame; the reader answers it with a flush
+    marker ``(serial, ring_index, frame)`` telling the callback where the
+    new data starts. Until then the callback outputs silence rather than
+    stale audio.
+
+    The ring indices grow monotonically and each is written by one thread
+    only (``write_index`` by the reader, ``read_index`` by the callback);
+    single attribute stores are atomic under the GIL. The GUI polls
+    :meth:`current_position`, :attr:`finished`, :attr:`xruns` and
+    :attr:`underruns` from a timer.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.stream = None
+        self.stream_samplerate = None
+        self.playing = False
+        self.position = 0
+        self.finished = False
+        self.xruns = 0
+        self.underruns = 0
+        self.gain = 1.0
+        self.target_gain = 1.0
+        self.ramp = np.empty(MAX_BLOCK_FRAMES, dtype=np.float32)
+        self.ramp_steps = np.arange(1, MAX_BLOCK_FRAMES + 1, dtype=np.float32)
+
+        self.ring = np.zeros(0, dtype=np.float32)
+        self.read_index = 0
+        self.write_index = 0
+        # Seek requested by the GUI, acknowledged by the reader, applied by
+        # the callback
+        self.seek_serial = 0
+        self.seek_target = 0
+        self.flush_marker = (0, 0, 0)
+        self.applied_serial = 0
+        # (serial, ring index) where the source ended for that seek
+        self.end_marker = None
+        self.closing = False
+        self.wakeup = threading.Event()
+        self.reader = None
+
+    # GUI thread ---------------------------------------------------------
+
+    def set_source(self, source):
+        """Switch to *source*, paused at its first frame."""
+        self.playing = False
+        self.source = source
+        capacity = int(source.samplerate * CONFIG.get("PLAYBACK_BUFFER_SECONDS", 2.0))
+        if len(self.ring) != capacity:
+            # The reader and the callback pick the new ring up on their next
+            # pass; the seek below makes them drop what the old one held
+            self.ring = np.zeros(max(capacity, MAX_BLOCK_FRAMES), dtype=np.float32)
+        self.seek(0)
+        if self.reader is None:
+            self.reader = threading.Thread(
+                target=self.reader_loop, name="playback-reader", daemon=True
+            )
+            self.reader.start()
+
+    def set_gain(self, gain):
+        """Request a new gain; the callback ramps to it over the next block."""
+        self.target_gain = float(gain)
+
+    def is_active(self):
+        return self.playing
+
+    def current_position(self):
+        """Frame that is playing now, or the target of a pending seek."""
+        if self.seek_serial != self.applied_serial:
+            return self.seek_target
+        return self.position
+
+    def seek(self, position):
+        """Jump to frame *position*; takes effect on the next callback."""
+        self.finished = False
+        self.seek_target = int(position)
+        self.seek_serial += 1
+        self.wakeup.set()
+
+    def play(self, position=None):
+        """Resume playback, optionally from frame *position*."""
+        if self.source is None:
+            return
+        self.ensure_stream(self.source.samplerate)
+        if position is not None and position != self.current_position():
+            self.seek(position)
+        self.finished = False
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def ensure_stream(self, samplerate):
+        """Open the output stream, reusing it while the sample rate matches."""
+        if self.stream is not None and self.stream_samplerate == samplerate:
+            return
+        self.close_stream()
+        # Importing sounddevice initialises PortAudio, which enumerates every
+        # audio device: slow enough on Windows to be left to the first Play
+        import sounddevice as sd
+
+        self.stream = sd.OutputStream(
+            samplerate=samplerate,
+            channels=1,
+            dtype="float32",
+            callback=self.callback,
+        )
+        self.stream_samplerate = samplerate
+        self.stream.start()
+
+    def close_stream(self):
+        stream = self.stream
+        self.stream = None
+        self.stream_samplerate = None
+        if stream is None:
+            return
+        try:
+            stream.stop()
+        except Exception:
+            pass
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Stop the reader thread and release the audio device."""
+        self.playing = False
+        self.closing = True
+        self.wakeup.set()
+        self.close_stream()
+        if self.reader is not None:
+            self.reader.join(timeout=1.0)
+            self.reader = None
+
+    # Reader thread ------------------------------------------------------
+
+    def reader_loop(self):
+        serial = 0
+        source = None
+        read_position = 0
+        flush_index = 0
+        while not self.closing:
+            if self.seek_serial != serial:
+                serial = self.seek_serial
+                source = self.source
+                read_position = self.seek_target
+                self.end_marker = None
+                # Everything written so far belongs to the previous position
+                flush_index = self.write_index
+                self.flush_marker = (serial, flush_index, read_position)
+
+            # set_source may swap the ring; use one array for this iteration
+            ring = self.ring
+            capacity = len(ring)
+            # The callback may not have applied the flush yet
+            consumed = max(self.read_index, flush_index)
+            free = capacity - (self.write_index - consumed)
+            waiting = source is None or self.end_marker is not None
+            if waiting or free < READ_CHUNK_FRAMES // 4:
+                # Wait for the callback to drain the ring or for a new seek;
+                # seek, set_source, close and the callback all set wakeup, so
+                # an idle reader sleeps until one of them has work for it
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+
+            count = min(free, READ_CHUNK_FRAMES)
+            start = self.write_index % capacity
+            first = min(count, capacity - start)
+            written = source.read_into(read_position, ring[start : start + first])
+            if written == first and count > first:
+                written += source.read_into(read_position + first, ring[: count - first])
+            if self.seek_serial != serial:
+                continue  # A new seek arrived while reading; drop this chunk
+            read_position += written
+            self.write_index += written
+            if written < count:
+                self.end_marker = (serial, self.write_index)
+
+    # Audio thread -------------------------------------------------------
+
+    def callback(self, outdata, frames, time, status):
+        if status.output_underflow:
+            self.xruns += 1
+
+        out = outdata[:, 0]
+        marker = self.flush_marker
+        if marker[0] != self.applied_serial:
+            _, self.read_index, self.position = marker
+            self.applied_serial = marker[0]
+
+        if not self.playing or self.seek_serial != self.applied_serial:
+            out[:] = 0.0
+            return
+
+        # set_source may swap the ring from the GUI thread at any time; one
+        # reference keeps the capacity and the slices of the same array
+        ring = self.ring
+        available = self.write_index - self.read_index
+        capacity = len(ring)
+        count = min(frames, available, capacity)
+        start = self.read_index % capacity
+        first = min(count, capacity - start)
+        out[:first] = ring[start : start + first]
+        out[first:count] = ring[: count - first]
+        out[count:] = 0.0
+        self.apply_gain(out[:count])
+        self.read_index += count
+        self.position += count
+
+        if count < frames:
+            end = self.end_marker
+            at_end = end is not None and end[0] == self.applied_serial
+            if at_end and self.read_index >= end[1]:
+                self.playing = False
+                self.finished = True
+            else:
+                self.underruns += 1
+        if available - count < capacity // 2:
+            self.wakeup.set()
+
+    def apply_gain(self, out):
+        frames = len(out)
+        if frames == 0:
+            return
+        if self.gain == self.target_gain:
+            if self.gain != 1.0:
+                np.multiply(out, self.gain, out=out)
+            return
+        if frames > len(self.ramp):
+            # Unusually large block: give up on the ramp rather than allocate
+            self.gain = self.target_gain
+            np.multiply(out, self.gain, out=out)
+            return
+        ramp = self.ramp[:frames]
+        np.multiply(
+            self.ramp_steps[:frames], (self.target_gain - self.gain) / frames, out=ramp
+        )
+        np.add(ramp, self.gain, out=ramp)
+        np.multiply(out, ramp, out=out)
+        self.gain = self.target_gain
@@ -0,0 +1,484 @@
+import copy
+import os
+import struct
+import threading
+import numpy as np
+from config import CONFIG
+from audio_processor.channels import mix_channels, parse_channel_view
+from audio_processor.loader import LoadCancelled, decode_audio_file
+from audio_processor.spectrogram_cache import entry_path, note_cache_write
+
+# WAVE_FORMAT_* tags accepted for memory mapping
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Formats soundfile can only seek in approximately
+APPROXIMATE_SEEK_FORMATS = ("MP3", "OGG")
+
+# "max_energy" compares the channels over this many blocks of
+# ENERGY_PROBE_FRAMES spread evenly over the recording, so long files are
+# not read in full
+ENERGY_PROBES = 64
+ENERGY_PROBE_FRAMES = 16384
+
+# (format, bits per sample) -> (numpy dtype, offset, scale) converting raw
+# samples to float32 in [-1, 1). 24-bit PCM has no numpy dtype and is read
+# through soundfile instead.
+WAV_SAMPLE_TYPES = {
+    (WAVE_FORMAT_PCM, 8): (np.uint8, 128.0, 1 / 128.0),
+    (WAVE_FORMAT_PCM, 16): (np.dtype("<i2"), 0.0, 1 / 32768.0),
+    (WAVE_FORMAT_PCM, 32): (np.dtype("<i4"), 0.0, 1 / 2147483648.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): (np.dtype("<f4"), 0.0, 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): (np.dtype("<f8"), 0.0, 1.0),
+}
+
+
+def read_wav_layout(path):
+    """Locate the sample data of an uncompressed RIFF/WAVE file.
+
+    Returns:
+        dict: ``format``, ``channels``, ``samplerate``, ``bits``, ``offset``
+        and ``frames`` of the data chunk, or None if the file is not a plain
+        RIFF/WAVE file (RF64, compressed formats, truncated headers...).
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                tag, channels, samplerate, _, block_align, bits = struct.unpack(
+                    "<HHIIHH", body[:16]
+                )
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (tag, channels, samplerate, block_align, bits)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                tag, channels, samplerate, block_align, bits = fmt
+                offset = f.tell()
+                # Recorders that were stopped abruptly leave a stale size
+                available = os.path.getsize(path) - offset
+                size = min(chunk_size, available) if chunk_size else available
+                return {
+                    "format": tag,
+                    "channels": channels,
+                    "samplerate": samplerate,
+                    "bits": bits,
+                    "offset": offset,
+                    "frames": size // block_align if block_align else 0,
+                }
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+class SampleSource:
+    """Read-only, sliceable mono view of a recording.
+
+    The source holds every channel of the file. ``source[start:stop]``
+    returns float32 samples of its channel view, either one channel or the
+    mean of all of them (see :meth:`with_view`), and :meth:`read_channels`
+    returns all channels. ``len(source)`` is the number of frames.
+    Subclasses decide where the samples live.
+    """
+
+    path = None
+    samplerate = None
+    channels = 1
+    view = "mean"
+    # Channel returned by read(), None for the mean of all channels
+    channel = None
+    # Mean square of every channel, see channel_energies()
+    energies = None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def read_channels(self, start, stop):
+        """Return frames ``[start, stop)`` (already clamped) of every channel.
+
+        Returns:
+            np.ndarray: ``(stop - start, channels)`` float32 array.
+        """
+        raise NotImplementedError
+
+    def read(self, start, stop):
+        """Return frames ``[start, stop)`` (already clamped) of the view as float32."""
+        return mix_channels(self.read_channels(start, stop), self.channel)
+
+    def with_view(self, view):
+        """Return a source reading *view* from the same samples.
+
+        Nothing is decoded or copied again: the new source shares the
+        memory map, array or open file of this one. A channel the recording
+        does not have falls back to the mean.
+
+        Args:
+            view (str or int): ``"mean"``, ``"max_energy"`` (the channel
+                with the highest :meth:`channel_energies`) or a channel
+                number, 0 being the first.
+        """
+        view = parse_channel_view(view)
+        if view == "max_energy" and self.channels > 1:
+            # Computed once and shared with every view made from this one
+            channel = int(np.argmax(self.channel_energies()))
+        elif view == "max_energy" or view == "mean" or view >= self.channels:
+            view, channel = "mean", None
+        else:
+            channel = view
+        source = copy.copy(self)
+        source.view = view
+        source.channel = None if self.channels == 1 else channel
+        return source
+
+    @property
+    def view_key(self):
+        """Names the samples :meth:`read` returns, for cache keys."""
+        return "mean" if self.channel is None else f"ch{self.channel}"
+
+    def channel_energies(self, probes=ENERGY_PROBES, frames=ENERGY_PROBE_FRAMES):
+        """Mean square of every channel, estimated from *probes* blocks.
+
+        The blocks are spread evenly over the recording; short recordings
+        are read in full.
+
+        Returns:
+            np.ndarray: One float64 value per channel.
+        """
+        if self.energies is not None:
+            return self.energies
+        total = len(self)
+        if total <= probes * frames:
+            starts, frames = [0], total
+        else:
+            starts = np.linspace(0, total - frames, probes).astype(np.int64).tolist()
+        sums = np.zeros(self.channels, dtype=np.float64)
+        for start in starts:
+            block = self.read_channels(start, start + frames)
+            sums += np.square(block, dtype=np.float32).sum(axis=0, dtype=np.float64)
+        self.energies = sums / max(1, len(starts) * frames)
+        return self.energies
+
+    def read_into(self, start, out):
+        """Copy frames from *start* into the float32 array *out*.
+
+        Returns the number of frames written, which is smaller than
+        ``len(out)`` near the end of the recording. Subclasses override this
+        to avoid the temporary array of :meth:`read`.
+        """
+        count = max(0, min(len(out), len(self) - start))
+        out[:count] = self.read(start, start + count)
+        return count
+
+    @property
+    def nbytes(self):
+        """Bytes held in RAM by the source itself."""
+        return 0
+
+    @property
+    def storage(self):
+        """What :meth:`close` releases; shared by every view of the source."""
+        return self
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("SampleSource only supports slicing")
+        start, stop, step = key.indices(len(self))
+        data = self.read(start, max(start, stop))
+        return data if step == 1 else data[::step]
+
+    def close(self):
+        """Release what this source holds.
+
+        Views made by :meth:`with_view` share its :attr:`storage`: closing
+        a file-backed source stops all of them reading, while a memory-mapped
+        one only drops its own reference and the mapping goes once no view
+        refers to it. Close a source only when no other view is in use.
+        """
+
+
+class ArraySource(SampleSource):
+    """Samples already decoded into memory, ``(frames,)`` or ``(frames, channels)``."""
+
+    def __init__(self, data, samplerate, path=None):
+        self.data = data
+        self.samplerate = samplerate
+        self.path = path
+        self.channels = 1 if data.ndim == 1 else data.shape[1]
+
+    def __len__(self):
+        return len(self.data)
+
+    def read_channels(self, start, stop):
+        block = self.data[start:stop]
+        return block[:, None] if block.ndim == 1 else block
+
+    def read(self, start, stop):
+        return mix_channels(self.data[start:stop], self.channel)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    @property
+    def storage(self):
+        return self.data
+
+
+class MemmapSource(SampleSource):
+    """Samples memory-mapped straight from a WAV data chunk or a cache file.
+
+    *data* is the interleaved ``(frames, channels)`` map (1-D for cache
+    files of older versions); every channel view reads from it.
+    """
+
+    def __init__(self, path, samplerate, data, offset=0.0, scale=1.0):
+        self.path = path
+        self.samplerate = samplerate
+        self.data = data
+        self.offset = offset
+        self.scale = scale
+        self.channels = 1 if data.ndim == 1 else data.shape[1]
+
+    @classmethod
+    def from_wav(cls, path):
+        """Map *path* if it is an uncompressed WAV with a NumPy-compatible type."""
+        layout = read_wav_layout(path)
+        if layout is None or layout["frames"] == 0:
+            return None
+        sample_type = WAV_SAMPLE_TYPES.get((layout["format"], layout["bits"]))
+        if sample_type is None:
+            return None
+        dtype, offset, scale = sample_type
+        data = np.memmap(
+            path,
+            dtype=dtype,
+            mode="r",
+            offset=layout["offset"],
+            shape=(layout["frames"], layout["channels"]),
+        )
+        return cls(path, layout["samplerate"], data, offset, scale)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def to_float(self, samples, copied=False):
+        """Convert raw samples to float32 in [-1, 1), in place if *copied*."""
+        if self.offset == 0.0 and self.scale == 1.0 and samples.dtype == np.float32:
+            return samples
+        out = samples if copied else samples.astype(np.float32)
+        if self.offset:
+            out -= self.offset
+        if self.scale != 1.0:
+            out *= self.scale
+        return out
+
+    def read_channels(self, start, stop):
+        samples = self.data[start:stop]
+        return self.to_float(samples[:, None] if samples.ndim == 1 else samples)
+
+    def read(self, start, stop):
+        samples = self.data[start:stop]
+        if samples.ndim == 1:
+            return self.to_float(samples)
+        if self.channel is not None or self.channels == 1:
+            return self.to_float(samples[:, self.channel or 0])
+        # Offset and scale are linear, so they apply to the mean as well
+        return self.to_float(samples.mean(axis=1, dtype=np.float32), copied=True)
+
+    @property
+    def storage(self):
+        return self.data
+
+    def close(self):
+        # The mapping (and on Windows the file handle) goes away once no
+        # array refers to it; an empty array makes the source read nothing
+        self.data = np.zeros((0,) + self.data.shape[1:], dtype=self.data.dtype)
+
+    def read_into(self, start, out):
+        count = max(0, min(len(out), len(self) - start))
+        samples = self.data[start : start + count]
+        target = out[:count]
+        # Convert in place: no temporary array for the audio thread to free
+        if samples.ndim > 1 and self.channel is None and self.channels > 1:
+            np.add.reduce(samples, axis=1, dtype=np.float32, out=target)
+            if self.offset:
+                np.subtract(target, self.offset * self.channels, out=target)
+            np.multiply(target, self.scale / self.channels, out=target)
+            return count
+        if samples.ndim > 1:
+            samples = samples[:, self.channel or 0]
+        np.subtract(samples, self.offset, out=target, casting="unsafe")
+        if self.scale != 1.0:
+            np.multiply(target, self.scale, out=target)
+        return count
+
+
+class SoundFileSource(SampleSource):
+    """Seek + read through soundfile, for formats that cannot be mapped."""
+
+    def __init__(self, path):
+        import soundfile as sf
+
+        self.path = path
+        self.file = sf.SoundFile(path)
+        self.samplerate = self.file.samplerate
+        self.frames = self.file.frames
+        self.channels = self.file.channels
+        # The audio callback and the GUI thread may read concurrently
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.frames
+
+    @property
+    def storage(self):
+        return self.file
+
+    def read_channels(self, start, stop):
+        with self.lock:
+            if self.file.closed:
+                # Closed while the playback reader was still using it
+                return np.zeros((stop - start, self.channels), dtype=np.float32)
+            self.file.seek(start)
+            return self.file.read(stop - start, dtype="float32", always_2d=True)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def decode_to_cache_file(
+    audio_path, cache_path, block=65536, progress_callback=None, is_cancelled=None
+):
+    """Decode *audio_path* once into an interleaved float32 ``.npy`` file.
+
+    The file at *cache_path* holds a ``(frames, channels)`` array, so every
+    channel view can be read from it without decoding again.
+    """
+    import soundfile as sf
+
+    info = sf.info(audio_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    out = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.float32, shape=(info.frames, info.channels)
+    )
+    try:
+        read = 0
+        with sf.SoundFile(audio_path) as f:
+            for chunk in f.blocks(blocksize=block, dtype="float32", always_2d=True):
+                if is_cancelled is not None and is_cancelled():
+                    raise LoadCancelled(audio_path)
+                length = min(len(chunk), info.frames - read)
+                out[read : read + length] = chunk[:length]
+                read += length
+                if progress_callback is not None:
+                    progress_callback(read, info.frames)
+        # Frames announced by the header but missing from the stream
+        out[read:] = 0.0
+        out.flush()
+    except BaseException:
+        del out
+        os.remove(tmp_path)
+        raise
+    del out
+    os.replace(tmp_path, cache_path)
+
+
+def open_sample_source(audio_path, view=None, progress_callback=None, is_cancelled=None):
+    """Open *audio_path* as a :class:`SampleSource` without decoding it in RAM.
+
+    Every channel is kept; the source reads *view* (``CHANNEL_VIEW`` by
+    default, see :meth:`SampleSource.with_view`), and other views can be
+    made from it later without decoding the file again.
+
+    * Uncompressed WAV files are memory-mapped over their data chunk.
+    * Other formats soundfile can seek in exactly (FLAC, 24-bit WAV...) are
+      read on demand.
+    * Compressed formats such as MP3 are decoded once into a float32 cache
+      file in ``CONFIG["PCM_CACHE_DIR"]`` and memory-mapped from there.
+
+    If none of that works the file is decoded into memory as before.
+    """
+    if view is None:
+        view = CONFIG.get("CHANNEL_VIEW", "mean")
+    return open_all_channels(audio_path, progress_callback, is_cancelled).with_view(
+        view
+    )
+
+
+def open_all_channels(audio_path, progress_callback=None, is_cancelled=None):
+    """Open *audio_path* as described in :func:`open_sample_source`, reading the mean."""
+    import soundfile as sf
+
+    source = MemmapSource.from_wav(audio_path)
+    if source is not None:
+        return source
+
+    # Compressed streams only seek approximately; decode them once instead
+    if sf.info(audio_path).format not in APPROXIMATE_SEEK_FORMATS:
+        return SoundFileSource(audio_path)
+
+    cache_dir = CONFIG.get("PCM_CACHE_DIR", "memlog/pcm")
+    # Older entries hold the first channel only
+    cache_path = entry_path(
+        audio_path, {"channels": "all"}, kind="pcm", cache_dir=cache_dir
+    )
+    try:
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_dir, exist_ok=True)
+            decode_to_cache_file(
+                audio_path,
+                cache_path,
+                progress_callback=progress_callback,
+                is_cancelled=is_cancelled,
+            )
+            note_cache_write(
+                cache_path, cache_dir, CONFIG.get("PCM_CACHE_MB", 8192) * 1024 * 1024
+            )
+        samplerate = sf.info(audio_path).samplerate
+        return MemmapSource(audio_path, samplerate, np.load(cache_path, mmap_mode="r"))
+    except OSError:
+        data, samplerate = decode_audio_file(
+            audio_path, progress_callback=progress_callback, is_cancelled=is_cancelled
+        )
+        return ArraySource(data, samplerate, audio_path)
+
+
+def resolve_channel(audio_path, view):
+    """Return the channel of *audio_path* that *view* reads, None for the mean.
+
+    Only ``"max_energy"`` reads samples. Its probe blocks are read straight
+    from the file, so compressed formats are not decoded in full (their
+    approximate seeks are good enough for an energy estimate).
+    """
+    import soundfile as sf
+
+    view = parse_channel_view(view)
+    if view != "max_energy":
+        channels = sf.info(audio_path).channels
+        return None if view == "mean" or view >= channels or channels == 1 else view
+    source = MemmapSource.from_wav(audio_path) or SoundFileSource(audio_path)
+    try:
+        return source.with_view(view).channel
+    finally:
+        source.close()
+
+
+def view_key_for(audio_path, view):
+    """:attr:`SampleSource.view_key` *view* would have on *audio_path*, see
+    :func:`resolve_channel`."""
+    channel = resolve_channel(audio_path, view)
+    return "mean" if channel is None else f"ch{channel}"
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from config import CONFIG
+
+# Share of the budget the cache is trimmed to once it is exceeded, so the
+# directory is not rescanned on every write that follows
+EVICT_LOW_WATER = 0.9
+
+# Running size estimate of each cache directory, see note_cache_write
+_cache_sizes = {}
+_cache_sizes_lock = threading.Lock()
+
+
+def get_cache_dir():
+    return CONFIG.get("SPECTROGRAM_CACHE_DIR", "memlog/spectrograms")
+
+
+def get_cache_budget():
+    return CONFIG.get("SPECTROGRAM_CACHE_MB", 2048) * 1024 * 1024
+
+
+def cache_key(audio_path, params):
+    """Build the cache key for *audio_path* computed with *params*.
+
+    The key covers the absolute path, size and modification time of the
+    file, so any change to the recording invalidates its entries, and the
+    STFT settings, so entries made with other settings are never reused.
+    """
+    st = os.stat(audio_path)
+    identity = {
+        "path": os.path.abspath(audio_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "params": params,
+    }
+    payload = json.dumps(identity, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def entry_path(audio_path, params, kind="spec", cache_dir=None):
+    """Return the file that holds the *kind* array of *audio_path*."""
+    cache_dir = cache_dir or get_cache_dir()
+    return os.path.join(cache_dir, f"{cache_key(audio_path, params)}.{kind}.npy")
+
+
+def load_cached_array(audio_path, params, kind="spec", cache_dir=None):
+    """Return a read-only memory map of a cached array or None on a miss."""
+    try:
+        path = entry_path(audio_path, params, kind, cache_dir)
+        array = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    try:
+        # Refresh the timestamp so eviction drops the least recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return array
+
+
+def store_cached_array(audio_path, params, array, kind="spec", cache_dir=None):
+    """Write *array* to the cache as float16 and enforce the size budget."""
+    cache_dir = cache_dir or get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    path = entry_path(audio_path, params, kind, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(array, dtype=np.float16))
+    # Readers never see a half written entry
+    os.replace(tmp_path, path)
+    note_cache_write(path, cache_dir)
+    return path
+
+
+def note_cache_write(path, cache_dir=None, max_bytes=None):
+    """Count the entry just written at *path* and evict if over budget.
+
+    The directory is scanned on the first write only; after that its size
+    is kept as a running total and only rescanned, and trimmed to
+    :data:`EVICT_LOW_WATER` of *max_bytes*, once that total passes
+    *max_bytes*. Entries written by other processes are noticed then.
+
+    Returns:
+        int: The estimated size of *cache_dir* in bytes.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    max_bytes = get_cache_budget() if max_bytes is None else max_bytes
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    with _cache_sizes_lock:
+        total = _cache_sizes.get(cache_dir)
+        if total is not None and total + size <= max_bytes:
+            total += size
+        else:
+            total = evict_cache(
+                cache_dir, max_bytes, keep=path, target=int(max_bytes * EVICT_LOW_WATER)
+            )
+        _cache_sizes[cache_dir] = total
+    return total
+
+
+def evict_cache(cache_dir, max_bytes, keep=None, target=None):
+    """Delete the least recently used entries if *cache_dir* exceeds *max_bytes*.
+
+    Entries are deleted until the directory fits *target* (*max_bytes* if
+    None). The entry at *keep*, usually the one just written, is never
+    deleted. Returns the size left, in bytes.
+    """
+    target = max_bytes if target is None else target
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.is_file() or not entry.name.endswith(".npy"):
+                continue
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+    if total <= max_bytes:
+        return total
+    entries.sort()
+    for _, size, path in entries:
+        if total <= target:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
+
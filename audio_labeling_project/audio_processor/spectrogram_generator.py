@@ -1,54 +1,384 @@
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
 import numpy as np
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QFont
+from PyQt6.QtCore import Qt, QRect
+from config import CONFIG
+from audio_processor.display_stft import display_spectrogram
 
+# Size of the rendered spectrogram and the space kept around the plot for
+# the axes, as (left, top, right, bottom).
+IMAGE_SIZE = (800, 400)
+PLOT_MARGINS = (60, 24, 12, 44)
+BACKGROUND_COLOR = (255, 255, 255)
+AXIS_COLOR = (0, 0, 0)
+# Dynamic range shown, matching librosa.amplitude_to_db's default top_db
+TOP_DB = 80.0
 
-def generate_spectrogram_pixmap(audio_data, samplerate):
-    """Generate a spectrogram QPixmap for the provided audio.
+# Tick spacings, in seconds, used on the time axis of recordings over 8 s
+TIME_STEPS = (2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 14400)
+
+# Samples of matplotlib's "magma" colormap (the one specshow used) at 17
+# evenly spaced points; interpolated into a 256-entry table below.
+MAGMA_ANCHORS = (
+    (0.001, 0.000, 0.014),
+    (0.040, 0.031, 0.134),
+    (0.113, 0.065, 0.277),
+    (0.212, 0.062, 0.419),
+    (0.317, 0.072, 0.485),
+    (0.415, 0.110, 0.505),
+    (0.513, 0.148, 0.508),
+    (0.614, 0.182, 0.499),
+    (0.716, 0.215, 0.475),
+    (0.817, 0.256, 0.436),
+    (0.904, 0.320, 0.388),
+    (0.961, 0.418, 0.360),
+    (0.987, 0.536, 0.382),
+    (0.996, 0.654, 0.446),
+    (0.997, 0.770, 0.535),
+    (0.992, 0.884, 0.640),
+    (0.987, 0.991, 0.750),
+)
+
+
+def get_stft_params():
+    """Return the STFT settings configured in ``CONFIG["STFT"]``."""
+    params = {
+        "n_fft": 2048,
+        "hop_length": 512,
+        "window": "hann",
+        "fmax": None,
+        "frames_per_column": 8,
+    }
+    params.update(CONFIG.get("STFT", {}))
+    return params
+
+
+def compute_spectrogram_db(audio_data, n_fft=2048, hop_length=512):
+    """Return the magnitude spectrogram of *audio_data* in dB (ref = max)."""
+    # Only this in-memory path uses librosa, which pulls in scipy and numba
+    import librosa
+
+    return librosa.amplitude_to_db(
+        np.abs(librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length)),
+        ref=np.max,
+    )
+
+
+def generate_spectrogram_image(audio_data, samplerate):
+    """Render the spectrogram of *audio_data* into a QImage.
+
+    Unlike :func:`generate_spectrogram_pixmap` this does not touch any
+    QPixmap, so it is safe to call from a worker thread.
 
     Returns
     -------
     tuple
-        QPixmap of the spectrogram and a tuple describing the bounding box
+        QImage of the spectrogram and a tuple describing the bounding box
         of the actual plotting area in pixel coordinates `(left, top, width, height)`.
     """
     if audio_data is None or len(audio_data) == 0:
-        return QPixmap(), None  # Return empty pixmap
+        return QImage(), None
+
+    params = get_stft_params()
+    from audio_processor.sample_source import ArraySource
+
+    source = ArraySource(np.asarray(audio_data, dtype=np.float32), samplerate)
+    # Only the frames the image has room for are computed
+    _, overview_db, _ = display_spectrogram(source, plot_bounds()[2], params)
+    return render_spectrogram_image(
+        overview_db,
+        samplerate,
+        duration=len(audio_data) / samplerate,
+        n_fft=params["n_fft"],
+    )
+
+
+def build_colormap_lut(anchors=MAGMA_ANCHORS, size=256):
+    """Interpolate *anchors* into a ``(size, 4)`` uint8 RGBA lookup table."""
+    anchors = np.asarray(anchors, dtype=np.float64)
+    positions = np.linspace(0.0, 1.0, len(anchors))
+    samples = np.linspace(0.0, 1.0, size)
+    lut = np.empty((size, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.round(
+            np.interp(samples, positions, anchors[:, channel]) * 255
+        )
+    lut[:, 3] = 255
+    return lut
+
+
+COLORMAP_LUT = build_colormap_lut()
+
+
+def reduce_to_pixels(spectrogram_db, row_starts, col_starts):
+    """Downsample *spectrogram_db* by taking the maximum of each pixel cell.
+
+    ``row_starts``/``col_starts`` hold the first bin/frame of every output
+    row/column. Where there are fewer bins or frames than pixels the start
+    indices repeat and ``reduceat`` returns the single element, so the same
+    call upsamples by nearest neighbour.
+    """
+    # Reduce the time axis first: it is by far the longest one, and working
+    # on a memory map this reads every frame exactly once.
+    reduced = np.maximum.reduceat(spectrogram_db, col_starts, axis=1)
+    return np.maximum.reduceat(reduced, row_starts, axis=0)
+
+
+def spectrogram_to_rgba(spectrogram_db, row_starts, col_starts):
+    """Reduce *spectrogram_db* to pixels and map it through the colormap.
+
+    Returns a ``(len(row_starts), len(col_starts), 4)`` uint8 array with the
+    highest frequency in the first row.
+    """
+    cells = reduce_to_pixels(spectrogram_db, row_starts, col_starts)
+    # dB values are relative to the maximum and clipped at -TOP_DB
+    scaled = (cells.astype(np.float32) + TOP_DB) * (255.0 / TOP_DB)
+    indices = np.clip(scaled, 0, 255).astype(np.uint8)
+    # Row 0 of the matrix is the lowest frequency, which goes at the bottom
+    return COLORMAP_LUT[indices[::-1]]
+
+
+def image_pixels(image):
+    """Return a writable ``(height, width, 4)`` view of an RGBA8888 QImage."""
+    ptr = image.bits()
+    ptr.setsize(image.sizeInBytes())
+    return np.frombuffer(ptr, dtype=np.uint8).reshape(
+        image.height(), image.bytesPerLine()
+    )[:, : image.width() * 4].reshape(image.height(), image.width(), 4)
+
+
+def log_frequency_rows(n_bins, samplerate, height, n_fft=None):
+    """Return the first STFT bin shown by each pixel row, bottom row first.
+
+    *n_fft* defaults to the size implied by *n_bins*; pass it when the bins
+    above some ``fmax`` were dropped.
+    """
+    if n_fft is None:
+        n_fft = 2 * (n_bins - 1)
+    fmin = samplerate / n_fft
+    fmax = (n_bins - 1) * samplerate / n_fft
+    edges = np.geomspace(fmin, fmax, height + 1)[:-1]
+    starts = np.floor(edges * n_fft / samplerate).astype(np.intp)
+    return np.clip(starts, 0, n_bins - 1), fmin, fmax
+
+
+def nice_step(span, target_ticks):
+    """Return a 1/2/5 x 10^k step giving about *target_ticks* ticks over *span*."""
+    raw = span / max(1, target_ticks)
+    magnitude = 10 ** np.floor(np.log10(raw)) if raw > 0 else 1
+    for factor in (1, 2, 5, 10):
+        if factor * magnitude >= raw:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def nice_time_step(duration, target_ticks):
+    """Like :func:`nice_step` but snapping to whole minutes/hours when long."""
+    raw = duration / max(1, target_ticks)
+    if raw > 1:
+        for step in TIME_STEPS:
+            if step >= raw:
+                return step
+    return nice_step(duration, target_ticks)
+
+
+def format_time_tick(seconds, duration, step=1.0):
+    """Format *seconds* as plain seconds, m:ss or h:mm:ss depending on *duration*.
+
+    Sub-second *step* values add the decimals needed to tell ticks apart.
+    """
+    if duration < 60:
+        return f"{round(seconds, 3):g}"
+    decimals = 0 if step >= 1 else min(3, int(np.ceil(-np.log10(step))))
+    width = 3 + decimals if decimals else 2
+    seconds = round(float(seconds), decimals)
+    minutes = int(seconds // 60)
+    secs = f"{seconds - minutes * 60:0{width}.{decimals}f}"
+    if duration >= 3600:
+        return f"{minutes // 60}:{minutes % 60:02d}:{secs}"
+    return f"{minutes}:{secs}"
+
+
+def format_frequency_tick(hz):
+    return f"{hz / 1000:g}k" if hz >= 1000 else f"{hz:g}"
+
+
+def axis_font():
+    font = QFont()
+    font.setPixelSize(11)
+    return font
 
-    fig, ax = plt.subplots(figsize=(8, 4), dpi=100)
-    librosa.display.specshow(
-        librosa.amplitude_to_db(np.abs(librosa.stft(audio_data)), ref=np.max),
-        sr=samplerate,
-        x_axis="time",
-        y_axis="log",
-        ax=ax,
+
+def draw_time_axis(painter, bounds, start, end, image_width):
+    """Draw ticks and labels for the time window ``[start, end]`` below *bounds*."""
+    left, top, width, height = bounds
+    span = end - start
+    if span <= 0:
+        return
+    step = nice_time_step(span, 8)
+    first = np.ceil(start / step - 1e-9) * step + 0.0  # avoid a "-0" label
+    for tick in np.arange(first, end + step * 1e-6, step):
+        x = left + int(round((tick - start) / span * (width - 1)))
+        painter.drawLine(x, top + height, x, top + height + 4)
+        # Keep the label of the last tick inside the image
+        label_x = min(x - 40, image_width - 80)
+        painter.drawText(
+            QRect(label_x, top + height + 5, 80, 14),
+            Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+            format_time_tick(tick, end, step),
+        )
+    painter.drawText(
+        QRect(left, top + height + 20, width, 16),
+        Qt.AlignmentFlag.AlignHCenter,
+        "Time (s)" if end < 60 else "Time",
+    )
+
+
+def draw_axes(image, bounds, duration, fmin, fmax):
+    """Draw the title, axis labels and ticks around the plot area of *image*."""
+    left, top, width, height = bounds
+    painter = QPainter(image)
+    painter.setPen(QPen(QColor(*AXIS_COLOR)))
+    painter.setFont(axis_font())
+    painter.drawRect(left - 1, top - 1, width + 1, height + 1)
+    draw_time_axis(painter, bounds, 0.0, duration, image.width())
+
+    log_span = np.log10(fmax / fmin)
+    decades = 10.0 ** np.arange(np.floor(np.log10(fmin)), np.ceil(np.log10(fmax)) + 1)
+    tick_hz = np.outer(decades, (1, 2, 5)).ravel()
+    for hz in tick_hz[(tick_hz >= fmin) & (tick_hz <= fmax)]:
+        y = top + height - 1 - int(round(np.log10(hz / fmin) / log_span * (height - 1)))
+        painter.drawLine(left - 5, y, left - 1, y)
+        painter.drawText(
+            QRect(0, y - 7, left - 7, 14),
+            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+            format_frequency_tick(hz),
+        )
+
+    painter.save()
+    painter.translate(12, top + height // 2)
+    painter.rotate(-90)
+    painter.drawText(
+        QRect(-height // 2, -8, height, 16),
+        Qt.AlignmentFlag.AlignCenter,
+        "Frequency (Hz)",
     )
+    painter.restore()
+    title_font = axis_font()
+    title_font.setPixelSize(13)
+    painter.setFont(title_font)
+    painter.drawText(
+        QRect(left, 0, width, top), Qt.AlignmentFlag.AlignCenter, "Spectrogram"
+    )
+    painter.end()
+
 
-    ax.set_title("Spectrogram")
-    ax.set_xlabel("Time (s)")
-    ax.set_ylabel("Frequency (Hz)")
-    plt.tight_layout()
-
-    fig.canvas.draw()
-    buf = fig.canvas.buffer_rgba()
-    renderer = fig.canvas.get_renderer()
-    bbox = ax.get_window_extent(renderer=renderer)
-    fig_width, fig_height = fig.canvas.get_width_height()
-    left = int(bbox.x0)
-    right = int(bbox.x1)
-    # Convert from matplotlib's origin (bottom left) to pixmap origin (top left)
-    top = int(fig_height - bbox.y1)
-    bottom = int(fig_height - bbox.y0)
-    bounds = (left, top, right - left, bottom - top)
-    qimage = QImage(
-        buf.tobytes(), buf.shape[1], buf.shape[0], QImage.Format.Format_RGBA8888
+def plot_bounds(size=IMAGE_SIZE):
+    """Plot area ``(left, top, width, height)`` of an image of *size* pixels."""
+    image_width, image_height = size
+    margin_left, margin_top, margin_right, margin_bottom = PLOT_MARGINS
+    return (
+        margin_left,
+        margin_top,
+        image_width - margin_left - margin_right,
+        image_height - margin_top - margin_bottom,
     )
-    pixmap = QPixmap.fromImage(qimage)
-    plt.close(fig)
-    return pixmap, bounds
+
+
+def render_spectrogram_image(
+    spectrogram_db, samplerate, hop_length=512, duration=None, size=IMAGE_SIZE, n_fft=None
+):
+    """Render a precomputed dB spectrogram into a QImage.
+
+    The matrix is reduced to one value per pixel, mapped through
+    :data:`COLORMAP_LUT` and written straight into the QImage buffer; only
+    the axes are drawn with QPainter.
+
+    Parameters
+    ----------
+    spectrogram_db : np.ndarray
+        Matrix of shape ``(bins, frames)`` as returned by
+        :func:`compute_spectrogram_db`, or the overview of
+        :func:`audio_processor.display_stft.display_spectrogram` with one
+        frame per column. Memory-mapped arrays are accepted.
+    samplerate : int
+        Sample rate of the audio.
+    hop_length : int, optional
+        Hop length used for the STFT.
+    duration : float, optional
+        Length of the audio in seconds, used to label the time axis.
+        Defaults to the duration covered by the frames.
+    size : tuple, optional
+        ``(width, height)`` of the image in pixels.
+    n_fft : int, optional
+        FFT size, needed when the bins above some ``fmax`` were dropped.
+
+    Returns
+    -------
+    tuple
+        QImage of the spectrogram and its plot bounds
+        `(left, top, width, height)`.
+    """
+    if spectrogram_db is None or spectrogram_db.size == 0:
+        return QImage(), None
+
+    image_width, image_height = size
+    bounds = plot_bounds(size)
+    margin_left, margin_top, width, height = bounds
+    n_bins, n_frames = spectrogram_db.shape
+    if duration is None:
+        duration = n_frames * hop_length / samplerate
+
+    row_starts, fmin, fmax = log_frequency_rows(n_bins, samplerate, height, n_fft)
+    col_starts = (np.arange(width) * n_frames // width).astype(np.intp)
+
+    image = QImage(image_width, image_height, QImage.Format.Format_RGBA8888)
+    image.fill(QColor(*BACKGROUND_COLOR))
+    pixels = image_pixels(image)
+    pixels[margin_top : margin_top + height, margin_left : margin_left + width] = (
+        spectrogram_to_rgba(spectrogram_db, row_starts, col_starts)
+    )
+
+    draw_axes(image, bounds, duration, fmin, fmax)
+    return image, bounds
+
+
+def render_spectrogram_tile(spectrogram, start_time, end_time, size):
+    """Render the time range ``[start_time, end_time)`` into a QImage without axes.
+
+    Parameters
+    ----------
+    spectrogram : audio_processor.display_stft.DisplaySpectrogram
+        Recording to render; one column is computed per pixel.
+    start_time, end_time : float
+        Time range covered by the tile, in seconds.
+    size : tuple
+        ``(width, height)`` of the tile in pixels.
+    """
+    width, height = size
+    spectrogram_db, _ = spectrogram.columns_db(start_time, end_time, width)
+    row_starts, _, _ = log_frequency_rows(
+        spectrogram_db.shape[0], spectrogram.samplerate, height, spectrogram.n_fft
+    )
+    image = QImage(width, height, QImage.Format.Format_RGBA8888)
+    image_pixels(image)[:] = spectrogram_to_rgba(
+        spectrogram_db, row_starts, np.arange(width, dtype=np.intp)
+    )
+    return image
+
+
+def generate_spectrogram_pixmap(audio_data, samplerate):
+    """Generate a spectrogram QPixmap for the provided audio.
+
+    Returns
+    -------
+    tuple
+        QPixmap of the spectrogram and a tuple describing the bounding box
+        of the actual plotting area in pixel coordinates `(left, top, width, height)`.
+    """
+    qimage, bounds = generate_spectrogram_image(audio_data, samplerate)
+    if qimage.isNull():
+        return QPixmap(), None  # Return empty pixmap
+    return QPixmap.fromImage(qimage), bounds
 
 
 def draw_playback_line(pixmap, playback_position, total_frames, bounds=None):
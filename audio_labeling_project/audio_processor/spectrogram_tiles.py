@@ -0,0 +1,45 @@
+import math
+
+# Width in pixels of one tile of the zoomed spectrogram
+TILE_WIDTH = 256
+# Extra zoom levels allowed once a pixel column already maps to one frame
+EXTRA_ZOOM_LEVELS = 2
+
+
+def max_zoom_level(n_frames, base_width):
+    """Return the deepest pyramid level worth rendering for *n_frames*.
+
+    Level 0 fits the whole recording in *base_width* columns and every level
+    doubles the number of columns; past one frame per column tiles only
+    repeat frames, so just a couple of extra levels are allowed.
+    """
+    if n_frames <= base_width:
+        return EXTRA_ZOOM_LEVELS
+    return math.ceil(math.log2(n_frames / base_width)) + EXTRA_ZOOM_LEVELS
+
+
+def level_columns(level, base_width):
+    """Total number of pixel columns of the whole recording at *level*."""
+    return base_width * (2**level)
+
+
+def tile_time_range(level, index, duration, base_width):
+    """Return ``(start_time, end_time)`` covered by tile *index* at *level*."""
+    columns = level_columns(level, base_width)
+    col_start = index * TILE_WIDTH
+    col_stop = min(col_start + TILE_WIDTH, columns)
+    return col_start * duration / columns, col_stop * duration / columns
+
+
+def tile_width(level, index, base_width):
+    """Width in pixels of tile *index*; the last tile of a level may be narrower."""
+    columns = level_columns(level, base_width)
+    return max(0, min(TILE_WIDTH, columns - index * TILE_WIDTH))
+
+
+def visible_tiles(level, first_column, view_width, base_width):
+    """Return the tile indices intersecting columns ``[first_column, first_column + view_width)``."""
+    columns = level_columns(level, base_width)
+    first = max(0, int(first_column) // TILE_WIDTH)
+    last = min(columns, int(math.ceil(first_column + view_width)))
+    return range(first, max(first, -(-last // TILE_WIDTH)))
@@ -0,0 +1,187 @@
+import numpy as np
+from audio_processor.loader import LoadCancelled
+from audio_processor.spectrogram_cache import load_cached_array, store_cached_array
+
+# Samples summarised by one min/max pair at level 0; every level above
+# halves the resolution
+ENVELOPE_BASE = 256
+# Bumped when the layout of the cached array changes
+ENVELOPE_VERSION = 1
+
+
+def level_lengths(base_length):
+    """Number of min/max pairs of every level, from level 0 up to a single pair."""
+    lengths = [base_length]
+    while lengths[-1] > 1:
+        lengths.append((lengths[-1] + 1) // 2)
+    return lengths
+
+
+def build_envelope_pyramid(
+    source, base=ENVELOPE_BASE, block=1 << 20, progress_callback=None, is_cancelled=None
+):
+    """Compute the min/max envelope pyramid of a sample source.
+
+    Level 0 holds the minimum and maximum of every *base* consecutive
+    samples, read from *source* in blocks that are a multiple of *base* and
+    reduced with ``np.minimum.reduceat`` / ``np.maximum.reduceat``. Each
+    further level reduces pairs of the level below the same way, up to a
+    single pair covering the whole recording.
+
+    Parameters
+    ----------
+    source : SampleSource
+        Recording to summarise, read sequentially.
+    base : int
+        Samples per pair at level 0.
+    block : int
+        Samples read per step; rounded down to a multiple of *base*.
+    progress_callback : callable, optional
+        Called with ``(samples_read, total_samples)``.
+    is_cancelled : callable, optional
+        Polled between blocks; raises :class:`LoadCancelled` when it
+        returns True.
+
+    Returns
+    -------
+    np.ndarray
+        ``(2, sum(level_lengths(...)))`` float32 array, minima in row 0
+        and maxima in row 1, levels stored one after the other.
+    """
+    total = len(source)
+    lengths = level_lengths(-(-total // base)) if total else []
+    data = np.empty((2, sum(lengths)), dtype=np.float32)
+    block = max(base, block - block % base)
+    for start in range(0, total, block):
+        if is_cancelled is not None and is_cancelled():
+            raise LoadCancelled(source.path)
+        samples = source[start : start + block]
+        edges = np.arange(0, len(samples), base)
+        first = start // base
+        data[0, first : first + len(edges)] = np.minimum.reduceat(samples, edges)
+        data[1, first : first + len(edges)] = np.maximum.reduceat(samples, edges)
+        if progress_callback is not None:
+            progress_callback(start + len(samples), total)
+
+    offset = 0
+    for length, next_length in zip(lengths, lengths[1:]):
+        below = data[:, offset : offset + length]
+        pairs = np.arange(0, length, 2)
+        offset += length
+        data[0, offset : offset + next_length] = np.minimum.reduceat(below[0], pairs)
+        data[1, offset : offset + next_length] = np.maximum.reduceat(below[1], pairs)
+    return data
+
+
+class WaveformEnvelope:
+    """Min/max envelope pyramid of a recording, for drawing its waveform.
+
+    :meth:`column_extremes` picks the coarsest level whose pairs are still
+    no wider than a pixel column, so every column reduces at most a couple
+    of pairs whatever the zoom level and the recording length. When a
+    column spans fewer samples than level 0, the samples themselves are
+    read from *source* instead.
+    """
+
+    def __init__(self, data, frames, samplerate, base=ENVELOPE_BASE, source=None):
+        self.data = data
+        self.frames = frames
+        self.samplerate = samplerate
+        self.base = base
+        self.source = source
+        lengths = level_lengths(-(-frames // base)) if frames else []
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    @property
+    def nbytes(self):
+        """Bytes held in RAM; memory maps live in the page cache."""
+        return 0 if isinstance(self.data, np.memmap) else self.data.nbytes
+
+    def levels(self):
+        return len(self.offsets) - 1
+
+    def peak(self):
+        """Largest absolute sample of the recording, from the top level."""
+        if self.frames == 0:
+            return 0.0
+        low, high = self.level(self.levels() - 1)
+        return float(max(-low[0], high[0]))
+
+    def level(self, index):
+        """Return the ``(minima, maxima)`` of level *index*."""
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return self.data[0, start:stop], self.data[1, start:stop]
+
+    def column_extremes(self, start_time, end_time, columns):
+        """Return the minimum and maximum sample of each of *columns* pixel columns.
+
+        Args:
+            start_time (float): Time at the left edge, in seconds.
+            end_time (float): Time at the right edge, in seconds.
+            columns (int): Number of pixel columns.
+
+        Returns:
+            tuple: Two float32 arrays of length *columns*, zero outside the
+            recording.
+        """
+        mins = np.zeros(columns, dtype=np.float32)
+        maxs = np.zeros(columns, dtype=np.float32)
+        if columns <= 0 or self.frames == 0 or end_time <= start_time:
+            return mins, maxs
+        edges = np.linspace(
+            start_time * self.samplerate, end_time * self.samplerate, columns + 1
+        )
+        edges = np.floor(edges).astype(np.int64)
+        inside = np.flatnonzero((edges[:-1] < self.frames) & (edges[1:] > 0))
+        if not len(inside):
+            return mins, maxs
+        starts = np.clip(edges[:-1][inside], 0, self.frames - 1)
+        # Last sample of each column, at least its first one
+        lasts = np.clip(edges[1:][inside] - 1, starts, self.frames - 1)
+        samples_per_column = (end_time - start_time) * self.samplerate / columns
+
+        if samples_per_column < self.base and self.source is not None:
+            first = int(starts[0])
+            low = high = self.source[first : int(lasts[-1]) + 1]
+            size = 1
+        else:
+            # Coarsest level whose pairs are no wider than a column
+            index = int(np.log2(max(1.0, samples_per_column / self.base)))
+            index = min(index, self.levels() - 1)
+            size = self.base << index
+            low, high = self.level(index)
+            first = int(starts[0]) // size
+            low = low[first : int(lasts[-1]) // size + 1]
+            high = high[first : int(lasts[-1]) // size + 1]
+        indices = starts // size - first
+        # reduceat stops where the next column starts; a pair straddling the
+        # boundary also belongs to the column on its left
+        tails = lasts // size - first
+        mins[inside] = np.minimum(np.minimum.reduceat(low, indices), low[tails])
+        maxs[inside] = np.maximum(np.maximum.reduceat(high, indices), high[tails])
+        return mins, maxs
+
+
+def cached_waveform_envelope(audio_path, source, progress_callback=None, is_cancelled=None):
+    """Return the :class:`WaveformEnvelope` of *source*, building it on a miss.
+
+    The pyramid is stored as float16 next to the spectrogram cache, keyed
+    by the file and, for multi-channel files, by the channel view of
+    *source*, and memory-mapped from there.
+    """
+    params = {"base": ENVELOPE_BASE, "version": ENVELOPE_VERSION}
+    if source.channels > 1:
+        params["view"] = source.view_key
+    data = load_cached_array(audio_path, params, kind="wave")
+    if data is None:
+        data = build_envelope_pyramid(
+            source, progress_callback=progress_callback, is_cancelled=is_cancelled
+        )
+        try:
+            store_cached_array(audio_path, params, data, kind="wave")
+        except OSError:
+            pass  # Keep the in-memory copy on a read-only disk
+        else:
+            cached = load_cached_array(audio_path, params, kind="wave")
+            data = data if cached is None else cached
+    return WaveformEnvelope(data, len(source), source.samplerate, source=source)
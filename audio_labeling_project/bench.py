@@ -0,0 +1,589 @@
+"""Time the load, STFT, render, cut and save hot paths on synthetic data.
+
+Usage::
+
+    python bench.py [--durations 1m,1h] [--channels 1,2] [--formats wav,mp3]
+                    [--stores 1000,10000,100000] [--repeat 3]
+                    [--output FILE] [--compare OLD_FILE]
+
+Synthetic recordings (noise with tonal calls) and synthetic legacy
+``labels.json`` / ``log.json`` stores are generated once under
+``--workdir`` and reused by later runs. Every stage runs ``--repeat``
+times without instrumentation, then once more under ``tracemalloc`` to
+record its peak allocation. Qt runs on the offscreen platform, so no
+display is needed. The results are written as JSON; with ``--compare``
+the run is checked against an earlier file and the exit status is 1 when
+a stage got slower by more than ``--threshold``.
+
+Nothing outside ``--workdir`` is touched: the spectrogram cache and the
+labels database are redirected there for the run.
+"""
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import gc
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import soundfile as sf
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication
+from config import CONFIG
+from audio_processor.cutter import cut_audio_segment, cut_output_path, export_cuts
+from audio_processor.sample_source import open_sample_source
+from audio_processor.display_stft import display_spectrogram
+from audio_processor.spectrogram_generator import (
+    draw_annotations,
+    draw_playback_line,
+    get_stft_params,
+    plot_bounds,
+    render_spectrogram_image,
+    render_spectrogram_tile,
+)
+from audio_processor.spectrogram_tiles import (
+    TILE_WIDTH,
+    max_zoom_level,
+    tile_time_range,
+)
+from audio_processor.waveform import build_envelope_pyramid
+from ui.spectrogram_view import SpectrogramView
+from utils.label_store import LabelStore, LabelsMapping
+from utils.logger import log_labeled_audio, save_labels_for_audio
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Suffixes accepted by --durations, in seconds
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+# Annotations drawn by the render stages and cuts written by the cut stage
+BENCH_ANNOTATIONS = 200
+BENCH_CUTS = 20
+BENCH_CUT_SECONDS = 5.0
+# Saves timed by the labels_save stage
+BENCH_SAVES = 100
+# Size of the window used by the view_paint stage
+VIEW_SIZE = (1200, 400)
+
+
+def parse_duration(text):
+    """Convert ``"90s"``, ``"1m"`` or ``"6h"`` to seconds."""
+    unit = DURATION_UNITS.get(text[-1:].lower())
+    if unit is None:
+        return float(text)
+    return float(text[:-1]) * unit
+
+
+def parse_list(text, convert=str):
+    return [convert(item) for item in text.split(",") if item.strip()]
+
+
+def synthetic_block(rng, start, frames, samplerate, channels):
+    """Background noise with a rising tonal call every 20 seconds.
+
+    Args:
+        rng (np.random.Generator): Source of the noise.
+        start (int): Index of the first frame, so calls land at the same
+            times whatever the block size.
+        frames (int): Frames to generate.
+        samplerate (int): Sample rate of the recording.
+        channels (int): Channels to generate; each gets its own noise.
+
+    Returns:
+        np.ndarray: ``(frames, channels)`` float32 block in [-1, 1].
+    """
+    t = (start + np.arange(frames)) / samplerate
+    phase = np.mod(t, 20.0)
+    call = np.where(
+        phase < 1.5,
+        0.3 * np.sin(2 * np.pi * (400.0 + 200.0 * phase) * phase),
+        0.0,
+    )
+    noise = rng.normal(0.0, 0.02, size=(frames, channels))
+    return (noise + call[:, None]).astype(np.float32)
+
+
+def write_audio_fixture(path, seconds, samplerate, channels, block=1 << 20):
+    """Write a synthetic recording to *path*, unless it already exists."""
+    if os.path.exists(path):
+        return path
+    output_format = "MP3" if path.endswith(".mp3") else "WAV"
+    subtype = "MPEG_LAYER_III" if output_format == "MP3" else "PCM_16"
+    total = int(seconds * samplerate)
+    rng = np.random.default_rng(total + channels)
+    # Written under another name so an interrupted run is not reused
+    tmp_path = f"{path}.tmp"
+    with sf.SoundFile(
+        tmp_path, "w", samplerate, channels, subtype=subtype, format=output_format
+    ) as f:
+        for start in range(0, total, block):
+            frames = min(block, total - start)
+            f.write(synthetic_block(rng, start, frames, samplerate, channels))
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_labels_fixture(directory, count, categories):
+    """Write legacy ``labels.json`` and ``log.json`` files with *count* entries.
+
+    Returns:
+        tuple: Paths of the labels file and of the log file.
+    """
+    labels_json = os.path.join(directory, f"labels_{count}.json")
+    log_json = os.path.join(directory, f"log_{count}.json")
+    if os.path.exists(labels_json) and os.path.exists(log_json):
+        return labels_json, log_json
+    rng = np.random.default_rng(count)
+    labels = {}
+    for i in range(count):
+        audio_path = f"/data/site_{i % 40:02d}/night_{i // 40:05d}/rec_{i:06d}.wav"
+        starts = np.sort(rng.uniform(0.0, 3500.0, size=rng.integers(1, 6)))
+        annotations = [
+            [round(float(s), 3), round(float(s) + 2.5, 3), categories[j % len(categories)]]
+            for j, s in enumerate(starts)
+        ]
+        cuts = [
+            cut_output_path("/data/labeled_cuts", audio_path, j, category)
+            for j, (_, _, category) in enumerate(annotations)
+        ]
+        labels[audio_path] = {"annotations": annotations, "cuts": cuts}
+    for path, data in (
+        (labels_json, labels),
+        (log_json, {audio_path: True for audio_path in labels}),
+    ):
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(f"{path}.tmp", path)
+    return labels_json, log_json
+
+
+def fresh_directory(parent):
+    """Setup step handing each run an empty directory of its own."""
+    return lambda: tempfile.mkdtemp(dir=parent)
+
+
+def remove_directory(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def use_cache_dir(path):
+    CONFIG["SPECTROGRAM_CACHE_DIR"] = path
+    CONFIG["PCM_CACHE_DIR"] = os.path.join(path, "pcm")
+    return path
+
+
+def measure(run, repeat, setup=None, teardown=None):
+    """Time *run* and record the peak memory it allocates.
+
+    Args:
+        run (callable): Stage to measure, called with the value returned
+            by *setup* (or None).
+        repeat (int): Timed runs.
+        setup (callable, optional): Called before every run, untimed.
+        teardown (callable, optional): Called after every run with the
+            value returned by *setup*, untimed.
+
+    Returns:
+        dict: ``runs`` (seconds of each timed run), ``min``, ``median`` and
+        ``peak_mb``, the peak of the memory traced by ``tracemalloc``
+        during one extra run. NumPy buffers are traced; memory maps and Qt
+        images are not.
+    """
+    runs = []
+    for i in range(repeat + 1):
+        state = setup() if setup is not None else None
+        gc.collect()
+        if i == repeat:
+            tracemalloc.start()
+            run(state)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            started = time.perf_counter()
+            run(state)
+            runs.append(time.perf_counter() - started)
+        if teardown is not None:
+            teardown(state)
+    return {
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def audio_stages(path, workdir):
+    """Yield ``(stage, items, run, setup, teardown)`` for one recording.
+
+    The samples, the spectrogram and the rendered overview the later
+    stages start from are prepared once here, outside the timings.
+    """
+    params = get_stft_params()
+    use_cache_dir(os.path.join(workdir, "cache"))
+    source = open_sample_source(path)
+    samplerate = source.samplerate
+    duration = len(source) / samplerate
+    width = plot_bounds()[2]
+    spectrogram, overview_db, _ = display_spectrogram(source, width, params)
+    image, bounds = render_spectrogram_image(
+        overview_db, samplerate, duration=duration, n_fft=params["n_fft"]
+    )
+    pixmap = QPixmap.fromImage(image)
+    starts = np.linspace(0.0, max(0.0, duration - 2.0), BENCH_ANNOTATIONS)
+    annotations = [(float(s), float(s) + 2.0, "Hoot") for s in starts]
+
+    def fresh_cache():
+        return use_cache_dir(tempfile.mkdtemp(dir=workdir))
+
+    def warm_cache():
+        cache_dir = fresh_cache()
+        display_spectrogram(source, width, params)
+        return cache_dir
+
+    # Decoding (MP3) or memory-mapping (WAV), on an empty cache
+    yield "open", 1, lambda _: open_sample_source(path), fresh_cache, remove_directory
+    # Overview columns as loading computes them (the disk cache is kept
+    # cold) and as reopening reads them back
+    def overview(_):
+        return display_spectrogram(source, width, params)
+
+    yield "stft", 1, overview, fresh_cache, remove_directory
+    yield "stft_cached", 1, overview, warm_cache, remove_directory
+    yield "waveform", 1, lambda _: build_envelope_pyramid(source), None, None
+    if source.channels > 1:
+        # Another channel view of the open file: picking the loudest channel
+        # and the overview of that view, without decoding again
+        def switch_view(_):
+            source.energies = None
+            view = source.with_view("max_energy")
+            return display_spectrogram(view, width, params)
+
+        yield "switch_view", 1, switch_view, fresh_cache, remove_directory
+    yield (
+        "render_overview",
+        1,
+        lambda _: render_spectrogram_image(
+            overview_db, samplerate, duration=duration, n_fft=params["n_fft"]
+        ),
+        None,
+        None,
+    )
+    # One tile from the middle of the recording, at the deepest zoom level
+    # and at the level halfway there
+    deepest = max_zoom_level(spectrogram.frame_count(), width)
+    for stage, level in (("render_tile", deepest), ("render_tile_mid", deepest // 2)):
+        middle = (width * 2**level // TILE_WIDTH) // 2
+        time_range = tile_time_range(level, middle, duration, width)
+        yield (
+            stage,
+            1,
+            lambda _, time_range=time_range: render_spectrogram_tile(
+                spectrogram, *time_range, (TILE_WIDTH, bounds[3])
+            ),
+            fresh_cache,
+            remove_directory,
+        )
+    yield (
+        "draw_annotations",
+        len(annotations),
+        lambda _: draw_annotations(pixmap, annotations, len(source), samplerate, bounds),
+        None,
+        None,
+    )
+    yield (
+        "draw_playback_line",
+        1,
+        lambda _: draw_playback_line(pixmap, len(source) // 2, len(source), bounds),
+        None,
+        None,
+    )
+
+    view = SpectrogramView()
+    view.resize(*VIEW_SIZE)
+    view.set_spectrogram(pixmap, bounds, spectrogram, samplerate, duration)
+
+    def paint_view(_):
+        # Full repaint with the layers rebuilt, as after loading a file
+        view.invalidate_layers()
+        view.set_annotations(annotations)
+        view.set_playback_time(duration / 2)
+        view.grab()
+
+    yield "view_paint", 1, paint_view, None, None
+
+    cut_length = min(BENCH_CUT_SECONDS, duration / BENCH_CUTS)
+
+    def write_cuts(output_dir):
+        cuts = [
+            (
+                i * duration / BENCH_CUTS,
+                i * duration / BENCH_CUTS + cut_length,
+                cut_output_path(output_dir, path, i, "Hoot"),
+            )
+            for i in range(BENCH_CUTS)
+        ]
+        export_cuts(source, samplerate, cuts)
+
+    yield (
+        "cut_audio_segment",
+        1,
+        lambda output_dir: cut_audio_segment(
+            source,
+            samplerate,
+            duration / 2,
+            duration / 2 + cut_length,
+            cut_output_path(output_dir, path, 0, "Hoot"),
+        ),
+        fresh_directory(workdir),
+        remove_directory,
+    )
+    yield (
+        "export_cuts",
+        BENCH_CUTS,
+        write_cuts,
+        fresh_directory(workdir),
+        remove_directory,
+    )
+
+
+def label_stages(labels_json, log_json, workdir):
+    """Yield ``(stage, items, run, setup, teardown)`` for one labels store."""
+    db_path = os.path.join(workdir, "labels.sqlite3")
+    LabelStore(db_path, labels_json, log_json).close()
+    with open(labels_json) as f:
+        paths = list(json.load(f))
+
+    def migrate(directory):
+        LabelStore(
+            os.path.join(directory, "labels.sqlite3"), labels_json, log_json
+        ).close()
+
+    yield "labels_migrate", len(paths), migrate, fresh_directory(workdir), remove_directory
+
+    def startup(_):
+        # What the window reads before it is shown
+        store = LabelStore(db_path)
+        labels_data = LabelsMapping(store)
+        store.load_labeled()
+        labels_data.get(paths[len(paths) // 2])
+        store.close()
+
+    yield "labels_startup", 1, startup, None, None
+
+    def load_all(_):
+        store = LabelStore(db_path)
+        store.load_labels()
+        store.close()
+
+    yield "labels_load_all", len(paths), load_all, None, None
+
+    CONFIG["LABELS_DB"] = db_path
+    labels_data = LabelsMapping(LabelStore(db_path))
+    labeled_audios = {}
+    saved = paths[:: max(1, len(paths) // BENCH_SAVES)][:BENCH_SAVES]
+    annotations = [[1.0, 3.5, "Hoot"], [10.0, 12.5, "Climax"]]
+
+    def save(_):
+        for audio_path in saved:
+            save_labels_for_audio(audio_path, annotations, labels_data, [])
+            log_labeled_audio(audio_path, labeled_audios)
+
+    yield "labels_save", len(saved), save, None, None
+
+
+def max_rss_mb():
+    """Peak resident size of the whole run, or None where it is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(old, new, threshold):
+    """Print the change of every stage present in both runs.
+
+    Returns:
+        list: ``(fixture, stage, ratio)`` of the stages whose best time
+        grew by more than *threshold* (0.2 meaning 20%). The best of the
+        runs is compared rather than the median, being the least affected
+        by other load on the machine.
+    """
+    previous = {(r["fixture"], r["stage"]): r for r in old["results"]}
+    regressions = []
+    print(f"Compared with {old['meta'].get('revision') or 'previous run'}:")
+    for result in new["results"]:
+        key = (result["fixture"], result["stage"])
+        if key not in previous or previous[key]["min"] <= 0:
+            continue
+        ratio = result["min"] / previous[key]["min"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  slower"
+            regressions.append((*key, ratio))
+        elif ratio < 1 - threshold:
+            mark = "  faster"
+        print(
+            f"  {key[0]:<14} {key[1]:<20} {previous[key]['min'] * 1000:10.1f} ms"
+            f" -> {result['min'] * 1000:10.1f} ms ({ratio - 1:+.0%}){mark}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hot paths of the labeling tool on synthetic data."
+    )
+    parser.add_argument(
+        "--durations",
+        default="1m,1h",
+        help="recording lengths, e.g. 1m,1h,6h (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--channels", default="1,2", help="channel counts (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--formats", default="wav,mp3", help="file formats (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--samplerate",
+        type=int,
+        default=CONFIG["SAMPLE_RATE"],
+        help="sample rate of the recordings (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--stores",
+        default="1000,10000,100000",
+        help="entries of the synthetic labels stores (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="timed runs per stage (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--workdir",
+        default="memlog/bench",
+        help="fixtures and scratch files, kept between runs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output", help="results file (default: WORKDIR/results-<time>.json)"
+    )
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown reported as a regression (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    fixtures_dir = os.path.join(args.workdir, "fixtures")
+    scratch_dir = os.path.join(args.workdir, "scratch")
+    os.makedirs(fixtures_dir, exist_ok=True)
+    remove_directory(scratch_dir)
+    os.makedirs(scratch_dir)
+    # Keep the user's labels and caches out of the run
+    CONFIG["LABELS_FILE"] = os.path.join(scratch_dir, "labels.json")
+    CONFIG["LOG_FILE"] = os.path.join(scratch_dir, "log.json")
+
+    suites = []
+    for text in parse_list(args.durations):
+        for channels in parse_list(args.channels, int):
+            for extension in parse_list(args.formats):
+                name = f"{text}_{channels}ch.{extension}"
+                path = os.path.join(fixtures_dir, name)
+                if not os.path.exists(path):
+                    print(f"Generating {name}...", flush=True)
+                write_audio_fixture(
+                    path, parse_duration(text), args.samplerate, channels
+                )
+                suites.append((name, path, None))
+    for count in parse_list(args.stores, int):
+        suites.append((f"{count}_labels", None, count))
+
+    results = []
+    for name, audio_path, count in suites:
+        workdir = tempfile.mkdtemp(dir=scratch_dir)
+        if audio_path is not None:
+            stages = audio_stages(audio_path, workdir)
+        else:
+            labels_json, log_json = write_labels_fixture(
+                fixtures_dir, count, CONFIG["CATEGORIES"]
+            )
+            stages = label_stages(labels_json, log_json, workdir)
+        print(name, flush=True)
+        for stage, items, run, setup, teardown in stages:
+            result = measure(run, max(1, args.repeat), setup, teardown)
+            result.update({"fixture": name, "stage": stage, "items": items})
+            results.append(result)
+            per_item = ""
+            if items > 1:
+                per_item = f", {result['median'] / items * 1000:.3f} ms each"
+            print(
+                f"  {stage:<20} {result['median'] * 1000:10.1f} ms"
+                f" (min {result['min'] * 1000:.1f}{per_item})"
+                f"  peak {result['peak_mb']:.1f} MB",
+                flush=True,
+            )
+        remove_directory(workdir)
+        app.processEvents()
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "samplerate": args.samplerate,
+            "stft": get_stft_params(),
+            "repeat": args.repeat,
+            "max_rss_mb": max_rss_mb(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        args.workdir, f"results-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    remove_directory(scratch_dir)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
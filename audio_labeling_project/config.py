@@ -1,8 +1,83 @@
 CONFIG = {
     "AUDIO_EXTENSIONS": [".wav", ".mp3"],
     "SAMPLE_RATE": 44100,
+    # Labels and the labeled-audio log (SQLite, WAL mode)
+    "LABELS_DB": "memlog/labels.sqlite3",
+    # Legacy JSON files, imported into LABELS_DB on first start
     "LOG_FILE": "memlog/log.json",
     "LABELS_FILE": "memlog/labels.json",
+    # Recursive folder scan: parallel directory walkers, manifest cache and
+    # how often the open folder is checked for new files (0 disables it)
+    "SCAN_WORKERS": 8,
+    "MANIFEST_DIR": "memlog/manifests",
+    "RESCAN_INTERVAL_SECONDS": 30,
+    # In-memory cache of decoded audio and spectrograms
+    "AUDIO_CACHE_MB": 512,
+    # Neighbouring files decoded in the background while labeling
+    "PREFETCH_NEXT": 1,
+    "PREFETCH_PREVIOUS": True,
+    # Channel shown, played and cut for multi-channel recordings: "mean" of
+    # all channels, "max_energy" for the loudest one or a channel number (0
+    # is the first). It can be switched from the window without decoding
+    # the file again.
+    "CHANNEL_VIEW": "mean",
+    # Spectrogram settings. Only the frames that can be shown are computed:
+    # a pixel column spanning more than frames_per_column hops gets that
+    # many evenly spaced frames (0 computes every frame), and bins above
+    # fmax (Hz, None for half the sample rate) are dropped. hop_length is
+    # the finest time step, reached at the deepest zoom level. window is
+    # "hann", "hamming", "blackman" or "rectangular".
+    "STFT": {
+        "n_fft": 2048,
+        "hop_length": 512,
+        "window": "hann",
+        "fmax": None,
+        "frames_per_column": 8,
+    },
+    # On-disk cache of waveform envelopes, spectrogram columns (overview and
+    # zoom tiles) and detector results
+    "SPECTROGRAM_CACHE_DIR": "memlog/spectrograms",
+    "SPECTROGRAM_CACHE_MB": 2048,
+    # Decoded MP3s, memory-mapped while open; kept apart because a single
+    # long recording can take more than the whole spectrogram cache
+    "PCM_CACHE_DIR": "memlog/pcm",
+    "PCM_CACHE_MB": 8192,
+    # In-memory cache of rendered tiles of the zoomed spectrogram
+    "TILE_CACHE_MB": 128,
+    # Audio kept decoded ahead of the playhead
+    "PLAYBACK_BUFFER_SECONDS": 2.0,
+    # Where labeled cuts are written, one subfolder per category
+    "CUT_OUTPUT_DIR": r"D:\Dept. Investigación media\Noches Chimps\Proyectos\DATASET AUDIOS CHIMPS\labeled_cuts",
+    # Format and subtype of the cut files (e.g. "FLAC" / "PCM_16")
+    "CUT_FORMAT": "WAV",
+    "CUT_SUBTYPE": "PCM_16",
+    # "view" writes the channel view on screen, "all" every channel
+    "CUT_CHANNELS": "view",
+    # Cuts written in parallel when saving labels
+    "CUT_EXPORT_WORKERS": 4,
+    # Candidate detector: band energy (Hz) exceeding the local noise floor
+    # (a percentile over noise_seconds) by threshold_db; runs closer than
+    # merge_gap are joined, shorter than min_duration dropped (seconds)
+    "DETECTOR": {
+        "n_fft": 1024,
+        "hop_length": 512,
+        "low_hz": 200.0,
+        "high_hz": 2000.0,
+        "threshold_db": 8.0,
+        "noise_seconds": 30.0,
+        "noise_percentile": 20.0,
+        "min_duration": 0.3,
+        "merge_gap": 0.5,
+        "padding": 0.2,
+    },
+    # STFT frames the detector transforms per block while reading a file
+    "DETECT_BLOCK_FRAMES": 2048,
+    # Run the detector on every file opened (results are cached)
+    "DETECT_ON_LOAD": True,
+    # Timings of the hot paths (load stages, repaints, cuts, label saves)
+    # written as a Chrome trace, viewable in chrome://tracing or Perfetto
+    "TRACE_ENABLED": False,
+    "TRACE_FILE": "memlog/trace.json",
     "CATEGORIES": [
         "Hoot",
         "Climax",
@@ -18,5 +93,9 @@ CONFIG = {
         "next_audio": "N",
         "clear_labels": "C",
         "save_labels": "Ctrl+S",
+        "detect_candidates": "Ctrl+D",
+        "next_candidate": "]",
+        "previous_candidate": "[",
+        "accept_candidate": "A",
     },
 }
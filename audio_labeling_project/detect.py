@@ -0,0 +1,107 @@
+"""Run the candidate detector over a folder of recordings without the GUI.
+
+Usage::
+
+    python detect.py FOLDER [--workers N] [--force] [--channel-view VIEW]
+
+Every recording under FOLDER (subfolders included) is analysed by a
+worker process and its candidate segments are cached, so the labeling
+window shows them as soon as a file is opened. Files already analysed with
+the current ``DETECTOR`` settings are skipped unless ``--force`` is given.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import CONFIG
+from audio_processor.detector import detect_candidates, get_detector_params
+from audio_processor.channels import parse_channel_view
+from utils.file_manager import get_audio_files_in_folder
+
+
+def format_speed(result):
+    if result["cached"]:
+        return "cached"
+    if not result["speed"]:
+        return f"{result['elapsed']:.2f}s"
+    return f"{result['elapsed']:.2f}s, {result['speed']:.0f}x real time"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Detect candidate segments in every recording of a folder."
+    )
+    parser.add_argument("folder", help="folder to analyse, recursively")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="analyse files again even if their candidates are cached",
+    )
+    parser.add_argument(
+        "--channel-view",
+        default=CONFIG.get("CHANNEL_VIEW", "mean"),
+        help='channel analysed in multi-channel files: "mean", "max_energy" or '
+        "a channel number, 0 being the first (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    try:
+        view = parse_channel_view(args.channel_view)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = get_audio_files_in_folder(args.folder, CONFIG["AUDIO_EXTENSIONS"])
+    print(f"{len(paths)} files")
+    params = get_detector_params()
+
+    started = time.perf_counter()
+    files_done = failed = candidates = 0
+    audio_seconds = processing_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(
+                detect_candidates, path, params, args.force, view=view
+            ): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            files_done += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"error: {path}: {e}", file=sys.stderr)
+                continue
+            candidates += len(result["candidates"])
+            if not result["cached"]:
+                audio_seconds += result["duration"]
+                processing_seconds += result["elapsed"]
+            print(
+                f"[{files_done}/{len(paths)}] {os.path.basename(path)}: "
+                f"{len(result['candidates'])} candidates, "
+                f"{result['duration']:.0f}s of audio ({format_speed(result)})"
+            )
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done in {elapsed:.1f}s: {candidates} candidates in "
+        f"{files_done - failed} files, {failed} failed"
+    )
+    if processing_seconds > 0:
+        print(
+            f"Per worker: {audio_seconds / processing_seconds:.0f}x real time; "
+            f"overall: {audio_seconds / elapsed:.0f}x real time"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
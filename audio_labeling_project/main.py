@@ -1,9 +1,23 @@
+import time
+
+STARTED = time.perf_counter()
+
 import sys
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+from config import CONFIG
+from utils.startup import StartupTimer
+from utils.tracing import get_tracer
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # Prints how long each startup phase took (see utils/startup.py)
+    timer = StartupTimer(STARTED) if "--startup-timing" in sys.argv else None
+    if CONFIG.get("TRACE_ENABLED"):
+        get_tracer().start(CONFIG.get("TRACE_FILE", "memlog/trace.json"))
+    argv = [arg for arg in sys.argv if arg != "--startup-timing"]
+    app = QApplication(argv)
+    if timer:
+        timer.mark("QApplication")
     dark_style = """
         QWidget {
             background-color: #2b2b2b;
@@ -28,6 +42,22 @@ if __name__ == "__main__":
         }
     """
     app.setStyleSheet(dark_style)
+    # Imported here so the timing covers the window's own imports
+    from ui.main_window import MainWindow
+
+    if timer:
+        timer.mark("import ui.main_window")
     window = MainWindow()
+    if timer:
+        timer.mark("MainWindow()")
     window.show()
+    if timer:
+        timer.mark("show()")
+
+        # Runs once the event loop has painted the window
+        def first_event():
+            timer.mark("first event loop pass")
+            timer.report()
+
+        QTimer.singleShot(0, first_event)
     sys.exit(app.exec())
@@ -0,0 +1,176 @@
+"""Regenerate every labeled cut from the labels store without the GUI.
+
+Usage::
+
+    python recut.py [--output-dir DIR] [--workers N] [--verify {size,hash,none}]
+                    [--channel-view VIEW] [--channels {view,all}]
+
+Annotations are grouped by source recording; each recording is opened
+once by a worker process that writes all of its cuts. Cuts that already
+exist and match (see ``--verify``) are skipped, so an interrupted run can
+simply be started again.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import CONFIG
+from audio_processor.cutter import cut_output_path, recut_audio_file
+from audio_processor.channels import parse_channel_view
+from utils.logger import load_labels_data
+
+
+def collect_jobs(labels_data, output_dir=None):
+    """
+    Turns the labels store into one job per source recording.
+
+    Args:
+        labels_data (dict): Store returned by ``load_labels_data``.
+        output_dir (str, optional): Write the cuts under this folder
+            instead of the paths recorded in the store.
+
+    Returns:
+        list: ``(audio_path, cuts)`` pairs, ``cuts`` being
+        ``(start_time, end_time, output_path)`` tuples.
+    """
+    jobs = []
+    for audio_path, entry in sorted(labels_data.items()):
+        if isinstance(entry, list):
+            entry = {"annotations": entry}
+        if not isinstance(entry, dict):
+            continue
+        annotations = entry.get("annotations") or []
+        stored = entry.get("cuts") or []
+        cuts = []
+        for i, (start_time, end_time, category) in enumerate(annotations):
+            output_path = cut_output_path(
+                output_dir or CONFIG["CUT_OUTPUT_DIR"], audio_path, i, category
+            )
+            if output_dir is None and len(stored) == len(annotations):
+                # Keep the recorded location, with the extension of the
+                # current CUT_FORMAT
+                extension = os.path.splitext(output_path)[1]
+                output_path = os.path.splitext(stored[i])[0] + extension
+            cuts.append((start_time, end_time, output_path))
+        if cuts:
+            jobs.append((audio_path, cuts))
+    return jobs
+
+
+def format_rate(count, elapsed):
+    return f"{count / elapsed:.2f}" if elapsed > 0 else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Regenerate the labeled cuts stored in the labels file."
+    )
+    parser.add_argument(
+        "--labels",
+        default=CONFIG.get("LABELS_DB", "memlog/labels.sqlite3"),
+        help="labels store to replay (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="write cuts here instead of the paths recorded in the store",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--verify",
+        choices=["size", "hash", "none"],
+        default="size",
+        help="how existing cuts are checked before being skipped: frame count "
+        "and sample rate, SHA-1 of the encoded file, or never skip",
+    )
+    parser.add_argument(
+        "--channel-view",
+        default=CONFIG.get("CHANNEL_VIEW", "mean"),
+        help='channel the cuts of multi-channel files are made from: "mean", '
+        '"max_energy" or a channel number, 0 being the first (default: %(default)s)',
+    )
+    parser.add_argument(
+        "--channels",
+        choices=["view", "all"],
+        default=CONFIG.get("CUT_CHANNELS", "view"),
+        help="write the channel view or every channel of multi-channel files "
+        "(default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    try:
+        view = parse_channel_view(args.channel_view)
+    except ValueError as e:
+        parser.error(str(e))
+
+    CONFIG["LABELS_DB"] = args.labels
+    jobs = collect_jobs(load_labels_data(), args.output_dir)
+    total_cuts = sum(len(cuts) for _, cuts in jobs)
+    print(f"{len(jobs)} files, {total_cuts} cuts")
+
+    # Every category folder is created once here rather than per cut
+    directories = {os.path.dirname(path) for _, cuts in jobs for _, _, path in cuts}
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    files_done = written = skipped = failed = written_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(
+                recut_audio_file,
+                audio_path,
+                cuts,
+                args.verify,
+                view,
+                args.channels == "all",
+            ): audio_path
+            for audio_path, cuts in jobs
+        }
+        for future in as_completed(futures):
+            audio_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died
+                cuts = dict(jobs)[audio_path]
+                result = {
+                    "written": 0,
+                    "skipped": 0,
+                    "bytes": 0,
+                    "errors": [(path, str(e)) for _, _, path in cuts],
+                }
+            files_done += 1
+            written += result["written"]
+            skipped += result["skipped"]
+            failed += len(result["errors"])
+            written_bytes += result["bytes"]
+            for output_path, message in result["errors"]:
+                print(f"error: {output_path}: {message}", file=sys.stderr)
+            print(
+                f"[{files_done}/{len(jobs)}] {os.path.basename(audio_path)}: "
+                f"{result['written']} written, {result['skipped']} skipped, "
+                f"{len(result['errors'])} failed"
+            )
+
+    elapsed = time.perf_counter() - started
+    megabytes = written_bytes / (1024 * 1024)
+    print(
+        f"Done in {elapsed:.1f}s: {written} written, {skipped} skipped, "
+        f"{failed} failed, {megabytes:.1f} MB"
+    )
+    print(
+        f"Throughput: {format_rate(files_done, elapsed)} files/s, "
+        f"{format_rate(written + skipped, elapsed)} cuts/s, "
+        f"{format_rate(megabytes, elapsed)} MB/s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from audio_processor.loader import LoadCancelled
+
+
+class CandidateDetectWorker(QThread):
+    """Run the candidate detector on one recording off the GUI thread.
+
+    The recording is read through *source*, the sample source on screen,
+    so the candidates are found in the channel view being labeled.
+
+    Signals
+    -------
+    detected(result)
+        Emitted with the dict returned by
+        :func:`audio_processor.detector.detect_candidates` plus
+        ``audio_path``.
+    failed(audio_path, message)
+        Emitted when the file cannot be analysed.
+    """
+
+    detected = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, audio_path, source, parent=None):
+        super().__init__(parent)
+        self.audio_path = audio_path
+        self.source = source
+        self._cancelled = False
+
+    def cancel(self):
+        """Ask the worker to stop at the next block boundary."""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        # Imported here, off the GUI thread: it needs soundfile
+        from audio_processor.detector import detect_candidates
+
+        try:
+            result = detect_candidates(
+                self.audio_path,
+                is_cancelled=self.is_cancelled,
+                source=self.source,
+            )
+        except LoadCancelled:
+            return
+        except Exception as e:
+            if not self._cancelled:
+                self.failed.emit(self.audio_path, str(e))
+            return
+        if not self._cancelled:
+            result["audio_path"] = self.audio_path
+            self.detected.emit(result)
@@ -0,0 +1,62 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from utils.tracing import span
+
+
+class CutExportWorker(QThread):
+    """Write the cuts of one labeled recording off the GUI thread.
+
+    The worker keeps its own copy of the annotations and of the sample
+    source, so the window can load another file while the cuts are still
+    being written.
+
+    Signals
+    -------
+    progress(done, total)
+        Emitted after each cut.
+    exported(result)
+        Emitted once the batch is done with a dict holding ``audio_path``,
+        ``annotations``, ``cut_files`` (the cuts that were written) and
+        ``errors`` (``(output_path, message)`` tuples).
+    """
+
+    progress = pyqtSignal(int, int)
+    exported = pyqtSignal(object)
+
+    def __init__(
+        self, audio_path, audio_data, samplerate, annotations, cuts, parent=None
+    ):
+        super().__init__(parent)
+        self.audio_path = audio_path
+        self.audio_data = audio_data
+        self.samplerate = samplerate
+        self.annotations = list(annotations)
+        self.cuts = list(cuts)
+        self.done = 0
+        self.total = len(self.cuts)
+
+    def run(self):
+        # Imported here, off the GUI thread: it needs soundfile
+        from audio_processor.cutter import export_cuts
+
+        try:
+            with span("write_cuts", cuts=len(self.cuts)):
+                cut_files, errors = export_cuts(
+                    self.audio_data,
+                    self.samplerate,
+                    self.cuts,
+                    progress_callback=self._report_progress,
+                )
+        except Exception as e:
+            cut_files, errors = [], [(path, str(e)) for _, _, path in self.cuts]
+        self.exported.emit(
+            {
+                "audio_path": self.audio_path,
+                "annotations": self.annotations,
+                "cut_files": cut_files,
+                "errors": errors,
+            }
+        )
+
+    def _report_progress(self, done, total):
+        self.done = done
+        self.progress.emit(done, total)
@@ -0,0 +1,291 @@
+import bisect
+import os
+import numpy as np
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+
+
+def format_duration(seconds):
+    if not np.isfinite(seconds):
+        return ""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_samplerate(samplerate):
+    if not np.isfinite(samplerate):
+        return ""
+    return f"{samplerate / 1000:g}k"
+
+
+def format_channels(channels):
+    return "" if not np.isfinite(channels) else str(int(channels))
+
+
+class FileListModel(QAbstractTableModel):
+    """The audio files of the current folder, for the side panel.
+
+    The labeled status of every file is a boolean array indexed like
+    ``paths``, and the header metadata (duration, sample rate, channels)
+    float arrays holding NaN until the file has been indexed. The rows
+    shown are an array of file indices derived from them with NumPy: the
+    sort order (``order``) restricted to the All/Unlabeled/Labeled filter.
+    Changing the filter or the sort column never touches Python objects
+    per file, and marking one file labeled or unlabeled updates, inserts
+    or removes that single row.
+
+    ``Qt.ItemDataRole.UserRole`` holds the index of the row's file in
+    ``paths``.
+    """
+
+    FILTERS = ["All", "Unlabeled", "Labeled"]
+    HEADERS = ["File", "Duration", "Rate", "Ch"]
+    LABELED_COLOR = QColor("green")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self.names = []
+        self.path_index = {}
+        self.labeled = np.zeros(0, dtype=bool)
+        self.durations = np.zeros(0)
+        self.samplerates = np.zeros(0)
+        self.channels = np.zeros(0)
+        self.filter = "All"
+        self.sort_column = 0
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        # File indices in display order and each file's place in it; None
+        # while the files are shown in path order
+        self.order = None
+        self.rank = None
+        # File indices of the visible rows, None when every file is shown
+        # in path order
+        self.visible = None
+
+    def set_files(self, paths, labeled_paths, infos=None):
+        """Show *paths* (sorted), with metadata from *infos* where known."""
+        self.beginResetModel()
+        self.paths = list(paths)
+        self.names = [os.path.basename(p) for p in self.paths]
+        self.path_index = {path: i for i, path in enumerate(self.paths)}
+        self.labeled = np.fromiter(
+            (path in labeled_paths for path in self.paths),
+            dtype=bool,
+            count=len(self.paths),
+        )
+        self.durations = np.full(len(self.paths), np.nan)
+        self.samplerates = np.full(len(self.paths), np.nan)
+        self.channels = np.full(len(self.paths), np.nan)
+        self.store_info(infos or {})
+        self.update_order()
+        self.endResetModel()
+
+    def set_info(self, infos):
+        """Record header metadata (``{path: info}``) found by the indexer.
+
+        Rows keep their place until the user sorts again.
+        """
+        if self.store_info(infos) and self.paths:
+            self.dataChanged.emit(
+                self.index(0, 1), self.index(self.rowCount() - 1, 3)
+            )
+
+    def store_info(self, infos):
+        stored = 0
+        for path, info in infos.items():
+            index = self.path_index.get(path)
+            if index is None or "error" in info:
+                continue
+            self.durations[index] = info["duration"]
+            self.samplerates[index] = info["samplerate"]
+            self.channels[index] = info["channels"]
+            stored += 1
+        return stored
+
+    def set_filter(self, name):
+        if name == self.filter:
+            return
+        self.beginResetModel()
+        self.filter = name
+        self.visible = self.visible_indices()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = column
+        self.sort_order = order
+        self.update_order()
+        self.layoutChanged.emit()
+
+    def update_order(self):
+        descending = self.sort_order == Qt.SortOrder.DescendingOrder
+        if self.sort_column == 0:
+            order = np.arange(len(self.paths))[::-1] if descending else None
+        else:
+            key = [self.durations, self.samplerates, self.channels][
+                self.sort_column - 1
+            ]
+            # Stable, and files not indexed yet (NaN) stay last either way
+            order = np.argsort(-key if descending else key, kind="stable")
+        self.order = order
+        if order is None:
+            self.rank = None
+        else:
+            self.rank = np.empty_like(order)
+            self.rank[order] = np.arange(len(order))
+        self.visible = self.visible_indices()
+
+    def visible_indices(self):
+        if self.filter == "All":
+            return self.order
+        mask = self.labeled if self.filter == "Labeled" else ~self.labeled
+        if self.order is None:
+            return np.flatnonzero(mask)
+        return self.order[mask[self.order]]
+
+    def row_position(self, index):
+        """Row where file *index* is, or would be inserted, in ``visible``."""
+        if self.rank is None:
+            return int(np.searchsorted(self.visible, index))
+        return int(np.searchsorted(self.rank[self.visible], self.rank[index]))
+
+    def row_of(self, index):
+        """Row showing file *index*, or None if the filter hides it."""
+        if self.visible is None:
+            return index
+        row = self.row_position(index)
+        if row < len(self.visible) and self.visible[row] == index:
+            return row
+        return None
+
+    def neighbour(self, index, step):
+        """File *step* rows away from file *index* in the displayed order.
+
+        Falls back to path order when the file is not shown. Returns -1
+        past either end.
+        """
+        row = self.row_of(index) if 0 <= index < len(self.paths) else None
+        if row is None:
+            target = index + step
+            return target if 0 <= target < len(self.paths) else -1
+        row += step
+        if not 0 <= row < self.rowCount():
+            return -1
+        return self.file_index(row)
+
+    def set_labeled(self, path, labeled):
+        """Update the status of *path*, touching only its own row."""
+        index = self.path_index.get(path)
+        if index is None or self.labeled[index] == labeled:
+            return
+        self.labeled[index] = labeled
+        if self.filter == "All":
+            row = self.row_of(index)
+            self.dataChanged.emit(
+                self.index(row, 0),
+                self.index(row, len(self.HEADERS) - 1),
+                [Qt.ItemDataRole.ForegroundRole],
+            )
+            return
+        row = self.row_position(index)
+        shown = labeled == (self.filter == "Labeled")
+        if shown:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.visible = np.insert(self.visible, row, index)
+            self.endInsertRows()
+        else:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.visible = np.delete(self.visible, row)
+            self.endRemoveRows()
+
+    def add_files(self, new_paths, labeled_paths):
+        """Insert *new_paths* at their sorted positions.
+
+        Used when a rescan finds files dropped into the folder while the
+        window is open; ``paths`` must already be sorted. In path order
+        each file is inserted as one row; when sorted by a metadata column
+        the order is recomputed instead.
+        """
+        new_paths = sorted(set(new_paths).difference(self.path_index))
+        if not new_paths:
+            return
+        if self.order is not None:
+            self.beginResetModel()
+            for path in new_paths:
+                self.insert_file(path, path in labeled_paths)
+            self.update_order()
+            self.endResetModel()
+            return
+        for path in new_paths:
+            index = bisect.bisect_left(self.paths, path)
+            labeled = path in labeled_paths
+            if self.visible is None:
+                row = index
+            else:
+                row = int(np.searchsorted(self.visible, index))
+                # Files after the new one move down by one
+                self.visible[row:] += 1
+            shown = self.visible is None or labeled == (self.filter == "Labeled")
+            if shown:
+                self.beginInsertRows(QModelIndex(), row, row)
+            self.insert_file(path, labeled)
+            if shown and self.visible is not None:
+                self.visible = np.insert(self.visible, row, index)
+            if shown:
+                self.endInsertRows()
+
+    def insert_file(self, path, labeled):
+        index = bisect.bisect_left(self.paths, path)
+        self.paths.insert(index, path)
+        self.names.insert(index, os.path.basename(path))
+        self.labeled = np.insert(self.labeled, index, labeled)
+        self.durations = np.insert(self.durations, index, np.nan)
+        self.samplerates = np.insert(self.samplerates, index, np.nan)
+        self.channels = np.insert(self.channels, index, np.nan)
+        self.path_index = {path: i for i, path in enumerate(self.paths)}
+
+    def file_index(self, row):
+        return row if self.visible is None else int(self.visible[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.paths) if self.visible is None else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        file_index = self.file_index(index.row())
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return self.names[file_index]
+            if column == 1:
+                return format_duration(self.durations[file_index])
+            if column == 2:
+                return format_samplerate(self.samplerates[file_index])
+            return format_channels(self.channels[file_index])
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.LABELED_COLOR if self.labeled[file_index] else None
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.paths[file_index]
+        if role == Qt.ItemDataRole.TextAlignmentRole and column:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.UserRole:
+            return file_index
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,184 @@
+import logging
+import os
+from PyQt6.QtCore import QThread, pyqtSignal
+from audio_processor.loader import LoadCancelled
+from audio_processor.display_stft import describe_plan, display_spectrogram
+from audio_processor.spectrogram_generator import (
+    get_stft_params,
+    plot_bounds,
+    render_spectrogram_image,
+)
+from audio_processor.waveform import cached_waveform_envelope
+from utils.tracing import span
+
+log = logging.getLogger(__name__)
+
+
+def loaded_audio_nbytes(result):
+    """Approximate memory used by a result emitted by :class:`AudioLoadWorker`."""
+    # The spectrogram holds no matrix, it reads the audio data on demand
+    nbytes = result["audio_data"].nbytes + result["image"].sizeInBytes()
+    waveform = result.get("waveform")
+    if waveform is not None:
+        nbytes += waveform.nbytes
+    return nbytes
+
+
+class AudioLoadWorker(QThread):
+    """Decode an audio file and render its spectrogram off the GUI thread.
+
+    Every worker carries the ``request_id`` it was started with so the
+    window can discard results from loads that were superseded while they
+    were still running.
+
+    Given the *source* of a file that is already open, the worker only
+    switches it to channel *view* and computes the spectrogram and the
+    waveform of that view; the file is not decoded again.
+
+    Signals
+    -------
+    progress(request_id, percent)
+        Emitted while decoding and rendering.
+    loaded(request_id, result)
+        Emitted with a dict holding ``path``, ``audio_data`` (a
+        :class:`audio_processor.sample_source.SampleSource`),
+        ``samplerate``, ``image``, ``bounds``, ``spectrogram`` (a
+        :class:`audio_processor.display_stft.DisplaySpectrogram`),
+        ``stft_plan`` (the STFT parameters chosen for the overview, see
+        :func:`audio_processor.display_stft.plan_columns`) and ``waveform``
+        (a :class:`audio_processor.waveform.WaveformEnvelope`); the last
+        three are None for an empty file. ``view`` is the channel view that
+        was asked for, ``channels`` the number of channels of the file.
+    failed(request_id, message)
+        Emitted when the file cannot be read.
+    """
+
+    progress = pyqtSignal(int, int)
+    loaded = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    # Share of the progress bar reserved for decoding, for the STFT and for
+    # the waveform envelope; the rest covers the spectrogram render.
+    DECODE_SHARE = 45
+    STFT_SHARE = 10
+    WAVEFORM_SHARE = 40
+
+    def __init__(self, request_id, audio_path, view="mean", source=None, parent=None):
+        super().__init__(parent)
+        self.request_id = request_id
+        self.audio_path = audio_path
+        self.view = view
+        self.source = source
+        self._cancelled = False
+
+    def cancel(self):
+        """Ask the worker to stop at the next chunk boundary."""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        # Imported here, off the GUI thread: it needs soundfile
+        from audio_processor.sample_source import open_sample_source
+
+        name = os.path.basename(self.audio_path)
+        audio_data = None
+        emitted = False
+        try:
+            if self.source is not None:
+                audio_data = self.source.with_view(self.view)
+            else:
+                # Lazy source: WAV data is memory-mapped, only compressed
+                # formats are decoded (once, into a cache file)
+                with span("decode", file=name):
+                    audio_data = open_sample_source(
+                        self.audio_path,
+                        self.view,
+                        progress_callback=self._report_decode_progress,
+                        is_cancelled=self.is_cancelled,
+                    )
+            samplerate = audio_data.samplerate
+            if self._cancelled:
+                return
+            params = get_stft_params()
+            spectrogram = overview_db = plan = None
+            waveform = None
+            if len(audio_data):
+                # Only the frames the overview has pixels for are computed;
+                # zoomed tiles compute their own later
+                with span("stft", file=name):
+                    spectrogram, overview_db, plan = display_spectrogram(
+                        audio_data,
+                        plot_bounds()[2],
+                        params,
+                        progress_callback=self._report_stft_progress,
+                        is_cancelled=self.is_cancelled,
+                    )
+                log.info(
+                    "Spectrogram of %s (%s): %s",
+                    name,
+                    audio_data.view_key,
+                    describe_plan(plan),
+                )
+                with span("waveform", file=name):
+                    waveform = cached_waveform_envelope(
+                        self.audio_path,
+                        audio_data,
+                        progress_callback=self._report_waveform_progress,
+                        is_cancelled=self.is_cancelled,
+                    )
+            if self._cancelled:
+                return
+            with span("render_overview", file=name):
+                image, bounds = render_spectrogram_image(
+                    overview_db,
+                    samplerate,
+                    duration=len(audio_data) / samplerate,
+                    n_fft=params["n_fft"],
+                )
+            if self._cancelled:
+                return
+            self.progress.emit(self.request_id, 100)
+            self.loaded.emit(
+                self.request_id,
+                {
+                    "path": self.audio_path,
+                    "audio_data": audio_data,
+                    "samplerate": samplerate,
+                    "image": image,
+                    "bounds": bounds,
+                    "spectrogram": spectrogram,
+                    "stft_plan": plan,
+                    "waveform": waveform,
+                    "view": self.view,
+                    "channels": audio_data.channels,
+                },
+            )
+            emitted = True
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            if not self._cancelled:
+                self.failed.emit(self.request_id, str(e))
+        finally:
+            # A file this worker opened for a load that was cancelled or
+            # failed; the window closes the sources it receives
+            if not emitted and self.source is None and audio_data is not None:
+                audio_data.close()
+
+    def _report_decode_progress(self, read, total):
+        if total:
+            self.progress.emit(self.request_id, int(read / total * self.DECODE_SHARE))
+
+    def _report_stft_progress(self, done, total):
+        if total:
+            share = int(done / total * self.STFT_SHARE)
+            self.progress.emit(self.request_id, self.DECODE_SHARE + share)
+
+    def _report_waveform_progress(self, done, total):
+        if total:
+            share = int(done / total * self.WAVEFORM_SHARE)
+            self.progress.emit(
+                self.request_id, self.DECODE_SHARE + self.STFT_SHARE + share
+            )
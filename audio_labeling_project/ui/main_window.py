@@ -9,30 +9,37 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QSlider,
     QProgressBar,
-    QApplication,
     QMessageBox,
     QTabWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
+    QHeaderView,
+    QMenu,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
     QSplitter,
+    QScrollBar,
 )
-from PyQt6.QtCore import Qt, QTimer, QSize
-from PyQt6.QtGui import QPixmap, QImage, QIcon, QShortcut, QKeySequence, QColor
+from PyQt6.QtCore import Qt, QTimer, QSize, QThread
+from PyQt6.QtGui import QPixmap, QIcon, QShortcut, QKeySequence
+import bisect
+import logging
 import os
-import numpy as np
-import sounddevice as sd
-import soundfile as sf
+import time
 from config import CONFIG
-from audio_processor.cutter import cut_audio_segment
-from audio_processor.spectrogram_generator import (
-    generate_spectrogram_pixmap,
-    draw_playback_line,
-    draw_annotations,
-)
-from utils.file_manager import get_audio_files_in_folder, create_directory_if_not_exists
+from audio_processor.channels import parse_channel_view
+from audio_processor.display_stft import describe_plan
+from audio_processor.playback import PlaybackEngine
+from ui.detect_worker import CandidateDetectWorker
+from ui.export_worker import CutExportWorker
+from ui.file_list_model import FileListModel
+from ui.load_worker import AudioLoadWorker, loaded_audio_nbytes
+from ui.memory_model import ButtonDelegate, MemoryFilterProxyModel, MemoryTableModel
+from ui.scan_worker import FolderScanWorker
+from ui.spectrogram_view import SpectrogramView
+from ui.waveform_view import WaveformView
+from utils.lru_cache import LRUCache
+from utils.tracing import get_tracer, record, span
 from utils.logger import (
     load_labeled_audios_log,
     log_labeled_audio,
@@ -40,7 +47,8 @@ from utils.logger import (
     load_labels_data,
     save_labels_for_audio,
 )
-import json
+
+log = logging.getLogger(__name__)
 
 
 class MainWindow(QMainWindow):
@@ -53,22 +61,42 @@ class MainWindow(QMainWindow):
         self.current_audio_index = -1
         self.current_audio_data = None
         self.current_samplerate = None
-        self.playback_stream = None
-        self.playback_stream_id = 0
+        # Channel view of multi-channel files, kept from one file to the next
+        self.channel_view = parse_channel_view(CONFIG.get("CHANNEL_VIEW", "mean"))
+        self.playback_engine = PlaybackEngine()
+        self.reported_xruns = 0
         self.playback_position = 0
         self.is_playing = False
         self.gain = 1.0
         self.annotations = []  # Stores (start_time, end_time, category)
-        self.base_spectrogram = None
-        self.spectrogram_bounds = None
         self.temp_start_time = None
+        # Detector proposals for the current file, (start_time, end_time, None)
+        self.candidates = []
+        self.candidate_index = None
+        self.detect_workers = []
+        self.load_request_id = 0
+        self.request_counter = 0
+        # When the load of the file on screen started, for the "load" span
+        self.load_started = time.perf_counter()
+        self.load_workers = []
+        self.export_workers = []
+        self.audio_folder = None
+        self.folder_manifest = None
+        self.scan_worker = None
+        self.audio_cache = LRUCache(
+            CONFIG.get("AUDIO_CACHE_MB", 512) * 1024 * 1024,
+            loaded_audio_nbytes,
+            on_evict=lambda result: self.release_source(result["audio_data"]),
+        )
         self.icons_path = os.path.join(os.path.dirname(__file__), "icons")
         self.shortcuts = CONFIG.get("SHORTCUTS", {})
 
         self.init_ui()
         self.labeled_audios = load_labeled_audios_log()
         self.labels_data = load_labels_data()
-        self.refresh_memory_table()
+        # The Memory Manager is filled the first time its tab is opened
+        self.memory_loaded = False
+        self.tabs.currentChanged.connect(self.tab_changed)
         self.refresh_file_list()
 
     def init_ui(self):
@@ -106,6 +134,8 @@ class MainWindow(QMainWindow):
         self.right_panel_layout = QVBoxLayout(self.right_panel_widget)
         # Ensure the annotations panel is wide enough for its columns
         self.right_panel_widget.setMinimumWidth(300)
+        # and the file list for the duration, rate and channel columns
+        self.left_panel_widget.setMinimumWidth(260)
 
         self.main_splitter.addWidget(self.left_panel_widget)
         self.main_splitter.addWidget(self.center_widget)
@@ -134,13 +164,29 @@ class MainWindow(QMainWindow):
         # Memory manager table
         self.memory_search = QLineEdit()
         self.memory_search.setPlaceholderText("Search...")
-        self.memory_search.textChanged.connect(self.refresh_memory_table)
+        # Filter once typing pauses rather than on every keystroke
+        self.memory_search_timer = QTimer(self)
+        self.memory_search_timer.setSingleShot(True)
+        self.memory_search_timer.setInterval(200)
+        self.memory_search_timer.timeout.connect(self.apply_memory_search)
+        self.memory_search.textChanged.connect(self.memory_search_timer.start)
         self.mem_layout.addWidget(self.memory_search)
 
-        self.memory_table = QTableWidget()
-        self.memory_table.setColumnCount(2)
-        self.memory_table.setHorizontalHeaderLabels(["File", ""])
-        self.memory_table.horizontalHeader().setStretchLastSection(True)
+        self.memory_model = MemoryTableModel(self)
+        self.memory_proxy = MemoryFilterProxyModel(self)
+        self.memory_proxy.setSourceModel(self.memory_model)
+        self.memory_table = QTableView()
+        self.memory_table.setModel(self.memory_proxy)
+        self.memory_table.setMouseTracking(True)
+        self.memory_table.verticalHeader().hide()
+        self.memory_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        self.memory_delete_delegate = ButtonDelegate(self.memory_table)
+        self.memory_delete_delegate.clicked.connect(self.memory_delete_clicked)
+        self.memory_table.setItemDelegateForColumn(1, self.memory_delete_delegate)
+        self.memory_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.memory_table.customContextMenuRequested.connect(self.memory_context_menu)
         self.mem_layout.addWidget(self.memory_table)
 
         # Folder selection
@@ -150,13 +196,39 @@ class MainWindow(QMainWindow):
 
         # Side file list with filter
         self.file_filter = QComboBox()
-        self.file_filter.addItems(["All", "Unlabeled", "Labeled"])
-        self.file_filter.currentIndexChanged.connect(self.refresh_file_list)
+        self.file_filter.addItems(FileListModel.FILTERS)
+        self.file_filter.currentIndexChanged.connect(self.apply_file_filter)
         self.left_panel_layout.addWidget(self.file_filter)
 
-        self.file_list = QListWidget()
-        self.file_list.itemClicked.connect(self.file_item_clicked)
+        self.file_list_model = FileListModel(self)
+        # A one-column table rather than a QListView: its header keeps row
+        # geometry in spans, so inserting or removing a row in a folder of
+        # 100k files does not re-layout every item
+        self.file_list = QTableView()
+        self.file_list.setModel(self.file_list_model)
+        # Header metadata columns; sorting is done by the model in NumPy
+        header = self.file_list.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column, sample in ((1, "00:00:00"), (2, "44.1k"), (3, "Ch")):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Fixed)
+            header.resizeSection(
+                column, self.file_list.fontMetrics().horizontalAdvance(sample) + 16
+            )
+        self.file_list.setSortingEnabled(True)
+        self.file_list.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.file_list.verticalHeader().hide()
+        self.file_list.verticalHeader().setDefaultSectionSize(
+            self.file_list.fontMetrics().height() + 6
+        )
+        self.file_list.setShowGrid(False)
+        self.file_list.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.file_list.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.file_list.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.file_list.clicked.connect(self.file_item_clicked)
         self.left_panel_layout.addWidget(self.file_list)
+        self.index_status_label = QLabel("")
+        self.index_status_label.hide()
+        self.left_panel_layout.addWidget(self.index_status_label)
 
         # Top status bar showing current file
         self.status_layout = QHBoxLayout()
@@ -174,10 +246,34 @@ class MainWindow(QMainWindow):
         self.status_layout.addWidget(self.status_icon)
         self.status_layout.addWidget(self.status_label)
         self.status_layout.addStretch()
+        # Last load time and spectrogram frame time, refreshed by perf_timer
+        self.perf_label = QLabel("")
+        self.perf_label.setToolTip(
+            "Load: time from opening the file to showing it.\n"
+            "Frame: time of the last spectrogram repaint."
+        )
+        self.status_layout.addWidget(self.perf_label)
+        self.cache_stats_label = QLabel("")
+        self.status_layout.addWidget(self.cache_stats_label)
+        # Cut exports still being written in the background
+        self.export_progress = QProgressBar()
+        self.export_progress.setFormat("Cuts %v/%m")
+        self.export_progress.setMaximumWidth(160)
+        self.export_progress.hide()
+        self.status_layout.addWidget(self.export_progress)
         self.center_layout.addLayout(self.status_layout)
 
+        self.metadata_layout = QHBoxLayout()
         self.metadata_label = QLabel("")
-        self.center_layout.addWidget(self.metadata_label)
+        self.metadata_layout.addWidget(self.metadata_label)
+        self.metadata_layout.addStretch()
+        # Channel shown, played and cut; only offered for multi-channel files
+        self.channel_selector = QComboBox()
+        self.channel_selector.setToolTip("Channel shown, played and cut")
+        self.channel_selector.activated.connect(self.channel_view_selected)
+        self.channel_selector.hide()
+        self.metadata_layout.addWidget(self.channel_selector)
+        self.center_layout.addLayout(self.metadata_layout)
 
         self.load_progress = QProgressBar()
         self.load_progress.setRange(0, 100)
@@ -185,11 +281,12 @@ class MainWindow(QMainWindow):
         self.center_layout.addWidget(self.load_progress)
 
         # Spectrogram display and annotations table inside a splitter
-        self.spectrogram_label = QLabel("Spectrogram will appear here.")
-        self.spectrogram_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.spectrogram_label.setMouseTracking(True)  # Enable mouse tracking
-        self.spectrogram_label.mousePressEvent = self.spectrogram_mouse_press
-        self.spectrogram_label.mouseReleaseEvent = self.spectrogram_mouse_release
+        self.spectrogram_view = SpectrogramView()
+        self.spectrogram_view.setMouseTracking(True)  # Enable mouse tracking
+        self.spectrogram_view.mousePressEvent = self.spectrogram_mouse_press
+        self.spectrogram_view.mouseReleaseEvent = self.spectrogram_mouse_release
+        self.spectrogram_view.view_changed.connect(self.sync_spectrogram_scrollbar)
+        self.spectrogram_view.view_changed.connect(self.update_stft_readout)
 
         self.annotations_table = QTableWidget()
         self.annotations_table.setColumnCount(3)
@@ -197,7 +294,28 @@ class MainWindow(QMainWindow):
         self.annotations_table.horizontalHeader().setStretchLastSection(True)
 
         self.right_panel_layout.addWidget(self.annotations_table)
-        self.center_layout.addWidget(self.spectrogram_label)
+        self.center_layout.addWidget(self.spectrogram_view)
+        # Min/max waveform of the same time window, to spot drumming
+        self.waveform_view = WaveformView(self.spectrogram_view)
+        self.center_layout.addWidget(self.waveform_view)
+
+        # Zoom (Ctrl + wheel) and horizontal scrolling of the spectrogram
+        self.zoom_layout = QHBoxLayout()
+        self.zoom_out_button = QPushButton("-")
+        self.zoom_out_button.setFixedWidth(30)
+        self.zoom_out_button.clicked.connect(lambda: self.spectrogram_view.zoom_out())
+        self.zoom_layout.addWidget(self.zoom_out_button)
+        self.zoom_in_button = QPushButton("+")
+        self.zoom_in_button.setFixedWidth(30)
+        self.zoom_in_button.clicked.connect(lambda: self.spectrogram_view.zoom_in())
+        self.zoom_layout.addWidget(self.zoom_in_button)
+        self.spectrogram_scrollbar = QScrollBar(Qt.Orientation.Horizontal)
+        self.spectrogram_scrollbar.setRange(0, 0)
+        self.spectrogram_scrollbar.valueChanged.connect(
+            self.spectrogram_view.set_first_column
+        )
+        self.zoom_layout.addWidget(self.spectrogram_scrollbar)
+        self.center_layout.addLayout(self.zoom_layout)
 
         # Playback controls
         self.playback_layout = QHBoxLayout()
@@ -255,6 +373,12 @@ class MainWindow(QMainWindow):
         )
         self.clear_labels_button.clicked.connect(self.clear_labels)
         self.labeling_layout.addWidget(self.clear_labels_button)
+
+        self.detect_button = QPushButton(
+            f"Detect ({self.shortcuts.get('detect_candidates', '')})"
+        )
+        self.detect_button.clicked.connect(self.start_candidate_detection)
+        self.labeling_layout.addWidget(self.detect_button)
         self.center_layout.addLayout(self.labeling_layout)
 
         # Navigation buttons
@@ -274,10 +398,20 @@ class MainWindow(QMainWindow):
         self.nav_layout.addWidget(self.next_button)
         self.center_layout.addLayout(self.nav_layout)
 
+        # Picks up files dropped into the folder while the window is open
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.timeout.connect(self.start_folder_scan)
+
+        # Only runs while playing; other position changes repaint directly
         self.update_timer = QTimer(self)
         self.update_timer.setInterval(50)  # Update every 50ms
         self.update_timer.timeout.connect(self.update_playback_line)
-        self.update_timer.start()
+
+        self.perf_timer = QTimer(self)
+        self.perf_timer.setInterval(500)
+        self.perf_timer.timeout.connect(self.update_perf_readout)
+        self.perf_timer.start()
 
         # Keyboard shortcuts
         if sc := self.shortcuts.get("play_pause"):
@@ -292,6 +426,16 @@ class MainWindow(QMainWindow):
             QShortcut(QKeySequence(sc), self, activated=self.clear_labels)
         if sc := self.shortcuts.get("save_labels"):
             QShortcut(QKeySequence(sc), self, activated=self.save_labels_and_cut)
+        if sc := self.shortcuts.get("detect_candidates"):
+            QShortcut(QKeySequence(sc), self, activated=self.start_candidate_detection)
+        if sc := self.shortcuts.get("next_candidate"):
+            QShortcut(QKeySequence(sc), self, activated=lambda: self.jump_to_candidate(1))
+        if sc := self.shortcuts.get("previous_candidate"):
+            QShortcut(
+                QKeySequence(sc), self, activated=lambda: self.jump_to_candidate(-1)
+            )
+        if sc := self.shortcuts.get("accept_candidate"):
+            QShortcut(QKeySequence(sc), self, activated=self.accept_candidate)
 
     def select_audio_folder(self):
         default_dir = r"D:\Dept. Investigación media\Noches Chimps\Proyectos\DATASET AUDIOS CHIMPS"
@@ -299,134 +443,441 @@ class MainWindow(QMainWindow):
             self, "Select Audio Folder", default_dir
         )
         if folder_path:
-            self.audio_files = get_audio_files_in_folder(
-                folder_path, CONFIG["AUDIO_EXTENSIONS"]
+            self.audio_folder = folder_path
+            self.folder_manifest = None
+            self.rescan_timer.stop()
+            self.status_label.setText(f"Scanning {folder_path}...")
+            self.start_folder_scan()
+
+    def start_folder_scan(self):
+        if self.scan_worker is not None or self.audio_folder is None:
+            return
+        worker = FolderScanWorker(self.audio_folder, self.folder_manifest, self)
+        worker.scanned.connect(self.folder_scanned)
+        worker.indexed.connect(self.folder_indexed)
+        worker.manifest_ready.connect(self.folder_manifest_ready)
+        worker.failed.connect(self.folder_scan_failed)
+        worker.finished.connect(self.folder_scan_finished)
+        self.scan_worker = worker
+        worker.start()
+
+    def folder_scan_finished(self):
+        worker = self.sender()
+        if worker is self.scan_worker:
+            self.scan_worker = None
+        worker.deleteLater()
+        self.index_status_label.hide()
+        # A folder picked while the previous scan was running
+        if worker.folder_path != self.audio_folder:
+            self.start_folder_scan()
+            return
+        interval = CONFIG.get("RESCAN_INTERVAL_SECONDS", 30)
+        if interval and self.folder_manifest is not None:
+            self.rescan_timer.start(int(interval * 1000))
+
+    def folder_scan_failed(self, folder_path, message):
+        if folder_path == self.audio_folder:
+            self.status_label.setText(f"Could not scan {folder_path}: {message}")
+
+    def folder_scanned(self, folder_path, paths, infos):
+        if folder_path != self.audio_folder:
+            return  # Superseded by another folder
+        if self.folder_manifest is not None:
+            self.add_new_audio_files(paths)
+            return
+
+        self.audio_files = paths
+        # Headers indexed in an earlier session show up right away
+        self.file_list_model.set_files(self.audio_files, self.labeled_audios, infos)
+
+        if not self.audio_files:
+            self.status_label.setText(
+                "No supported audio files found in selected folder."
             )
-            self.refresh_file_list()
+            return
 
-            if not self.audio_files:
-                self.status_label.setText(
-                    "No supported audio files found in selected folder."
-                )
-                return
+        self.current_audio_index = -1
+        self.load_next_audio()  # Load the first audio
+
+    def folder_manifest_ready(self, folder_path, manifest):
+        if folder_path == self.audio_folder:
+            self.folder_manifest = manifest
 
-            self.current_audio_index = -1
-            self.load_next_audio()  # Load the first audio
+    def folder_indexed(self, folder_path, infos, done, total):
+        if folder_path != self.audio_folder:
+            return
+        self.file_list_model.set_info(infos)
+        self.index_status_label.setText(f"Reading headers: {done}/{total}")
+        self.index_status_label.setVisible(done < total)
+
+    def add_new_audio_files(self, paths):
+        """Merge files that appeared in the folder since the last scan."""
+        known = set(self.audio_files)
+        new_paths = [path for path in paths if path not in known]
+        if not new_paths:
+            return
+        current = None
+        if 0 <= self.current_audio_index < len(self.audio_files):
+            current = self.audio_files[self.current_audio_index]
+        self.audio_files = sorted(self.audio_files + new_paths)
+        if current is not None:
+            self.current_audio_index = self.audio_files.index(current)
+        self.file_list_model.add_files(new_paths, self.labeled_audios)
+        self.status_label.setText(f"{len(new_paths)} new audio file(s) found.")
 
     def load_audio(self, index):
         if not (0 <= index < len(self.audio_files)):
             return
 
         audio_path = self.audio_files[index]
+        self.load_started = time.perf_counter()
+        self.stop_playback()
+        self.current_audio_index = index
+        self.current_audio_data = None
+        self.current_samplerate = None
+        self.annotations = []
+        self.refresh_annotations_table()
+        self.set_candidates([])
+        # Supersede whatever is still loading; its result will be ignored.
+        self.cancel_stale_loads()
+        for worker in self.detect_workers:
+            worker.cancel()
+
+        cached = self.audio_cache.get((audio_path, self.channel_view))
+        self.update_cache_stats()
+        if cached is not None:
+            self.load_request_id = self.next_request_id()
+            self.audio_loaded(self.load_request_id, cached)
+            return
+
+        self.channel_selector.hide()
+        self.spectrogram_view.set_message("Loading spectrogram...")
+        self.waveform_view.set_envelope(None)
         self.status_label.setText(f"Loading: {os.path.basename(audio_path)}")
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+
+        # A prefetch of this file may already be running: adopt it instead
+        # of decoding the same file twice.
+        worker = self.find_load_worker(audio_path)
+        if worker is None:
+            worker = self.start_load_worker(audio_path)
+        self.load_request_id = worker.request_id
+
+    def next_request_id(self):
+        self.request_counter += 1
+        return self.request_counter
+
+    def start_load_worker(
+        self, audio_path, priority=QThread.Priority.InheritPriority, source=None
+    ):
+        worker = AudioLoadWorker(
+            self.next_request_id(), audio_path, self.channel_view, source, self
+        )
+        worker.progress.connect(self.audio_load_progress)
+        worker.loaded.connect(self.audio_loaded)
+        worker.failed.connect(self.audio_load_failed)
+        worker.finished.connect(lambda w=worker: self.forget_load_worker(w))
+        self.load_workers.append(worker)
+        worker.start(priority)
+        return worker
+
+    def find_load_worker(self, audio_path):
+        for worker in self.load_workers:
+            if (
+                worker.audio_path == audio_path
+                and worker.view == self.channel_view
+                and not worker.is_cancelled()
+            ):
+                return worker
+        return None
+
+    def prefetch_paths(self):
+        """Return the neighbouring files that should be decoded ahead."""
+        index = self.current_audio_index
+        if index < 0:
+            return []
+        model = self.file_list_model
+        steps = list(range(1, 1 + CONFIG.get("PREFETCH_NEXT", 1)))
+        if CONFIG.get("PREFETCH_PREVIOUS", True):
+            steps.append(-1)
+        indices = [model.neighbour(index, step) for step in steps]
+        return [self.audio_files[i] for i in indices if 0 <= i < len(self.audio_files)]
+
+    def schedule_prefetch(self):
+        for audio_path in self.prefetch_paths():
+            if (audio_path, self.channel_view) in self.audio_cache:
+                continue
+            if self.find_load_worker(audio_path):
+                continue
+            self.start_load_worker(audio_path, QThread.Priority.LowPriority)
+
+    def cancel_stale_loads(self):
+        """Cancel loads that are neither the current file nor a neighbour,
+        or that are for another channel view."""
+        wanted = set(self.prefetch_paths())
+        if 0 <= self.current_audio_index < len(self.audio_files):
+            wanted.add(self.audio_files[self.current_audio_index])
+        for worker in self.load_workers:
+            if worker.audio_path not in wanted or worker.view != self.channel_view:
+                worker.cancel()
+
+    def cancel_pending_loads(self):
+        for worker in self.load_workers:
+            worker.cancel()
+
+    def forget_load_worker(self, worker):
+        if worker in self.load_workers:
+            self.load_workers.remove(worker)
+        worker.deleteLater()
+
+    def update_perf_readout(self):
+        tracer = get_tracer()
+        parts = []
+        load = tracer.last_duration("load")
+        if load is not None:
+            parts.append(f"Load {load:.2f} s")
+        frame = tracer.last_duration("paint")
+        if frame is not None:
+            parts.append(f"Frame {frame * 1000:.1f} ms")
+        text = " | ".join(parts)
+        if text != self.perf_label.text():
+            self.perf_label.setText(text)
+
+    def update_stft_readout(self):
+        """Show the STFT parameters chosen for the current view as a tooltip."""
+        plan = self.spectrogram_view.display_plan()
+        self.metadata_label.setToolTip(
+            "" if plan is None else f"Spectrogram: {describe_plan(plan)}"
+        )
+
+    def update_cache_stats(self):
+        stats = self.audio_cache.stats()
+        self.cache_stats_label.setText(
+            f"Cache: {stats['hits']} hits / {stats['misses']} misses | "
+            f"{stats['entries']} files, {stats['bytes'] / (1024 * 1024):.0f} MB"
+        )
+
+    def is_current_load(self, request_id, audio_path=None):
+        """Return True if *request_id* is the load for the file on screen."""
+        if request_id != self.load_request_id:
+            return False
+        if not (0 <= self.current_audio_index < len(self.audio_files)):
+            return False
+        return audio_path is None or (
+            self.audio_files[self.current_audio_index] == audio_path
+        )
+
+    def audio_load_progress(self, request_id, percent):
+        if self.is_current_load(request_id):
+            self.load_progress.setValue(percent)
+
+    def audio_loaded(self, request_id, result):
+        audio_path = result["path"]
+        # Every channel view of a file has its own spectrogram and waveform
+        self.audio_cache.put((audio_path, result["view"]), result)
+        self.update_cache_stats()
+        if not self.is_current_load(request_id, audio_path):
+            return
 
-        try:
-            with sf.SoundFile(audio_path) as f:
-                self.current_samplerate = f.samplerate
-                frames = f.frames
-                self.current_audio_data = np.empty(frames, dtype="float32")
-                block = 65536
-                read = 0
-                self.load_progress.show()
-                while read < frames:
-                    chunk = f.read(min(block, frames - read), dtype="float32")
-                    if chunk.ndim > 1:
-                        chunk = chunk[:, 0]
-                    length = len(chunk)
-                    self.current_audio_data[read : read + length] = chunk
-                    read += length
-                    self.load_progress.setValue(int((read / frames) * 100))
-                    QApplication.processEvents()
-                self.load_progress.hide()
-            self.current_audio_index = index
+        shown = time.perf_counter()
+        self.load_progress.hide()
+        # Another channel view of the file on screen: keep the position,
+        # the playback state, the zoom and the unsaved annotations
+        switching_view = self.current_audio_data is not None
+        self.current_audio_data = result["audio_data"]
+        self.current_samplerate = result["samplerate"]
+        self.update_channel_selector(result["channels"])
+        previous = self.playback_engine.source
+        self.playback_engine.set_source(self.current_audio_data)
+        if previous is not None:
+            self.release_source(previous)
+        if switching_view:
+            self.playback_engine.seek(self.playback_position)
+            if self.is_playing:
+                self.playback_engine.play()
+        else:
             self.playback_position = 0
-            self.position_slider.setRange(0, len(self.current_audio_data) - 1)
+            self.position_slider.setRange(0, max(0, len(self.current_audio_data) - 1))
             self.position_slider.setValue(0)
-            duration = len(self.current_audio_data) / self.current_samplerate
-            size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-            self.metadata_label.setText(
-                f"{self.current_samplerate} Hz | {duration:.2f}s | {size_mb:.2f} MB"
-            )
-            (
-                self.base_spectrogram,
-                self.spectrogram_bounds,
-            ) = generate_spectrogram_pixmap(
-                self.current_audio_data, self.current_samplerate
+        duration = len(self.current_audio_data) / self.current_samplerate
+        size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+        self.metadata_label.setText(
+            f"{self.current_samplerate} Hz | {duration:.2f}s | {size_mb:.2f} MB"
+        )
+        image = result["image"]
+        if image.isNull():
+            self.spectrogram_view.set_message("No audio data to display spectrogram.")
+        else:
+            self.spectrogram_view.set_spectrogram(
+                QPixmap.fromImage(image),
+                result["bounds"],
+                result["spectrogram"],
+                self.current_samplerate,
+                duration,
+                keep_zoom=switching_view,
             )
-            data = self.labels_data.get(audio_path, {})
-            if isinstance(data, dict):
-                self.annotations = data.get("annotations", [])
-            else:
-                self.annotations = data
-            self.refresh_annotations_table()
+        self.update_stft_readout()
+        self.waveform_view.set_envelope(result.get("waveform"))
+        if switching_view:
             self.update_spectrogram()
-            self.stop_playback()
-            self.status_label.setText(f"Loaded: {os.path.basename(audio_path)}")
-            self.check_if_labeled(audio_path)
-        except Exception as e:
+            self.show_candidates(audio_path)
             self.status_label.setText(
-                f"Error loading {os.path.basename(audio_path)}: {e}"
+                f"Showing {self.channel_selector.currentText().lower()} "
+                f"of {os.path.basename(audio_path)}"
+            )
+            record(
+                "switch_view",
+                self.load_started,
+                time.perf_counter(),
+                file=os.path.basename(audio_path),
             )
-            self.current_audio_data = None
-            self.current_samplerate = None
-            self.base_spectrogram = None
+            return
+        data = self.labels_data.get(audio_path, {})
+        if isinstance(data, dict):
+            self.annotations = data.get("annotations", [])
+        else:
+            self.annotations = data
+        self.refresh_annotations_table()
+        self.update_spectrogram()
+        self.status_label.setText(f"Loaded: {os.path.basename(audio_path)}")
+        self.check_if_labeled(audio_path)
+        self.show_candidates(audio_path)
+        self.schedule_prefetch()
+        done = time.perf_counter()
+        name = os.path.basename(audio_path)
+        record("show_audio", shown, done, file=name)
+        record("load", self.load_started, done, file=name)
+        self.update_perf_readout()
+
+    def show_candidates(self, audio_path):
+        """Show the cached candidates of the channel view on screen, or
+        detect them when ``DETECT_ON_LOAD`` is set."""
+        # The audio modules need soundfile, left out of startup
+        from audio_processor.detector import load_cached_candidates
+
+        candidates = load_cached_candidates(
+            audio_path, view_key=self.current_audio_data.view_key
+        )
+        self.set_candidates(candidates or [])
+        if candidates is None and CONFIG.get("DETECT_ON_LOAD", True):
+            self.start_candidate_detection()
+
+    def release_source(self, source):
+        """Close the file behind *source* unless something still reads it.
+
+        Views of one recording share their file, so it stays open while the
+        file on screen, the playback, another cached view, a cut export or
+        a channel switch uses it. Open handles would otherwise pile up and,
+        on Windows, keep the recordings from being renamed or deleted.
+        """
+        users = [self.current_audio_data, self.playback_engine.source]
+        users += [result["audio_data"] for result in self.audio_cache.values()]
+        users += [worker.audio_data for worker in self.export_workers]
+        users += [worker.source for worker in self.load_workers]
+        users += [worker.source for worker in self.detect_workers]
+        storage = source.storage
+        if any(user is not None and user.storage is storage for user in users):
+            return
+        source.close()
+
+    def update_channel_selector(self, channels):
+        """List the channel views of a file with *channels* channels."""
+        selector = self.channel_selector
+        selector.clear()
+        if channels < 2:
+            selector.hide()
+            return
+        selector.addItem("Mix (mean)", "mean")
+        selector.addItem("Loudest channel", "max_energy")
+        for channel in range(channels):
+            selector.addItem(f"Channel {channel + 1}", channel)
+        index = selector.findData(self.channel_view)
+        # A channel this file does not have is shown as the mix
+        selector.setCurrentIndex(max(0, index))
+        selector.show()
+
+    def channel_view_selected(self, index):
+        view = self.channel_selector.itemData(index)
+        if view == self.channel_view or self.current_audio_data is None:
+            return
+        self.channel_view = view
+        self.switch_channel_view()
+
+    def switch_channel_view(self):
+        """Show, play and cut the current file in :attr:`channel_view`.
+
+        The samples already open are reused; only the spectrogram and the
+        waveform of the view are computed, unless they are cached.
+        """
+        audio_path = self.audio_files[self.current_audio_index]
+        self.load_started = time.perf_counter()
+        self.cancel_stale_loads()
+        for worker in self.detect_workers:
+            worker.cancel()
+        cached = self.audio_cache.get((audio_path, self.channel_view))
+        self.update_cache_stats()
+        if cached is not None:
+            self.load_request_id = self.next_request_id()
+            self.audio_loaded(self.load_request_id, cached)
+            return
+        self.status_label.setText(f"Switching channel: {os.path.basename(audio_path)}")
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        worker = self.start_load_worker(audio_path, source=self.current_audio_data)
+        self.load_request_id = worker.request_id
+
+    def audio_load_failed(self, request_id, message):
+        if not self.is_current_load(request_id):
+            return
+        self.load_progress.hide()
+        audio_path = self.audio_files[self.current_audio_index]
+        self.status_label.setText(
+            f"Error loading {os.path.basename(audio_path)}: {message}"
+        )
+        self.spectrogram_view.set_message("No audio data to display spectrogram.")
+        self.current_audio_data = None
+        self.current_samplerate = None
 
     def load_next_audio(self):
-        self.load_audio(self.current_audio_index + 1)
+        # Follows the side list, so its sort and filter decide what comes next
+        if self.current_audio_index < 0:
+            if self.file_list_model.rowCount():
+                self.load_audio(self.file_list_model.file_index(0))
+            return
+        self.load_audio(self.file_list_model.neighbour(self.current_audio_index, 1))
 
     def load_previous_audio(self):
-        self.load_audio(self.current_audio_index - 1)
+        self.load_audio(self.file_list_model.neighbour(self.current_audio_index, -1))
 
     def update_spectrogram(self):
         if self.current_audio_data is None:
-            self.spectrogram_label.setText("No audio data to display spectrogram.")
+            self.spectrogram_view.set_message("No audio data to display spectrogram.")
             return
 
-        if self.base_spectrogram is None:
-            (
-                self.base_spectrogram,
-                self.spectrogram_bounds,
-            ) = generate_spectrogram_pixmap(
-                self.current_audio_data, self.current_samplerate
-            )
-
-        pixmap = draw_annotations(
-            self.base_spectrogram,
-            self.annotations,
-            len(self.current_audio_data),
-            self.current_samplerate,
-            self.spectrogram_bounds,
-        )
-        pixmap = draw_playback_line(
-            pixmap,
-            self.playback_position,
-            len(self.current_audio_data),
-            self.spectrogram_bounds,
-        )
-        self.spectrogram_label.setPixmap(pixmap)
+        self.spectrogram_view.set_annotations(self.annotations)
+        self.update_playback_line()
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Left and self.current_audio_data is not None:
-            if self.is_playing:
-                self.stop_playback()
             step = int(self.current_samplerate)
-            self.playback_position = max(0, self.playback_position - step)
-            self.position_slider.setValue(self.playback_position)
-            self.update_playback_line()
+            position = max(0, self.playback_position - step)
+            self.position_slider.setValue(position)
+            self.set_playback_position(position)
         elif event.key() == Qt.Key.Key_Right and self.current_audio_data is not None:
-            if self.is_playing:
-                self.stop_playback()
             step = int(self.current_samplerate)
-            self.playback_position = min(
+            position = min(
                 len(self.current_audio_data) - 1, self.playback_position + step
             )
-            self.position_slider.setValue(self.playback_position)
-            self.update_playback_line()
+            self.position_slider.setValue(position)
+            self.set_playback_position(position)
         elif event.key() == Qt.Key.Key_Up:
             self.gain = min(2.0, self.gain + 0.1)
+            self.playback_engine.set_gain(self.gain)
             self.status_label.setText(f"Gain: {self.gain:.1f}")
         elif event.key() == Qt.Key.Key_Down:
             self.gain = max(0.0, self.gain - 0.1)
+            self.playback_engine.set_gain(self.gain)
             self.status_label.setText(f"Gain: {self.gain:.1f}")
         else:
             super().keyPressEvent(event)
@@ -451,109 +902,81 @@ class MainWindow(QMainWindow):
             QIcon(os.path.join(self.icons_path, "pause.svg"))
         )
         self.is_playing = True
+        self.update_timer.start()
 
         # Ensure playback starts from current position
         start_frame = self.playback_position
-        remaining_frames = len(self.current_audio_data) - start_frame
-
-        if remaining_frames <= 0:
+        if start_frame >= len(self.current_audio_data) - 1:
             self.playback_position = 0
             start_frame = 0
-            remaining_frames = len(self.current_audio_data)
-
-        self.playback_stream_id += 1
-        current_id = self.playback_stream_id
-        self.playback_stream = sd.OutputStream(
-            samplerate=self.current_samplerate,
-            channels=1,
-            callback=self.audio_callback,
-            finished_callback=lambda: self.playback_finished(current_id),
-        )
-        self.playback_stream.start()
+
+        self.playback_engine.set_gain(self.gain)
+        self.playback_engine.play(start_frame)
 
     def stop_playback(self, reset_position: bool = False):
-        if self.playback_stream:
-            # Increment the stream id so any pending finished callbacks are ignored
-            self.playback_stream_id += 1
-            stream = self.playback_stream
-            self.playback_stream = None
-            try:
-                stream.stop()
-            except Exception:
-                pass
-            try:
-                stream.close()
-            except Exception:
-                pass
+        if self.playback_engine.is_active():
+            self.playback_engine.pause()
+            self.playback_position = min(
+                self.playback_engine.current_position(),
+                max(0, len(self.current_audio_data) - 1),
+            )
+            self.position_slider.setValue(self.playback_position)
         self.play_pause_button.setText(f"Play ({self.shortcuts.get('play_pause', '')})")
         self.play_pause_button.setIcon(QIcon(os.path.join(self.icons_path, "play.svg")))
         self.is_playing = False
+        self.update_timer.stop()
         if reset_position:
             self.playback_position = 0
             self.position_slider.setValue(0)
-            self.update_playback_line()
-
-    def audio_callback(self, outdata, frames, time, status):
-        if status:
-            print(status)
-
-        chunk_end = self.playback_position + frames
-        if chunk_end > len(self.current_audio_data):
-            # Pad with zeros if we're at the end of the audio
-            frames_to_copy = len(self.current_audio_data) - self.playback_position
-            outdata[:frames_to_copy, 0] = (
-                self.current_audio_data[self.playback_position : chunk_end] * self.gain
-            )
-            outdata[frames_to_copy:, 0] = 0.0
-            raise sd.CallbackStop  # Stop playback
-        else:
-            outdata[:, 0] = (
-                self.current_audio_data[self.playback_position : chunk_end] * self.gain
-            )
-
-        self.playback_position += frames
-        self.position_slider.setValue(self.playback_position)
+        self.update_playback_line()
 
-    def playback_finished(self, finished_id):
-        if finished_id != self.playback_stream_id:
-            return
-        if not self.is_playing:
+    def poll_playback_engine(self):
+        """Pick up the position and state published by the audio thread."""
+        engine = self.playback_engine
+        xruns = engine.xruns + engine.underruns
+        if xruns != self.reported_xruns:
+            log.warning(
+                "Audio output underflow: %d device xrun(s), %d buffer underrun(s)",
+                engine.xruns,
+                engine.underruns,
+            )
+            self.reported_xruns = xruns
+        if engine.finished:
+            self.stop_playback(reset_position=True)
             return
-        self.stop_playback(reset_position=True)
+        self.playback_position = engine.current_position()
+        self.position_slider.setValue(self.playback_position)
 
     def set_playback_position(self, value):
         self.playback_position = value
         if self.is_playing:
-            self.stop_playback()
-            self.start_playback()
+            # The stream keeps running; the jump happens on the next callback
+            self.playback_engine.seek(value)
         self.update_playback_line()
 
     def update_playback_line(self):
         if self.current_audio_data is None:
             return
+        with span("update_playback_line"):
+            if self.is_playing:
+                self.poll_playback_engine()
 
-        if self.base_spectrogram is None:
-            (
-                self.base_spectrogram,
-                self.spectrogram_bounds,
-            ) = generate_spectrogram_pixmap(
-                self.current_audio_data, self.current_samplerate
-            )
-
-        pixmap = draw_annotations(
-            self.base_spectrogram,
-            self.annotations,
-            len(self.current_audio_data),
-            self.current_samplerate,
-            self.spectrogram_bounds,
-        )
-        pixmap = draw_playback_line(
-            pixmap,
-            self.playback_position,
-            len(self.current_audio_data),
-            self.spectrogram_bounds,
-        )
-        self.spectrogram_label.setPixmap(pixmap)
+            playback_time = self.playback_position / self.current_samplerate
+            if self.is_playing:
+                self.spectrogram_view.ensure_time_visible(playback_time)
+            self.spectrogram_view.set_playback_time(playback_time)
+
+    def sync_spectrogram_scrollbar(self):
+        view = self.spectrogram_view
+        self.spectrogram_scrollbar.blockSignals(True)
+        if view.has_spectrogram():
+            self.spectrogram_scrollbar.setRange(0, int(view.max_first_column()))
+            self.spectrogram_scrollbar.setPageStep(view.base_width())
+            self.spectrogram_scrollbar.setSingleStep(max(1, view.base_width() // 10))
+            self.spectrogram_scrollbar.setValue(int(view.first_column))
+        else:
+            self.spectrogram_scrollbar.setRange(0, 0)
+        self.spectrogram_scrollbar.blockSignals(False)
 
     def mark_start(self):
         if self.current_audio_data is None:
@@ -580,43 +1003,194 @@ class MainWindow(QMainWindow):
             self.status_label.setText("No annotations to save.")
             return
 
-        current_audio_filename = os.path.basename(
-            self.audio_files[self.current_audio_index]
-        )
-        base_name, _ = os.path.splitext(current_audio_filename)
-        # Carpeta de salida fija
-        output_dir = r"D:\Dept. Investigación media\Noches Chimps\Proyectos\DATASET AUDIOS CHIMPS\labeled_cuts"
-        create_directory_if_not_exists(output_dir)
-
-        cut_files = []
-        for i, (start_time, end_time, category) in enumerate(self.annotations):
-            category_dir = os.path.join(output_dir, category)
-            create_directory_if_not_exists(category_dir)
-
-            output_path = os.path.join(
-                category_dir, f"{base_name}_cut_{i}_{category}.wav"
-            )
-            cut_audio_segment(
+        from audio_processor.cutter import cut_output_path
+
+        with span("save_labels_and_cut", annotations=len(self.annotations)):
+            audio_path = self.audio_files[self.current_audio_index]
+            current_audio_filename = os.path.basename(audio_path)
+            # Carpeta de salida fija
+            output_dir = CONFIG["CUT_OUTPUT_DIR"]
+
+            cuts = []
+            for i, (start_time, end_time, category) in enumerate(self.annotations):
+                output_path = cut_output_path(output_dir, audio_path, i, category)
+                cuts.append((start_time, end_time, output_path))
+
+            # Cuts are written in the background; labels.json is only updated
+            # once the whole batch is done (see cut_export_finished)
+            worker = CutExportWorker(
+                audio_path,
                 self.current_audio_data,
                 self.current_samplerate,
-                start_time,
-                end_time,
-                output_path,
+                self.annotations,
+                cuts,
+                self,
             )
-            cut_files.append(output_path)
-            self.status_label.setText(f"Saved cut to: {output_path}")
+            worker.progress.connect(self.update_export_progress)
+            worker.exported.connect(self.cut_export_finished)
+            self.export_workers.append(worker)
+            worker.start()
+            self.update_export_progress()
 
-        audio_path = self.audio_files[self.current_audio_index]
-        save_labels_for_audio(audio_path, self.annotations, self.labels_data, cut_files)
+            self.annotations = []  # Clear annotations after saving
+            self.refresh_annotations_table()
+            self.update_spectrogram()
+            self.status_label.setText(
+                f"Writing {len(cuts)} cuts for '{current_audio_filename}'..."
+            )
+
+    def update_export_progress(self, *_):
+        """Show the combined progress of every running cut export."""
+        total = sum(worker.total for worker in self.export_workers)
+        if not total:
+            self.export_progress.hide()
+            return
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(
+            sum(worker.done for worker in self.export_workers)
+        )
+        self.export_progress.show()
+
+    def cut_export_finished(self, result):
+        worker = self.sender()
+        if worker in self.export_workers:
+            self.export_workers.remove(worker)
+            worker.deleteLater()
+            self.release_source(worker.audio_data)
+        self.update_export_progress()
+
+        audio_path = result["audio_path"]
+        filename = os.path.basename(audio_path)
+        errors = result["errors"]
+        for output_path, message in errors:
+            log.error("Could not write cut %s: %s", output_path, message)
+        if not result["cut_files"]:
+            # The annotations were cleared when the export started; save them
+            # without cuts (keeping any an earlier save recorded) and put them
+            # back on screen if the file is still shown, so they can be retried
+            save_labels_for_audio(audio_path, result["annotations"], self.labels_data)
+            if (
+                0 <= self.current_audio_index < len(self.audio_files)
+                and self.audio_files[self.current_audio_index] == audio_path
+                and self.current_audio_data is not None
+            ):
+                self.annotations = result["annotations"] + self.annotations
+                self.refresh_annotations_table()
+                self.update_spectrogram()
+            self.status_label.setText(f"No cuts could be saved for '{filename}'.")
+            self.show_popup(f"Could not save the cuts of {filename}")
+            return
+
+        save_labels_for_audio(
+            audio_path, result["annotations"], self.labels_data, result["cut_files"]
+        )
         log_labeled_audio(audio_path, self.labeled_audios)
-        self.refresh_memory_table()
-        self.refresh_file_list()
-        self.annotations = []  # Clear annotations after saving
+        if self.memory_loaded:
+            self.memory_model.add_path(audio_path)
+        self.file_list_model.set_labeled(audio_path, True)
+        if errors:
+            self.status_label.setText(
+                f"Audio '{filename}' labeled; {len(errors)} of "
+                f"{len(errors) + len(result['cut_files'])} cuts failed (see log)."
+            )
+            self.show_popup(f"{len(errors)} cuts of {filename} could not be saved")
+        else:
+            self.status_label.setText(f"Audio '{filename}' labeled and cuts saved.")
+
+    def start_candidate_detection(self):
+        """Run the candidate detector on the current file in the background."""
+        if self.current_audio_data is None:
+            return
+        audio_path = self.audio_files[self.current_audio_index]
+        source = self.current_audio_data
+        if any(
+            w.audio_path == audio_path
+            and w.source.view_key == source.view_key
+            and not w.is_cancelled()
+            for w in self.detect_workers
+        ):
+            return
+        worker = CandidateDetectWorker(audio_path, source, self)
+        worker.detected.connect(self.candidates_detected)
+        worker.failed.connect(self.candidate_detection_failed)
+        worker.finished.connect(lambda w=worker: self.forget_detect_worker(w))
+        self.detect_workers.append(worker)
+        # Reading the file for playback and the spectrogram comes first
+        worker.start(QThread.Priority.LowPriority)
+
+    def forget_detect_worker(self, worker):
+        if worker in self.detect_workers:
+            self.detect_workers.remove(worker)
+        worker.deleteLater()
+
+    def candidates_detected(self, result):
+        audio_path = result["audio_path"]
+        if not (0 <= self.current_audio_index < len(self.audio_files)):
+            return
+        if self.audio_files[self.current_audio_index] != audio_path:
+            return
+        # Found in a channel view that is no longer shown
+        if self.current_audio_data is None:
+            return
+        if result["view_key"] != self.current_audio_data.view_key:
+            return
+        self.set_candidates(result["candidates"])
+        message = f"{len(self.candidates)} candidate segment(s) detected"
+        if result["speed"]:
+            message += (
+                f" in {result['elapsed']:.1f}s ({result['speed']:.0f}x real time)"
+            )
+        self.status_label.setText(message + ".")
+
+    def candidate_detection_failed(self, audio_path, message):
+        log.error("Candidate detection failed for %s: %s", audio_path, message)
+
+    def set_candidates(self, candidates):
+        self.candidates = list(candidates)
+        self.candidate_index = None
+        self.spectrogram_view.set_candidates(self.candidates)
+
+    def jump_to_candidate(self, step):
+        """Move the playhead to the next (*step* = 1) or previous candidate."""
+        if self.current_audio_data is None or not self.candidates:
+            return
+        now = self.playback_position / self.current_samplerate
+        starts = [start for start, _, _ in self.candidates]
+        if step > 0:
+            # Small margin so repeated presses do not stick to the same one
+            index = bisect.bisect_right(starts, now + 0.01)
+        else:
+            index = bisect.bisect_left(starts, now - 0.01) - 1
+        if not 0 <= index < len(self.candidates):
+            return
+        start, end, _ = self.candidates[index]
+        self.candidate_index = index
+        self.spectrogram_view.set_candidates(self.candidates, index)
+        position = min(
+            int(start * self.current_samplerate), len(self.current_audio_data) - 1
+        )
+        self.position_slider.setValue(position)
+        self.spectrogram_view.ensure_time_visible(start)
+        self.set_playback_position(position)
+        self.status_label.setText(
+            f"Candidate {index + 1}/{len(self.candidates)}: "
+            f"{start:.2f}s to {end:.2f}s"
+        )
+
+    def accept_candidate(self):
+        """Turn the selected candidate into an annotation of the chosen category."""
+        if self.candidate_index is None:
+            return
+        start, end, _ = self.candidates.pop(self.candidate_index)
+        self.candidate_index = None
+        category = self.category_selector.currentText()
+        self.annotations.append((start, end, category))
+        self.spectrogram_view.set_candidates(self.candidates)
+        self.update_spectrogram()
         self.refresh_annotations_table()
         self.status_label.setText(
-            f"Audio '{current_audio_filename}' labeled and cuts saved."
+            f"Segment {start:.2f}s to {end:.2f}s added as {category}."
         )
-        self.show_popup("Cuts saved successfully")
 
     def clear_labels(self):
         self.annotations = []
@@ -635,15 +1209,17 @@ class MainWindow(QMainWindow):
 
     def spectrogram_mouse_press(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
-            # Placeholder for handling mouse press to start selection
-            print(f"Mouse pressed at: {event.position().x()}, {event.position().y()}")
+            log.debug(
+                "Mouse pressed at: %s, %s", event.position().x(), event.position().y()
+            )
             self.selection_start_x = event.position().x()
             self.selection_start_time = self.x_to_time(event.position().x())
 
     def spectrogram_mouse_release(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
-            # Placeholder for handling mouse release to end selection
-            print(f"Mouse released at: {event.position().x()}, {event.position().y()}")
+            log.debug(
+                "Mouse released at: %s, %s", event.position().x(), event.position().y()
+            )
             self.selection_end_x = event.position().x()
             self.selection_end_time = self.x_to_time(event.position().x())
 
@@ -658,26 +1234,10 @@ class MainWindow(QMainWindow):
                 self.update_spectrogram()  # Redraw with selection
 
     def x_to_time(self, x_coordinate):
-        # This is a simplified conversion. A more accurate one would depend on
-        # the actual width of the spectrogram image and the total duration of the audio.
-        # Assuming spectrogram_label width maps to audio duration.
-        if self.current_audio_data is None or self.spectrogram_label.pixmap() is None:
-            return 0
-
-        if self.spectrogram_bounds is not None:
-            left, _, width, _ = self.spectrogram_bounds
-            x_coordinate = max(0, x_coordinate - left)
-            spectrogram_width = width
-        else:
-            spectrogram_width = self.spectrogram_label.pixmap().width()
-
-        audio_duration = len(self.current_audio_data) / self.current_samplerate
-
-        if spectrogram_width == 0:
+        # The view knows the current zoom level and scroll position
+        if self.current_audio_data is None:
             return 0
-
-        time_per_pixel = audio_duration / spectrogram_width
-        return x_coordinate * time_per_pixel
+        return self.spectrogram_view.x_to_time(x_coordinate)
 
     def show_popup(self, message):
         msg = QMessageBox(self)
@@ -696,24 +1256,34 @@ class MainWindow(QMainWindow):
             self.annotations_table.setItem(row, 1, QTableWidgetItem(f"{end:.2f}"))
             self.annotations_table.setItem(row, 2, QTableWidgetItem(cat))
 
+    def tab_changed(self, index):
+        if self.tabs.widget(index) is self.memory_tab and not self.memory_loaded:
+            self.refresh_memory_table()
+
     def refresh_memory_table(self):
-        self.memory_table.setRowCount(0)
-        search = (
-            self.memory_search.text().lower() if hasattr(self, "memory_search") else ""
-        )
-        paths = [
-            p
-            for p in sorted(self.labeled_audios.keys())
-            if search in os.path.basename(p).lower()
-        ]
-        for row, path in enumerate(paths):
-            self.memory_table.insertRow(row)
-            item = QTableWidgetItem(os.path.basename(path))
-            item.setToolTip(path)
-            self.memory_table.setItem(row, 0, item)
-            btn = QPushButton("Delete")
-            btn.clicked.connect(lambda _, p=path: self.delete_memory_entry(p))
-            self.memory_table.setCellWidget(row, 1, btn)
+        """Reload the Memory Manager from the labeled audios log."""
+        self.memory_model.set_paths(self.labeled_audios.keys())
+        self.memory_loaded = True
+
+    def apply_memory_search(self):
+        self.memory_proxy.set_search(self.memory_search.text())
+
+    def memory_path_at(self, proxy_index):
+        source_index = self.memory_proxy.mapToSource(proxy_index)
+        return self.memory_model.path_at(source_index.row())
+
+    def memory_delete_clicked(self, proxy_index):
+        self.delete_memory_entry(self.memory_path_at(proxy_index))
+
+    def memory_context_menu(self, pos):
+        index = self.memory_table.indexAt(pos)
+        if not index.isValid():
+            return
+        path = self.memory_path_at(index)
+        menu = QMenu(self.memory_table)
+        delete_action = menu.addAction("Delete entry")
+        if menu.exec(self.memory_table.viewport().mapToGlobal(pos)) == delete_action:
+            self.delete_memory_entry(path)
 
     def delete_memory_entry(self, path):
         if path in self.labeled_audios:
@@ -721,36 +1291,41 @@ class MainWindow(QMainWindow):
                 self.status_label.setText(
                     f"Memory entry removed for {os.path.basename(path)}"
                 )
-                self.refresh_memory_table()
-                self.refresh_file_list()
+                self.memory_model.remove_path(path)
+                self.file_list_model.set_labeled(path, False)
 
     def closeEvent(self, event):
-        if self.playback_stream:
-            self.playback_stream.stop()
-            self.playback_stream.close()
+        self.cancel_pending_loads()
+        for worker in list(self.load_workers):
+            worker.wait()
+        for worker in list(self.detect_workers):
+            worker.cancel()
+            worker.wait()
+        self.rescan_timer.stop()
+        if self.scan_worker is not None:
+            self.scan_worker.cancel()
+            self.scan_worker.wait()
+        # Let pending cuts finish so no half-written file is left behind
+        for worker in list(self.export_workers):
+            worker.wait()
+        self.playback_engine.close()
+        if self.current_audio_data is not None:
+            self.current_audio_data.close()
+        for result in self.audio_cache.values():
+            result["audio_data"].close()
         event.accept()
 
     def refresh_file_list(self):
-        if not hasattr(self, "file_list"):
+        """Reload the side panel after a new folder was selected."""
+        if not hasattr(self, "file_list_model"):
             return
-        self.file_list.clear()
-        filter_opt = (
-            self.file_filter.currentText() if hasattr(self, "file_filter") else "All"
-        )
-        for idx, path in enumerate(self.audio_files):
-            labeled = path in self.labeled_audios
-            if filter_opt == "Labeled" and not labeled:
-                continue
-            if filter_opt == "Unlabeled" and labeled:
-                continue
-            item = QListWidgetItem(os.path.basename(path))
-            if labeled:
-                item.setForeground(QColor("green"))
-            item.setData(Qt.ItemDataRole.UserRole, idx)
-            self.file_list.addItem(item)
-
-    def file_item_clicked(self, item):
-        idx = item.data(Qt.ItemDataRole.UserRole)
+        self.file_list_model.set_files(self.audio_files, self.labeled_audios)
+
+    def apply_file_filter(self):
+        self.file_list_model.set_filter(self.file_filter.currentText())
+
+    def file_item_clicked(self, index):
+        idx = index.data(Qt.ItemDataRole.UserRole)
         if idx is not None:
             self.load_audio(idx)
 
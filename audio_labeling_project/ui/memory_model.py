@@ -0,0 +1,189 @@
+import bisect
+import os
+from PyQt6.QtCore import (
+    QAbstractTableModel,
+    QEvent,
+    QModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    pyqtSignal,
+)
+from PyQt6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+)
+
+
+class MemoryTableModel(QAbstractTableModel):
+    """Labeled audios shown in the Memory Manager, one row per path.
+
+    Rows are only materialised by the view when they are painted, so the
+    table costs the same with 50 or 50,000 entries. Paths are kept sorted,
+    which is the display order (the proxy does not re-sort), together with
+    their basenames and lowercase basenames; the latter back the search
+    index used by :class:`MemoryFilterProxyModel`.
+    """
+
+    HEADERS = ["File", ""]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self.names = []
+        self.lower_names = []
+        self._search_text = None
+        self._search_starts = None
+
+    def set_paths(self, paths):
+        self.beginResetModel()
+        self.paths = sorted(paths)
+        self.names = [os.path.basename(p) for p in self.paths]
+        self.lower_names = [name.lower() for name in self.names]
+        self._search_text = None
+        self.endResetModel()
+
+    def add_path(self, path):
+        row = bisect.bisect_left(self.paths, path)
+        if row < len(self.paths) and self.paths[row] == path:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        name = os.path.basename(path)
+        self.paths.insert(row, path)
+        self.names.insert(row, name)
+        self.lower_names.insert(row, name.lower())
+        self._search_text = None
+        self.endInsertRows()
+
+    def remove_path(self, path):
+        row = bisect.bisect_left(self.paths, path)
+        if row == len(self.paths) or self.paths[row] != path:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.paths[row]
+        del self.names[row]
+        del self.lower_names[row]
+        self._search_text = None
+        self.endRemoveRows()
+
+    def path_at(self, row):
+        return self.paths[row]
+
+    def matching_rows(self, search):
+        """Return a bytearray flagging the rows whose basename contains *search*.
+
+        All basenames are joined once into a single newline separated
+        string, so each keystroke is a handful of ``str.find`` calls in C
+        rather than a Python loop over every entry.
+        """
+        if self._search_text is None:
+            self._search_text = "\n".join(self.lower_names)
+            starts = []
+            position = 0
+            for name in self.lower_names:
+                starts.append(position)
+                position += len(name) + 1
+            self._search_starts = starts
+        text = self._search_text
+        starts = self._search_starts
+        matches = bytearray(len(starts))
+        position = text.find(search)
+        while position != -1:
+            row = bisect.bisect_right(starts, position) - 1
+            matches[row] = 1
+            if row + 1 == len(starts):
+                break
+            # Resume at the next entry: one hit per row is enough
+            position = text.find(search, starts[row + 1])
+        return matches
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if index.column() == 0:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.names[row]
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self.paths[row]
+        elif role == Qt.ItemDataRole.DisplayRole:
+            return "Delete"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class MemoryFilterProxyModel(QSortFilterProxyModel):
+    """Filters the Memory Manager by a precomputed basename search."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search = ""
+        self.accepted = None
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        # New or removed entries change what the current search matches
+        model.rowsInserted.connect(self.refresh_search)
+        model.rowsRemoved.connect(self.refresh_search)
+        model.modelReset.connect(self.refresh_search)
+
+    def set_search(self, search):
+        self.search = search.lower()
+        self.refresh_search()
+
+    def refresh_search(self, *_):
+        if self.search:
+            self.accepted = self.sourceModel().matching_rows(self.search)
+        else:
+            self.accepted = None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.accepted is None:
+            return True
+        # Rows inserted since the last search are re-checked by refresh_search
+        return source_row < len(self.accepted) and bool(self.accepted[source_row])
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a push button in a cell and reports clicks on it.
+
+    Unlike a ``QPushButton`` cell widget per row, nothing is created for
+    rows that are not visible.
+    """
+
+    clicked = pyqtSignal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data()
+        button.state = QStyle.StateFlag.State_Enabled
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            button.state |= QStyle.StateFlag.State_MouseOver
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,75 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from config import CONFIG
+from utils.file_manager import (
+    index_audio_metadata,
+    load_manifest,
+    manifest_audio_info,
+    save_manifest,
+    scan_audio_files,
+)
+
+
+class FolderScanWorker(QThread):
+    """Scan an audio folder recursively off the GUI thread.
+
+    The manifest of the previous scan, passed in or read from disk, lets
+    unchanged directories be skipped. Once the file list is out, the
+    headers of files not indexed yet are read in the background and the
+    manifest is saved when anything changed. The manifest belongs to the
+    worker until it is handed over by ``manifest_ready``.
+
+    Signals
+    -------
+    scanned(folder_path, paths, infos)
+        Emitted with the sorted audio paths found under the folder and the
+        ``{path: info}`` headers indexed by earlier scans.
+    indexed(folder_path, infos, done, total)
+        Emitted with ``{path: info}`` for each batch of headers read.
+    manifest_ready(folder_path, manifest)
+        Emitted once indexing is over, with the manifest for the next scan.
+    failed(folder_path, message)
+        Emitted when the scan raises.
+    """
+
+    scanned = pyqtSignal(str, object, object)
+    indexed = pyqtSignal(str, object, int, int)
+    manifest_ready = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, folder_path, manifest=None, parent=None):
+        super().__init__(parent)
+        self.folder_path = folder_path
+        self.manifest = manifest
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop indexing after the current batch; the manifest is still saved."""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            manifest = self.manifest or load_manifest(self.folder_path)
+            paths, new_manifest = scan_audio_files(
+                self.folder_path, CONFIG["AUDIO_EXTENSIONS"], manifest
+            )
+            changed = new_manifest != manifest
+            self.scanned.emit(self.folder_path, paths, manifest_audio_info(new_manifest))
+            indexed = index_audio_metadata(
+                new_manifest,
+                batch_callback=self._report_batch,
+                is_cancelled=self.is_cancelled,
+            )
+            if changed or indexed:
+                try:
+                    save_manifest(new_manifest)
+                except OSError:
+                    pass  # Next open simply scans everything again
+            self.manifest_ready.emit(self.folder_path, new_manifest)
+        except Exception as e:
+            self.failed.emit(self.folder_path, str(e))
+
+    def _report_batch(self, infos, done, total):
+        self.indexed.emit(self.folder_path, infos, done, total)
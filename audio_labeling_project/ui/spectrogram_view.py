@@ -0,0 +1,485 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QRect, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QPen, QPixmap, QColor
+from config import CONFIG
+from audio_processor.spectrogram_generator import (
+    IMAGE_SIZE,
+    BACKGROUND_COLOR,
+    AXIS_COLOR,
+    axis_font,
+    draw_time_axis,
+    render_spectrogram_tile,
+)
+from audio_processor.spectrogram_tiles import (
+    TILE_WIDTH,
+    max_zoom_level,
+    level_columns,
+    tile_time_range,
+    tile_width,
+    visible_tiles,
+)
+from utils.lru_cache import LRUCache
+from utils.tracing import span
+
+# Width in pixels of the playback line
+PLAYHEAD_WIDTH = 2
+
+# Fill of detector candidates not confirmed yet, and of the selected one
+CANDIDATE_COLOR = QColor(255, 200, 0, 50)
+CURRENT_CANDIDATE_COLOR = QColor(255, 200, 0, 110)
+
+
+class TileSignals(QObject):
+    tile_ready = pyqtSignal(object, object)  # key, QImage
+
+
+class TileTask(QRunnable):
+    """Render one spectrogram tile on the view's thread pool."""
+
+    def __init__(self, key, signals, spectrogram, time_range, size):
+        super().__init__()
+        self.key = key
+        self.signals = signals
+        self.spectrogram = spectrogram
+        self.time_range = time_range
+        self.size = size
+
+    def run(self):
+        with span("render_tile", level=self.key[1]):
+            image = render_spectrogram_tile(self.spectrogram, *self.time_range, self.size)
+        self.signals.tile_ready.emit(self.key, image)
+
+
+class SpectrogramView(QWidget):
+    """Zoomable spectrogram with annotation and playback overlays.
+
+    At zoom level 0 the pre-rendered overview image is shown as is. Deeper
+    levels double the horizontal resolution each time; the visible part is
+    split into tiles of :data:`TILE_WIDTH` columns that are computed and
+    rendered on a thread pool, one STFT column per pixel (see
+    :class:`audio_processor.display_stft.DisplaySpectrogram`), and kept in
+    an LRU cache. Until a tile
+    arrives, the matching slice of the overview is shown stretched.
+
+    Painting is layered: the spectrogram with its axes and the annotation
+    lines (over the shaded detector candidates) are each cached in a pixmap
+    that is only rebuilt when the view, the tiles or the annotations change.
+    Moving the playhead only repaints the two thin strips under its old and
+    new positions.
+
+    Signals
+    -------
+    view_changed()
+        Emitted whenever the zoom level or the scroll position changes.
+    """
+
+    view_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(*IMAGE_SIZE)
+        self.message = "Spectrogram will appear here."
+        self.overview = None
+        self.bounds = None
+        self.spectrogram = None
+        self.samplerate = None
+        self.duration = 0.0
+        self.level = 0
+        self.first_column = 0.0
+        self.annotations = []
+        self.candidates = []
+        self.current_candidate = None
+        self.playback_time = None
+        self.playhead_x = None
+        self.base_layer = None
+        self.annotation_layer = None
+        self.generation = 0
+        self.pending_tiles = set()
+        self.tile_cache = LRUCache(
+            CONFIG.get("TILE_CACHE_MB", 128) * 1024 * 1024,
+            lambda pixmap: pixmap.width() * pixmap.height() * 4,
+        )
+        self.tile_pool = QThreadPool(self)
+        self.tile_pool.setMaxThreadCount(2)
+        self.tile_signals = TileSignals(self)
+        self.tile_signals.tile_ready.connect(self.tile_ready)
+
+    def set_message(self, text):
+        """Drop the current spectrogram and show *text* instead."""
+        self.reset()
+        self.message = text
+        self.update()
+
+    def set_spectrogram(
+        self, overview, bounds, spectrogram, samplerate, duration, keep_zoom=False
+    ):
+        """Show a new recording.
+
+        Args:
+            overview (QPixmap): Full-recording image with axes.
+            bounds (tuple): Plot area of *overview* as ``(left, top, width, height)``.
+            spectrogram (DisplaySpectrogram): Source of the zoomed tiles, or
+                None to disable zooming.
+            samplerate (int): Sample rate of the audio.
+            duration (float): Length of the audio in seconds.
+            keep_zoom (bool): Keep the zoom level and scroll position, for
+                another channel view of the recording on screen.
+        """
+        level, first_column = self.level, self.first_column
+        self.reset()
+        self.overview = overview
+        self.bounds = bounds
+        self.spectrogram = spectrogram
+        self.samplerate = samplerate
+        self.duration = duration
+        if keep_zoom:
+            self.level = min(level, self.max_level())
+            self.first_column = min(first_column, max(0.0, self.max_first_column()))
+        self.invalidate_layers()
+        self.view_changed.emit()
+
+    def reset(self):
+        self.generation += 1
+        self.tile_pool.clear()
+        self.tile_cache.clear()
+        self.pending_tiles.clear()
+        self.overview = None
+        self.bounds = None
+        self.spectrogram = None
+        self.duration = 0.0
+        self.level = 0
+        self.first_column = 0.0
+        self.playback_time = None
+        self.playhead_x = None
+        self.invalidate_layers()
+
+    def has_spectrogram(self):
+        return self.overview is not None and self.bounds is not None
+
+    def set_annotations(self, annotations):
+        self.annotations = annotations
+        self.annotation_layer = None
+        self.update()
+
+    def set_candidates(self, candidates, current=None):
+        """Shade the detector *candidates*, highlighting index *current*."""
+        self.candidates = candidates
+        self.current_candidate = current
+        self.annotation_layer = None
+        self.update()
+
+    def set_playback_time(self, seconds):
+        """Move the playhead, repainting only the strips it leaves and enters."""
+        self.playback_time = seconds
+        x = self.current_playhead_x()
+        if x == self.playhead_x:
+            return
+        for old_x in (self.playhead_x, x):
+            if old_x is not None:
+                self.update(self.playhead_strip(old_x))
+        self.playhead_x = x
+
+    def invalidate_layers(self):
+        """Drop the cached layers after a change of view, tiles or size."""
+        self.base_layer = None
+        self.annotation_layer = None
+        self.playhead_x = self.current_playhead_x()
+        self.update()
+
+    def current_playhead_x(self):
+        """Pixel column of the playhead, or None when it is not visible."""
+        if not self.has_spectrogram() or self.playback_time is None:
+            return None
+        left, _, width, _ = self.plot_rect()
+        x = int(self.time_to_x(self.playback_time))
+        return x if left <= x <= left + width else None
+
+    def playhead_strip(self, x):
+        _, top, _, height = self.plot_rect()
+        return QRect(x - PLAYHEAD_WIDTH, top, 2 * PLAYHEAD_WIDTH + 1, height + 1)
+
+    def resizeEvent(self, event):
+        self.invalidate_layers()
+        super().resizeEvent(event)
+
+    # Coordinate mapping -------------------------------------------------
+
+    def origin(self):
+        """Top-left corner of the overview image in widget coordinates."""
+        if self.overview is None:
+            return 0, 0
+        return (
+            max(0, (self.width() - self.overview.width()) // 2),
+            max(0, (self.height() - self.overview.height()) // 2),
+        )
+
+    def plot_rect(self):
+        """Return the plot area as ``(left, top, width, height)`` in widget coordinates."""
+        ox, oy = self.origin()
+        left, top, width, height = self.bounds
+        return ox + left, oy + top, width, height
+
+    def base_width(self):
+        return self.bounds[2]
+
+    def columns(self):
+        return level_columns(self.level, self.base_width())
+
+    def visible_duration(self):
+        return self.duration / (2**self.level)
+
+    def view_start(self):
+        """Time in seconds at the left edge of the plot."""
+        if not self.has_spectrogram():
+            return 0.0
+        return self.first_column / self.columns() * self.duration
+
+    def time_to_x(self, seconds):
+        left, _, width, _ = self.plot_rect()
+        return left + (seconds - self.view_start()) / self.visible_duration() * width
+
+    def x_to_time(self, x_coordinate):
+        """Convert a widget x coordinate into a time in seconds."""
+        if not self.has_spectrogram() or self.duration <= 0:
+            return 0
+        left, _, width, _ = self.plot_rect()
+        x = min(max(0, x_coordinate - left), width)
+        return self.view_start() + x / width * self.visible_duration()
+
+    # Zoom and scroll ----------------------------------------------------
+
+    def max_level(self):
+        if self.spectrogram is None:
+            return 0
+        return max_zoom_level(self.spectrogram.frame_count(), self.base_width())
+
+    def display_plan(self):
+        """STFT parameters used for the current view, or None; see
+        :func:`audio_processor.display_stft.plan_columns`."""
+        if self.spectrogram is None or not self.has_spectrogram():
+            return None
+        start = self.view_start()
+        return self.spectrogram.plan(
+            start, start + self.visible_duration(), self.base_width()
+        )
+
+    def max_first_column(self):
+        return self.columns() - self.base_width()
+
+    def set_first_column(self, column):
+        if not self.has_spectrogram():
+            return
+        column = min(max(0.0, float(column)), self.max_first_column())
+        if column != self.first_column:
+            self.first_column = column
+            self.invalidate_layers()
+            self.view_changed.emit()
+
+    def set_zoom_level(self, level, anchor_time=None):
+        """Zoom to *level*, keeping *anchor_time* at the same screen position."""
+        if not self.has_spectrogram():
+            return
+        level = min(max(0, level), self.max_level())
+        if level == self.level:
+            return
+        if anchor_time is None:
+            anchor_time = self.view_start() + self.visible_duration() / 2
+        fraction = (anchor_time - self.view_start()) / self.visible_duration()
+        self.level = level
+        self.first_column = 0.0
+        start = anchor_time - fraction * self.visible_duration()
+        column = start / self.duration * self.columns() if self.duration else 0
+        self.first_column = min(max(0.0, column), self.max_first_column())
+        self.invalidate_layers()
+        self.view_changed.emit()
+
+    def zoom_in(self, anchor_time=None):
+        self.set_zoom_level(self.level + 1, anchor_time)
+
+    def zoom_out(self, anchor_time=None):
+        self.set_zoom_level(self.level - 1, anchor_time)
+
+    def ensure_time_visible(self, seconds):
+        """Scroll by a page if *seconds* is outside the visible window."""
+        if not self.has_spectrogram() or self.level == 0:
+            return
+        start = self.view_start()
+        if not (start <= seconds < start + self.visible_duration()):
+            self.set_first_column(seconds / self.duration * self.columns())
+
+    def wheelEvent(self, event):
+        if not self.has_spectrogram():
+            return
+        delta = event.angleDelta().y() or event.angleDelta().x()
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            anchor = self.x_to_time(event.position().x())
+            if delta > 0:
+                self.zoom_in(anchor)
+            elif delta < 0:
+                self.zoom_out(anchor)
+        else:
+            # One wheel notch scrolls a tenth of the visible width
+            self.set_first_column(self.first_column - delta / 120 * self.base_width() / 10)
+        event.accept()
+
+    # Tiles --------------------------------------------------------------
+
+    def request_tile(self, key):
+        level, index = key[1], key[2]
+        if key in self.pending_tiles or self.spectrogram is None:
+            return
+        self.pending_tiles.add(key)
+        time_range = tile_time_range(level, index, self.duration, self.base_width())
+        size = (tile_width(level, index, self.base_width()), self.bounds[3])
+        self.tile_pool.start(
+            TileTask(key, self.tile_signals, self.spectrogram, time_range, size)
+        )
+
+    def tile_ready(self, key, image):
+        self.pending_tiles.discard(key)
+        if key[0] != self.generation:
+            return
+        self.tile_cache.put(key, QPixmap.fromImage(image))
+        if key[1] == self.level:
+            self.base_layer = None
+            self.update()
+
+    # Painting -----------------------------------------------------------
+
+    def new_layer(self):
+        """Return a transparent pixmap covering the widget at device resolution."""
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(self.size() * ratio)
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(Qt.GlobalColor.transparent)
+        return layer
+
+    def build_base_layer(self):
+        layer = self.new_layer()
+        painter = QPainter(layer)
+        ox, oy = self.origin()
+        painter.drawPixmap(ox, oy, self.overview)
+        if self.level > 0:
+            self.paint_tiles(painter)
+            self.paint_time_axis(painter)
+        painter.end()
+        return layer
+
+    def build_annotation_layer(self):
+        layer = self.new_layer()
+        painter = QPainter(layer)
+        left, top, width, height = self.plot_rect()
+        painter.setClipRect(left, top, width, height)
+        for index, (start, end, _) in enumerate(self.candidates):
+            x = int(self.time_to_x(start))
+            color = (
+                CURRENT_CANDIDATE_COLOR
+                if index == self.current_candidate
+                else CANDIDATE_COLOR
+            )
+            painter.fillRect(
+                x, top, max(1, int(self.time_to_x(end)) - x), height, color
+            )
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        pen = QPen(Qt.GlobalColor.green)
+        pen.setWidth(2)
+        painter.setPen(pen)
+        for start, end, _ in self.annotations:
+            for seconds in (start, end):
+                x = int(self.time_to_x(seconds))
+                painter.drawLine(x, top, x, top + height)
+        painter.end()
+        return layer
+
+    def paintEvent(self, event):
+        # The window shows the latest "paint" span as its frame time
+        with span("paint"):
+            self.paint_frame(event)
+
+    def paint_frame(self, event):
+        painter = QPainter(self)
+        if not self.has_spectrogram():
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.message)
+            painter.end()
+            return
+
+        if self.base_layer is None:
+            with span("base_layer", level=self.level):
+                self.base_layer = self.build_base_layer()
+        if self.annotation_layer is None:
+            with span("annotation_layer", annotations=len(self.annotations)):
+                self.annotation_layer = self.build_annotation_layer()
+        # Only the damaged area is recomposed, usually a playhead strip
+        rect = QRectF(event.rect())
+        painter.drawPixmap(rect, self.base_layer, self.layer_rect(rect))
+        painter.drawPixmap(rect, self.annotation_layer, self.layer_rect(rect))
+        if self.playhead_x is not None:
+            _, top, _, height = self.plot_rect()
+            pen = QPen(Qt.GlobalColor.red)
+            pen.setWidth(PLAYHEAD_WIDTH)
+            painter.setPen(pen)
+            painter.drawLine(self.playhead_x, top, self.playhead_x, top + height)
+        painter.end()
+
+    def layer_rect(self, rect):
+        """Map a widget rect to the matching source rect in a layer pixmap."""
+        ratio = self.devicePixelRatioF()
+        return QRectF(
+            rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio
+        )
+
+    def paint_tiles(self, painter):
+        left, top, width, height = self.plot_rect()
+        painter.save()
+        painter.setClipRect(left, top, width, height)
+        # Stretched overview as a placeholder for tiles still rendering
+        _, o_top, o_width, o_height = self.bounds
+        source = QRectF(
+            self.bounds[0] + self.first_column / self.columns() * o_width,
+            o_top,
+            o_width / (2**self.level),
+            o_height,
+        )
+        painter.drawPixmap(QRectF(left, top, width, height), self.overview, source)
+
+        indices = visible_tiles(self.level, self.first_column, width, self.base_width())
+        for index in indices:
+            key = (self.generation, self.level, index)
+            tile = self.tile_cache.get(key)
+            if tile is None:
+                self.request_tile(key)
+                continue
+            x = left + index * TILE_WIDTH - self.first_column
+            painter.drawPixmap(int(round(x)), top, tile)
+        # Render the neighbours too so scrolling does not show placeholders
+        for index in (indices.start - 1, indices.stop):
+            if 0 <= index and tile_width(self.level, index, self.base_width()) > 0:
+                key = (self.generation, self.level, index)
+                if key not in self.tile_cache:
+                    self.request_tile(key)
+        painter.restore()
+
+    def paint_time_axis(self, painter):
+        left, top, width, height = self.plot_rect()
+        ox, oy = self.origin()
+        painter.save()
+        # Replace the overview's full-length time axis with the visible window
+        painter.fillRect(
+            ox,
+            top + height + 1,
+            self.overview.width(),
+            oy + self.overview.height() - (top + height + 1),
+            QColor(*BACKGROUND_COLOR),
+        )
+        painter.setPen(QPen(QColor(*AXIS_COLOR)))
+        painter.setFont(axis_font())
+        painter.translate(ox, oy)
+        start = self.view_start()
+        draw_time_axis(
+            painter,
+            self.bounds,
+            start,
+            start + self.visible_duration(),
+            self.overview.width(),
+        )
+        painter.restore()
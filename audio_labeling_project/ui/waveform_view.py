@@ -0,0 +1,86 @@
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import QLineF
+from PyQt6.QtGui import QColor, QPainter, QPen, QPixmap
+from audio_processor.spectrogram_generator import AXIS_COLOR, BACKGROUND_COLOR
+from utils.tracing import span
+
+# Height in pixels of the waveform lane
+LANE_HEIGHT = 64
+WAVEFORM_COLOR = QColor(26, 188, 156)
+
+
+class WaveformView(QWidget):
+    """Waveform lane drawn under a :class:`ui.spectrogram_view.SpectrogramView`.
+
+    The lane shows the same time window as the spectrogram above it, at
+    any zoom level, from the :class:`audio_processor.waveform.WaveformEnvelope`
+    of the recording: each repaint costs one min/max pair per pixel column.
+    Amplitudes are scaled to the recording's peak so quiet night recordings
+    still fill the lane. The drawing is cached until the window or the lane
+    size changes.
+    """
+
+    def __init__(self, spectrogram_view, parent=None):
+        super().__init__(parent)
+        self.spectrogram_view = spectrogram_view
+        self.envelope = None
+        self.layer = None
+        self.layer_key = None
+        self.setFixedHeight(LANE_HEIGHT)
+        spectrogram_view.view_changed.connect(self.update)
+
+    def set_envelope(self, envelope):
+        """Show *envelope*, or an empty lane when it is None."""
+        self.envelope = envelope
+        self.layer = None
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        view = self.spectrogram_view
+        if self.envelope is None or not view.has_spectrogram():
+            painter.end()
+            return
+        left, _, width, _ = view.plot_rect()
+        start = view.view_start()
+        end = start + view.visible_duration()
+        key = (start, end, left, width, self.width(), self.height())
+        if self.layer is None or key != self.layer_key:
+            with span("waveform_layer"):
+                self.layer = self.build_layer(left, width, start, end)
+            self.layer_key = key
+        painter.drawPixmap(0, 0, self.layer)
+        painter.end()
+
+    def build_layer(self, left, width, start, end):
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(self.size() * ratio)
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(QColor(*BACKGROUND_COLOR))
+        painter = QPainter(layer)
+        height = self.height()
+        painter.setPen(QPen(QColor(*AXIS_COLOR)))
+        painter.drawRect(left, 0, width, height - 1)
+
+        mins, maxs = self.envelope.column_extremes(start, end, width)
+        middle = (height - 1) / 2
+        peak = self.envelope.peak()
+        scale = (middle - 1) / peak if peak > 0 else 0.0
+        tops = middle - maxs.astype(np.float64) * scale
+        bottoms = middle - mins.astype(np.float64) * scale
+        # Reach the previous column too, so zoomed-in samples stay connected
+        previous_tops = tops[:-1].copy()
+        tops[1:] = np.minimum(tops[1:], bottoms[:-1])
+        bottoms[1:] = np.maximum(bottoms[1:], previous_tops)
+        xs = left + np.arange(width, dtype=np.float64) + 0.5
+        # One vertical line per column: cheaper than filling an outline
+        lines = [
+            QLineF(x, top, x, bottom)
+            for x, top, bottom in zip(xs.tolist(), tops.tolist(), bottoms.tolist())
+        ]
+        painter.setClipRect(left, 0, width, height)
+        painter.setPen(QPen(WAVEFORM_COLOR))
+        painter.drawLines(lines)
+        painter.end()
+        return layer
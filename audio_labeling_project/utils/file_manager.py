@@ -1,23 +1,262 @@
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import CONFIG
+
+MANIFEST_VERSION = 1
+
+# Directories modified this recently may still change within the same
+# timestamp tick, so their mtime is not trusted on the next scan
+MTIME_SETTLE_NS = 2_000_000_000
 
 
 def get_audio_files_in_folder(folder_path, extensions):
     """
     Retrieves a list of audio files with specified extensions from a folder.
 
+    Subfolders are scanned too. See :func:`scan_audio_files`.
+
     Args:
         folder_path (str): The path to the folder.
         extensions (list): A list of allowed audio file extensions (e.g., ['.wav', '.mp3']).
 
     Returns:
-        list: A list of full paths to the audio files.
-    """
-    audio_files = []
-    if os.path.isdir(folder_path):
-        for f in os.listdir(folder_path):
-            if any(f.lower().endswith(ext) for ext in extensions):
-                audio_files.append(os.path.join(folder_path, f))
-    return audio_files
+        list: A sorted list of full paths to the audio files.
+    """
+    if not os.path.isdir(folder_path):
+        return []
+    paths, _ = scan_audio_files(folder_path, extensions)
+    return paths
+
+
+def scan_directory(path, extensions, previous=None):
+    """
+    Lists the audio files and subfolders of one directory.
+
+    If the directory's modification time matches *previous*, its record
+    from the last scan is reused with a single ``os.stat``; entries are
+    only listed again when files were added, removed or renamed.
+
+    Returns:
+        dict: ``mtime_ns`` (None while it may still change), ``files``
+        mapping file names to ``{"size", "mtime_ns"}`` and ``subdirs``,
+        or None if the directory cannot be read.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if previous is not None and previous.get("mtime_ns") == mtime_ns:
+        return previous
+
+    files = {}
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    # Symlinked folders are not followed to avoid cycles
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.lower().endswith(extensions):
+                        st = entry.stat()
+                        files[entry.name] = {
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    if time.time_ns() - mtime_ns < MTIME_SETTLE_NS:
+        mtime_ns = None
+    # Keep the header metadata of files that did not change
+    if previous is not None:
+        for name, record in files.items():
+            old = previous["files"].get(name)
+            if (
+                old is not None
+                and "info" in old
+                and old["size"] == record["size"]
+                and old["mtime_ns"] == record["mtime_ns"]
+            ):
+                record["info"] = old["info"]
+    return {"mtime_ns": mtime_ns, "files": files, "subdirs": sorted(subdirs)}
+
+
+def scan_audio_files(folder_path, extensions, manifest=None, workers=None):
+    """
+    Recursively finds the audio files under *folder_path*.
+
+    Directories are listed with ``os.scandir``, one tree level at a time,
+    by a pool of *workers* threads so that the round trips of a network
+    share overlap. With the *manifest* of a previous scan only directories
+    whose modification time changed are listed again; the others cost one
+    ``os.stat`` each.
+
+    Args:
+        folder_path (str): Root folder. Returned paths start with it as
+            given, so they match keys stored by earlier versions.
+        extensions (list): Allowed extensions, e.g. ``['.wav', '.mp3']``.
+        manifest (dict, optional): Result of an earlier scan of the same
+            folder, e.g. from :func:`load_manifest`.
+        workers (int, optional): Parallel directory walkers,
+            ``SCAN_WORKERS`` by default.
+
+    Returns:
+        tuple: ``(paths, manifest)`` with the paths sorted and the
+        manifest describing this scan.
+    """
+    extensions = tuple(sorted(ext.lower() for ext in extensions))
+    previous_dirs = {}
+    if (
+        manifest
+        and manifest.get("version") == MANIFEST_VERSION
+        and manifest.get("root") == folder_path
+        and tuple(manifest.get("extensions", ())) == extensions
+    ):
+        previous_dirs = manifest["dirs"]
+    if workers is None:
+        workers = CONFIG.get("SCAN_WORKERS", 8)
+
+    dirs = {}
+    level = [folder_path]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while level:
+            records = pool.map(
+                lambda path: scan_directory(
+                    path, extensions, previous_dirs.get(path)
+                ),
+                level,
+            )
+            next_level = []
+            for path, record in zip(level, records):
+                if record is None:
+                    continue
+                dirs[path] = record
+                for name in record["subdirs"]:
+                    next_level.append(os.path.join(path, name))
+            level = next_level
+
+    paths = sorted(
+        os.path.join(path, name)
+        for path, record in dirs.items()
+        for name in record["files"]
+    )
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "root": folder_path,
+        "extensions": list(extensions),
+        "dirs": dirs,
+    }
+    return paths, manifest
+
+
+def read_audio_info(path):
+    """
+    Reads the header of an audio file without decoding it.
+
+    Returns:
+        dict: ``frames``, ``samplerate``, ``channels`` and ``duration``, or
+        ``error`` if the file cannot be opened.
+    """
+    # Scans run in a worker; keep soundfile out of the window's startup
+    import soundfile as sf
+
+    try:
+        info = sf.info(path)
+    except Exception as e:
+        return {"error": str(e)}
+    return {
+        "frames": info.frames,
+        "samplerate": info.samplerate,
+        "channels": info.channels,
+        "duration": info.duration,
+    }
+
+
+def manifest_audio_info(manifest):
+    """Return ``{path: info}`` for the files of *manifest* already indexed."""
+    infos = {}
+    for path, record in manifest["dirs"].items():
+        for name, file_record in record["files"].items():
+            if "info" in file_record:
+                infos[os.path.join(path, name)] = file_record["info"]
+    return infos
+
+
+def index_audio_metadata(
+    manifest, workers=None, batch_size=256, batch_callback=None, is_cancelled=None
+):
+    """
+    Reads the header of every file of *manifest* that was not indexed yet.
+
+    Headers are read with ``sf.info`` by a thread pool (``SCAN_WORKERS``
+    by default) and stored in the manifest under ``info``, so later scans
+    of the folder reuse them. Files that cannot be read are recorded with
+    an ``error`` and not retried until they change.
+
+    Args:
+        manifest (dict): Result of :func:`scan_audio_files`, updated in place.
+        batch_size (int): Files indexed between two callbacks.
+        batch_callback (callable, optional): Called with ``({path: info},
+            done, total)`` after each batch.
+        is_cancelled (callable, optional): Polled between batches.
+
+    Returns:
+        int: Number of files indexed.
+    """
+    pending = [
+        (os.path.join(path, name), file_record)
+        for path, record in manifest["dirs"].items()
+        for name, file_record in record["files"].items()
+        if "info" not in file_record
+    ]
+    if workers is None:
+        workers = CONFIG.get("SCAN_WORKERS", 8)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for start in range(0, len(pending), batch_size):
+            if is_cancelled is not None and is_cancelled():
+                break
+            batch = pending[start : start + batch_size]
+            infos = {}
+            for (path, file_record), info in zip(
+                batch, pool.map(read_audio_info, [path for path, _ in batch])
+            ):
+                file_record["info"] = info
+                infos[path] = info
+            done += len(batch)
+            if batch_callback is not None:
+                batch_callback(infos, done, len(pending))
+    return done
+
+
+def manifest_path(folder_path):
+    digest = hashlib.sha1(os.path.abspath(folder_path).encode("utf-8")).hexdigest()
+    manifest_dir = CONFIG.get("MANIFEST_DIR", "memlog/manifests")
+    return os.path.join(manifest_dir, f"{digest}.json")
+
+
+def load_manifest(folder_path):
+    """Return the saved manifest of *folder_path*, or None."""
+    try:
+        with open(manifest_path(folder_path), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(manifest):
+    """Write *manifest* atomically next to the other caches."""
+    path = manifest_path(manifest["root"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
 
 
 def create_directory_if_not_exists(path):
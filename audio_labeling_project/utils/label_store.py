@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from config import CONFIG
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    audio_path TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS labeled (
+    audio_path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class LabelStore:
+    """Labels and the labeled-audio log kept in one SQLite database.
+
+    The database runs in WAL mode, so every save is a small transaction
+    touching only the rows of one audio file: its cost does not grow with
+    the corpus, and a crash in the middle of a save leaves the previous
+    state intact instead of a truncated JSON file.
+
+    On first use the existing ``labels.json`` and ``log.json`` are imported
+    in a single transaction. They are left on disk untouched as a backup.
+    """
+
+    def __init__(self, path, labels_json=None, log_json=None):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The window saves from the GUI thread, cut exports finish there
+        # too, but keep the connection usable from any thread
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        self.migrate_json(labels_json, log_json)
+
+    def migrate_json(self, labels_json, log_json):
+        """Import the legacy JSON files once."""
+        with self.lock, self.connection:
+            done = self.connection.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+            if done:
+                return
+            labels = read_json(labels_json)
+            if labels:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO labels VALUES (?, ?)",
+                    ((path, json.dumps(entry)) for path, entry in labels.items()),
+                )
+            labeled = read_json(log_json)
+            if labeled:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO labeled VALUES (?)",
+                    ((path,) for path, value in labeled.items() if value),
+                )
+            self.connection.execute("INSERT INTO meta VALUES ('json_migrated', '1')")
+
+    def load_labels(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT audio_path, entry FROM labels")
+            return {path: json.loads(entry) for path, entry in rows}
+
+    def get_labels(self, audio_path):
+        """Return the stored entry of *audio_path*, or None."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT entry FROM labels WHERE audio_path = ?", (audio_path,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def label_paths(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT audio_path FROM labels")
+            return [path for (path,) in rows]
+
+    def count_labels(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+
+    def load_labeled(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT audio_path FROM labeled")
+            return {path: True for (path,) in rows}
+
+    def put_labels(self, audio_path, entry):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO labels VALUES (?, ?)",
+                (audio_path, json.dumps(entry)),
+            )
+
+    def delete_labels(self, audio_path):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM labels WHERE audio_path = ?", (audio_path,)
+            )
+
+    def set_labeled(self, audio_path, labeled=True):
+        with self.lock, self.connection:
+            if labeled:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO labeled VALUES (?)", (audio_path,)
+                )
+            else:
+                self.connection.execute(
+                    "DELETE FROM labeled WHERE audio_path = ?", (audio_path,)
+                )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class LabelsMapping(MutableMapping):
+    """Dict-like view of the labels table that decodes entries on demand.
+
+    The window only ever needs the entry of the file on screen, so nothing
+    is read at startup; each lookup is a primary-key query and the decoded
+    entry is kept. Assignments and deletions only update that cache: the
+    callers in :mod:`utils.logger` write the row to the store themselves.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.entries = {}
+
+    def __getitem__(self, audio_path):
+        entry = self.entries.get(audio_path)
+        if entry is None:
+            entry = self.store.get_labels(audio_path)
+            if entry is None:
+                raise KeyError(audio_path)
+            self.entries[audio_path] = entry
+        return entry
+
+    def __setitem__(self, audio_path, entry):
+        self.entries[audio_path] = entry
+
+    def __delitem__(self, audio_path):
+        if audio_path not in self:
+            raise KeyError(audio_path)
+        self.entries.pop(audio_path, None)
+
+    def __iter__(self):
+        return iter(self.store.label_paths())
+
+    def __len__(self):
+        return self.store.count_labels()
+
+    def items(self):
+        """Every entry, decoded in one query rather than one per key."""
+        return self.store.load_labels().items()
+
+
+def read_json(path):
+    if not path or not os.path.exists(path):
+        return {}
+    # A corrupt file raises here and the migration is retried next time
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {}
+
+
+_stores = {}
+
+
+def get_label_store():
+    """Return the store configured by ``LABELS_DB``, opening it on first use."""
+    path = CONFIG.get("LABELS_DB", "memlog/labels.sqlite3")
+    store = _stores.get(path)
+    if store is None:
+        store = LabelStore(
+            path,
+            labels_json=CONFIG.get("LABELS_FILE", "memlog/labels.json"),
+            log_json=CONFIG.get("LOG_FILE", "memlog/log.json"),
+        )
+        _stores[path] = store
+    return store
@@ -1,16 +1,11 @@
-import json
 import os
-from config import CONFIG
+from utils.label_store import LabelsMapping, get_label_store
+from utils.tracing import span
 
 
 def load_labels_data():
-    """Load stored label details for audios."""
-    path = CONFIG.get("LABELS_FILE", "memlog/labels.json")
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    return {}
+    """Return the stored label details of audios, read from the store on access."""
+    return LabelsMapping(get_label_store())
 
 
 def save_labels_for_audio(audio_path, annotations, labels_data, cut_files=None):
@@ -24,10 +19,9 @@ def save_labels_for_audio(audio_path, annotations, labels_data, cut_files=None):
     if cut_files is not None:
         entry["cuts"] = cut_files
     labels_data[audio_path] = entry
-    path = CONFIG.get("LABELS_FILE", "memlog/labels.json")
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(labels_data, f, indent=4)
+    # Only this audio's row is written, in its own transaction
+    with span("save_labels", annotations=len(annotations)):
+        get_label_store().put_labels(audio_path, entry)
 
 
 def remove_labels_for_audio(audio_path, labels_data):
@@ -45,10 +39,8 @@ def remove_labels_for_audio(audio_path, labels_data):
                 pass
 
     del labels_data[audio_path]
-    path = CONFIG.get("LABELS_FILE", "memlog/labels.json")
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(labels_data, f, indent=4)
+    with span("delete_labels"):
+        get_label_store().delete_labels(audio_path)
     return True
 
 
@@ -59,13 +51,8 @@ def load_labeled_audios_log():
     Returns:
         dict: A dictionary where keys are audio file paths and values are True if labeled.
     """
-    log_path = CONFIG["LOG_FILE"]
-    if os.path.exists(log_path):
-        with open(log_path, "r") as f:
-            return json.load(f)
-    else:
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        return {}
+    with span("load_labeled_log"):
+        return get_label_store().load_labeled()
 
 
 def log_labeled_audio(audio_path, labeled_audios_dict):
@@ -77,10 +64,8 @@ def log_labeled_audio(audio_path, labeled_audios_dict):
         labeled_audios_dict (dict): The dictionary containing labeled audio paths.
     """
     labeled_audios_dict[audio_path] = True
-    log_path = CONFIG["LOG_FILE"]
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-    with open(log_path, "w") as f:
-        json.dump(labeled_audios_dict, f, indent=4)
+    with span("log_labeled_audio"):
+        get_label_store().set_labeled(audio_path)
 
 
 def remove_labeled_audio(audio_path, labeled_audios_dict, labels_data=None):
@@ -88,10 +73,8 @@ def remove_labeled_audio(audio_path, labeled_audios_dict, labels_data=None):
     removed = False
     if audio_path in labeled_audios_dict:
         del labeled_audios_dict[audio_path]
-        log_path = CONFIG["LOG_FILE"]
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "w") as f:
-            json.dump(labeled_audios_dict, f, indent=4)
+        with span("log_labeled_audio"):
+            get_label_store().set_labeled(audio_path, False)
         removed = True
 
     if labels_data is not None:
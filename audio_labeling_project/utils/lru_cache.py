@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by an approximate memory budget.
+
+    Args:
+        max_bytes (int): Budget for the sum of all entry sizes. The most
+            recently inserted entry is always kept, even if it alone exceeds
+            the budget.
+        sizeof (callable): Returns the size in bytes of a cached value.
+        on_evict (callable, optional): Called with every value that leaves
+            the cache, whether evicted, replaced, discarded or cleared, so
+            it can release what the value holds.
+
+    The cache is not thread-safe; it is meant to be used from the GUI thread
+    only, with workers handing their results over through signals.
+    """
+
+    def __init__(self, max_bytes, sizeof, on_evict=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the cached value for *key* or None, updating the counters."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store *value* under *key* and evict old entries over the budget."""
+        dropped = []
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+            if entry[0] is not value:
+                dropped.append(entry[0])
+        size = self.sizeof(value)
+        self.entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (old_value, old_size) = self.entries.popitem(last=False)
+            self.current_bytes -= old_size
+            self.evictions += 1
+            dropped.append(old_value)
+        # Once the new entry is in place, so the callback can see it
+        if self.on_evict is not None:
+            for old_value in dropped:
+                self.on_evict(old_value)
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+            if self.on_evict is not None:
+                self.on_evict(entry[0])
+
+    def values(self):
+        """Cached values, least recently used first."""
+        return [value for value, _ in self.entries.values()]
+
+    def clear(self):
+        values = self.values()
+        self.entries.clear()
+        self.current_bytes = 0
+        if self.on_evict is not None:
+            for value in values:
+                self.on_evict(value)
+
+    def stats(self):
+        """Return a dict with the hit/miss counters and memory usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,49 @@
+import sys
+import time
+
+# Modules that must not be imported before the window is shown; the report
+# flags any of them found in sys.modules so an eager import is noticed.
+# numpy is imported eagerly on purpose: the widgets use it directly
+DEFERRED_MODULES = (
+    "sounddevice",
+    "soundfile",
+    "librosa",
+    "scipy",
+    "numba",
+    "matplotlib",
+)
+
+
+class StartupTimer:
+    """Records how long each startup phase takes, for ``main.py --startup-timing``.
+
+    Times are measured with ``time.perf_counter`` from *started*, which
+    ``main.py`` takes before importing Qt. For a per-module breakdown of the
+    imports run ``python -X importtime main.py`` instead.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.marks = []
+
+    def mark(self, label):
+        """Record the end of the phase called *label*."""
+        self.marks.append((label, time.perf_counter()))
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        print("Startup timing (ms):", file=stream)
+        previous = self.started
+        for label, moment in self.marks:
+            print(
+                f"  {label:<28} {(moment - previous) * 1000:8.1f}"
+                f" {(moment - self.started) * 1000:9.1f}",
+                file=stream,
+            )
+            previous = moment
+        loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+        print(
+            "  Deferred modules already loaded: "
+            + (", ".join(loaded) if loaded else "none"),
+            file=stream,
+        )
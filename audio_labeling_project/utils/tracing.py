@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Times named spans of the hot paths and optionally writes them to a file.
+
+    The latest duration of every span name is always kept, for the live
+    readout of the window; that costs two ``perf_counter`` calls per span.
+    Once :meth:`start` has been given a path, every span is also appended
+    to it as a Chrome trace "complete" event, one per line, so the file can
+    be opened in ``chrome://tracing`` or https://ui.perfetto.dev even if
+    the program is killed (both viewers accept the unterminated array).
+    Spans may be recorded from any thread.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = {}
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+
+    def start(self, path):
+        """Write the spans recorded from now on to *path*, replacing it."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            # Line buffered: a crash loses at most the span being written
+            self.file = open(path, "w", buffering=1)
+            self.file.write("[\n")
+            self.path = path
+
+    def stop(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            self.file = None
+            self.path = None
+
+    def record(self, name, start, end, **args):
+        """Record a span that ran from *start* to *end* (``perf_counter`` times).
+
+        Args:
+            name (str): Stage name; also the key of :meth:`last_duration`.
+            start (float): Start of the span.
+            end (float): End of the span.
+            **args: JSON-serialisable details shown with the event.
+        """
+        self.last[name] = end - start
+        if self.file is None:
+            return
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        line = json.dumps(event, default=str) + ",\n"
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line)
+
+    @contextmanager
+    def span(self, name, **args):
+        """Context manager recording the time spent in its block as *name*."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def last_duration(self, name):
+        """Seconds taken by the latest *name* span, or None if none ran yet."""
+        return self.last.get(name)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **args):
+    """Time a block of code as *name*; see :meth:`Tracer.span`."""
+    return _tracer.span(name, **args)
+
+
+def record(name, start, end, **args):
+    """Record a span measured by the caller; see :meth:`Tracer.record`."""
+    _tracer.record(name, start, end, **args)